@@ -54,8 +54,9 @@ if __name__ == "__main__":
     qubo_model = kw.qubo.QuboModel()
     # TSP path cost
     qubo_model.set_objective(
-        kw.core.quicksum(
-            [distance_matrix[u, v] * is_edge_used(path_matrix, u, v) for u, v in edges]
+        kw.core.quickdot(
+            [distance_matrix[u, v] for u, v in edges],
+            (is_edge_used(path_matrix, u, v) for u, v in edges),
         )
     )
 
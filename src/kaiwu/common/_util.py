@@ -15,7 +15,7 @@ def hamiltonian(ising_matrix, c_list):
     """计算哈密顿量.
 
     Args:
-        ising_matrix (np.ndarray): Ising 矩阵.
+        ising_matrix (np.ndarray or SparseMatrix): Ising 矩阵.
 
         c_list (np.ndarray): 要计算哈密顿量的变量组合集合.
 
@@ -34,7 +34,8 @@ def hamiltonian(ising_matrix, c_list):
         >>> h = hamiltonian(ising_matrix, c_list)   # doctest: +SKIP
     """
     # 方法1 by 王勇 邵帅 (最快版)
-    return -np.einsum("ij,ij->i", (c_list.dot(ising_matrix)), c_list)
+    # 用@而不是dot，使稀疏的SparseMatrix也能参与计算
+    return -np.einsum("ij,ij->i", (c_list @ ising_matrix), c_list)
 
     # 方法2 by 王勇 邵帅
     # return ((c_list.dot(matrix))*c_list).sum(axis=1)
@@ -15,8 +15,11 @@ from kaiwu.core._constraint import (
     get_min_penalty_for_equal_constraint,
     get_min_penalty_from_deltas,
 )
+from kaiwu.core._constraint import ConstraintArray
 from kaiwu.core._penalty_method_constraint import PenaltyMethodConstraint
-from kaiwu.core._get_val import get_sol_dict, get_val
+from kaiwu.core._get_val import get_sol_dict, get_val, get_val_batch
+from kaiwu.core._evaluator import ExpressionEvaluator
+from kaiwu.core._array_evaluator import ExpressionArrayEvaluator
 from kaiwu.core._expression import Expression
 
 from kaiwu.core._binary_model import BinaryModel
@@ -24,10 +27,19 @@ from kaiwu.core._binary_expression import (
     BinaryExpression,
     Binary,
     quicksum,
+    quickdot,
     Placeholder,
     Integer,
 )
-from kaiwu.core._matrix import ndarray, zeros, dot, BinaryExpressionNDArray
+from kaiwu.core._matrix import (
+    ndarray,
+    zeros,
+    dot,
+    quadratic_form,
+    BinaryExpressionNDArray,
+    LinearExpressionArray,
+)
+from kaiwu.core._einsum import einsum
 from kaiwu.core._ising import IsingModel, Spin, IsingExpression
 from kaiwu.core._qubo_model import (
     QuboModel,
@@ -39,7 +51,11 @@ from kaiwu.core._matrix_converter import (
     qubo_matrix_to_ising_matrix,
 )
 from kaiwu.core._model_converter import qubo_model_to_ising_model
-
+from kaiwu.core._variable_registry import VariableRegistry
+from kaiwu.core._sparse_matrix import SparseMatrix
+from kaiwu.core._term_store import TermStore
+from kaiwu.core._coo_expression import CooBinaryExpression
+from kaiwu.core._lazy_expression import LazyExpression
 
 __all__ = [
     "IsingSolver",
@@ -50,20 +66,28 @@ __all__ = [
     "get_min_penalty_from_min_diff",
     "get_min_penalty_for_equal_constraint",
     "get_min_penalty_from_deltas",
+    "ConstraintArray",
     "PenaltyMethodConstraint",
     "get_sol_dict",
     "get_val",
+    "get_val_batch",
+    "ExpressionEvaluator",
+    "ExpressionArrayEvaluator",
     "Expression",
     "BinaryModel",
     "BinaryExpression",
     "Binary",
     "quicksum",
+    "quickdot",
     "Placeholder",
     "Integer",
     "ndarray",
     "zeros",
     "dot",
+    "quadratic_form",
+    "einsum",
     "BinaryExpressionNDArray",
+    "LinearExpressionArray",
     "IsingModel",
     "IsingExpression",
     "Spin",
@@ -73,4 +97,9 @@ __all__ = [
     "ising_matrix_to_qubo_matrix",
     "qubo_matrix_to_ising_matrix",
     "qubo_model_to_ising_model",
+    "VariableRegistry",
+    "SparseMatrix",
+    "TermStore",
+    "CooBinaryExpression",
+    "LazyExpression",
 ]
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.array_evaluator
+
+功能: 编译后的表达式数组求值器
+"""
+
+import numpy as np
+from kaiwu.core._error import KaiwuError
+from kaiwu.core._evaluator import _BATCH_CHUNK_ELEMENTS, _to_binary
+from kaiwu.core._array_terms import compile_array_terms
+
+
+class ExpressionArrayEvaluator:
+    """编译后的表达式数组求值器.
+
+    把数组各元素的项展开为 (元素下标, 变量编号, 变量编号, 系数) 四个数组，
+    一次项的第二个变量编号指向恒为1的附加列。求值时对解矩阵做一次列收集和分段求和，
+    得到形状为 (N, *数组形状) 的取值，不再逐元素调用get_val。
+
+    Args:
+        array (np.ndarray): 元素为表达式或数字的数组
+
+        variables (dict, optional): 变量名到解向量编号的字典，缺省为数组中全部变量按名称排序编号。
+            不在其中的变量取值为0
+
+    Examples:
+        >>> import numpy as np
+        >>> import kaiwu as kw
+        >>> x = kw.core.ndarray((2, 2), "x", kw.core.Binary)
+        >>> evaluator = kw.core.ExpressionArrayEvaluator(x)
+        >>> evaluator.evaluate_batch(np.array([[1, 0, 0, 1], [0, 1, 1, 1]]))
+        array([[[1., 0.],
+                [0., 1.]],
+        <BLANKLINE>
+               [[0., 1.],
+                [1., 1.]]])
+        >>> kw.core.ExpressionArrayEvaluator(x.sum(axis=1) * 2).get_val({"x[1][0]": 1})
+        array([0., 2.])
+    """
+
+    def __init__(self, array, variables=None):
+        array = np.asarray(array, dtype=object)
+        compiled = compile_array_terms(array)
+        if compiled is None:
+            raise KaiwuError(
+                "Elements should be expressions or numbers without placeholders."
+            )
+        position, term, value, keys, offsets = compiled
+        if variables is None:
+            names = sorted({var for key in keys for var in key})
+            variables = dict(zip(names, range(len(names))))
+        self._set_variables(variables)
+        self.shape = array.shape
+        self.offset = offsets.astype(np.float64).ravel()
+
+        # 各项的两个变量编号，一次项的第二个编号为附加的常数列，缺失变量记为-1
+        first = np.array([variables.get(key[0], -1) for key in keys], dtype=np.int64)
+        second = np.array(
+            [variables.get(key[1], -1) if len(key) > 1 else self.size for key in keys],
+            dtype=np.int64,
+        )
+        self._set_terms(position, first[term], second[term], value)
+
+    @classmethod
+    def from_linear_terms(cls, shape, offset, terms, column_names, variables):
+        """由一次项的稀疏系数构造求值器
+
+        Args:
+            shape (tuple): 数组形状
+
+            offset (np.ndarray): 常数项数组
+
+            terms (tuple): (元素展平下标, 列编号, 系数) 三个数组，元素下标须已排序
+
+            column_names (list): 列编号对应的变量名
+
+            variables (dict): 变量名到解向量编号的字典
+
+        Returns:
+            ExpressionArrayEvaluator: 求值器
+        """
+        evaluator = cls.__new__(cls)
+        evaluator._set_variables(variables)
+        evaluator.shape = tuple(shape)
+        evaluator.offset = np.asarray(offset, dtype=np.float64).ravel()
+        cell, column, value = terms
+        first = np.array(
+            [variables.get(name, -1) for name in column_names], dtype=np.int64
+        )[column]
+        evaluator._set_terms(
+            cell, first, np.full(len(first), evaluator.size, dtype=np.int64), value
+        )
+        return evaluator
+
+    def _set_variables(self, variables):
+        self.names = list(variables)
+        self.columns = np.fromiter(
+            variables.values(), dtype=np.int64, count=len(variables)
+        )
+        self.size = int(self.columns.max()) + 1 if len(self.columns) else 0
+
+    def _set_terms(self, cell, first, second, value):
+        # 含不在变量字典中的变量的项取值为0，直接略去
+        kept = (first >= 0) & (second >= 0)
+        self.cell = cell[kept]
+        self.first = first[kept]
+        self.second = second[kept]
+        self.value = np.asarray(value, dtype=np.float64)[kept]
+
+    def get_variables(self):
+        """返回变量名到解向量编号的字典"""
+        return dict(zip(self.names, self.columns.tolist()))
+
+    def _evaluate_binary(self, binary):
+        num = len(binary)
+        values = np.tile(self.offset, (num, 1))
+        if len(self.value):
+            if binary.shape[1] < self.size:
+                raise KaiwuError(f"Solutions should have at least {self.size} columns.")
+            binary = np.hstack([binary[:, : self.size], np.ones((num, 1))])
+            group_start = np.flatnonzero(np.diff(self.cell, prepend=-1))
+            group_cell = self.cell[group_start]
+            chunk = max(1, _BATCH_CHUNK_ELEMENTS // len(self.value))
+            for start in range(0, num, chunk):
+                block = binary[start : start + chunk]
+                terms = block[:, self.first] * block[:, self.second] * self.value
+                values[start : start + chunk, group_cell] += np.add.reduceat(
+                    terms, group_start, axis=1
+                )
+        return values.reshape((num,) + self.shape)
+
+    def evaluate_batch(self, solutions):
+        """计算多组解下数组各元素的取值
+
+        Args:
+            solutions (np.ndarray): 形状为(N, n)的解矩阵，每行一组解。取值为0/1，
+                或含-1时按spin解处理，转换为 (s+1)/2
+
+        Returns:
+            np.ndarray: 形状为(N, *数组形状)的取值数组
+        """
+        return self._evaluate_binary(_to_binary(solutions))
+
+    def evaluate(self, solution):
+        """计算单个解向量下数组各元素的取值
+
+        Args:
+            solution (np.ndarray): 长度为n的0/1或spin解向量
+
+        Returns:
+            np.ndarray: 与数组同形状的取值数组
+        """
+        return self._evaluate_binary(_to_binary(solution))[0]
+
+    def get_val(self, sol_dict):
+        """根据结果字典计算数组各元素的取值，变量值按原样代入
+
+        Args:
+            sol_dict (dict): 由get_sol_dict生成的结果字典。
+
+        Returns:
+            np.ndarray: 与数组同形状的取值数组
+        """
+        vector = np.zeros((1, self.size))
+        vector[0, self.columns] = [sol_dict.get(name, 0.0) for name in self.names]
+        return self._evaluate_binary(vector)[0]
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.array_terms
+
+功能: 表达式数组的稀疏系数编译与归约
+"""
+
+import itertools
+import numbers
+import numpy as np
+from kaiwu.core._binary_expression import Binary, BinaryExpression, Integer
+from kaiwu.core._expression import Expression, is_zero
+
+# 数值矩阵与表达式数组相乘时，中间乘积数组的元素个数上限
+_DOT_CHUNK_ELEMENTS = 2**22
+
+# 逐元素数乘、平移的结果与BinaryExpression相同的元素类型
+_AFFINE_TYPES = (BinaryExpression, Binary, Integer)
+
+
+def is_numeric(mat):
+    """数组为数值类型(布尔、整数或浮点)"""
+    return mat.dtype.kind in "biuf"
+
+
+def compile_array_terms(mat):
+    """把表达式数组的各元素展开为稀疏系数
+
+    Returns:
+        tuple or None: (元素位置, 项编号, 系数, 项键列表, 常数项数组)，含占位符或非表达式元素时返回None
+    """
+    items = mat.ravel().tolist()
+    if not all(isinstance(item, (Expression, numbers.Number)) for item in items):
+        return None
+    # 数字元素视为只有常数项的表达式
+    coefficients = [getattr(item, "coefficient", {}) for item in items]
+    offsets = [getattr(item, "offset", item) for item in items]
+    all_keys = list(itertools.chain.from_iterable(coefficients))
+    value = list(itertools.chain.from_iterable(map(dict.values, coefficients)))
+    counts = list(map(len, coefficients))
+    # 系数和常数项中的占位符会使数组退化为object类型
+    value = np.array(value)
+    offsets = np.array(offsets)
+    if not is_numeric(value) and value.size or not is_numeric(offsets):
+        return None
+    # 每个项记下首次出现的下标，再压缩为按首次出现顺序的连续编号
+    first_seen = {}
+    first = np.fromiter(
+        map(first_seen.setdefault, all_keys, itertools.count()),
+        np.int64,
+        len(all_keys),
+    )
+    unique_first, term = np.unique(first, return_inverse=True)
+    return (
+        np.repeat(np.arange(len(counts), dtype=np.int64), counts),
+        term.ravel(),
+        value,
+        [all_keys[idx] for idx in unique_first.tolist()],
+        offsets.reshape(mat.shape),
+    )
+
+
+def group_terms(expr_row, term, num_terms):
+    """按(表达式行, 项)对系数分组
+
+    系数按原元素的行优先顺序给出，组按(行, 首次出现位置)排序，即与逐项quicksum的插入顺序一致。
+
+    Returns:
+        tuple: (使同组系数相邻的排列, 各组起点, 各组所在的表达式行)
+    """
+    num_terms = max(num_terms, 1)
+    keys, first, inverse = np.unique(
+        expr_row * num_terms + term, return_index=True, return_inverse=True
+    )
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.lexsort((first, keys // num_terms))] = np.arange(len(first))
+    group = rank[inverse.ravel()]
+    order = np.argsort(group, kind="stable")
+    group_start = np.flatnonzero(np.diff(group[order], prepend=-1))
+    return order, group_start, expr_row[order][group_start]
+
+
+def normalize_axes(axis, ndim):
+    """把axis参数统一为升序的非负轴编号元组"""
+    if axis is None:
+        return tuple(range(ndim))
+    axes = set()
+    for ax in np.atleast_1d(axis).tolist():
+        if not -ndim <= ax < ndim:
+            raise ValueError(
+                f"axis {ax} is out of bounds for array of dimension {ndim}"
+            )
+        axes.add(ax % ndim)
+    return tuple(sorted(axes))
+
+
+def group_expressions(group_keys, sums, row_bound, offsets):
+    """由各组的求和结果生成每一行的表达式，略去系数为0的项"""
+    return [
+        BinaryExpression(
+            {
+                key: coef
+                for key, coef in zip(
+                    group_keys[row_bound[row] : row_bound[row + 1]],
+                    sums[row_bound[row] : row_bound[row + 1]],
+                )
+                if coef != 0
+            },
+            offset,
+        )
+        for row, offset in enumerate(offsets)
+    ]
+
+
+def dot_numeric(mat_num, mat_expr, num_left):
+    """数值矩阵与表达式数组的乘积，两者的最后一维为求和维
+
+    直接由稀疏系数计算乘积的系数，不生成逐元素的中间表达式。
+    含占位符等无法编译的元素时返回None，由调用方走通用路径。
+    """
+    compiled = compile_array_terms(mat_expr)
+    if compiled is None:
+        return None
+    position, term, value, keys, offsets = compiled
+    size_k = mat_expr.shape[-1]
+    mat_num = mat_num.reshape(-1, size_k)
+    mat_offsets = mat_num @ offsets.reshape(-1, size_k).T
+
+    entry_order, group_start, group_row = group_terms(
+        position // size_k, term, len(keys)
+    )
+    group_keys = [keys[i] for i in term[entry_order][group_start].tolist()]
+    row_bound = np.searchsorted(group_row, np.arange(mat_offsets.shape[1] + 1)).tolist()
+    entry_k, entry_value = position[entry_order] % size_k, value[entry_order]
+
+    result = np.empty(mat_offsets.shape, dtype=object)
+    chunk = max(1, _DOT_CHUNK_ELEMENTS // max(len(entry_order), 1))
+    for start in range(0, len(mat_num), chunk):
+        block = mat_num[start : start + chunk]
+        if len(entry_order):
+            sums = np.add.reduceat(block[:, entry_k] * entry_value, group_start, axis=1)
+        else:
+            sums = np.zeros((len(block), 0))
+        for row, (coef_row, offset_row) in enumerate(
+            zip(sums.tolist(), mat_offsets[start : start + chunk].tolist())
+        ):
+            result[start + row] = group_expressions(
+                group_keys, coef_row, row_bound, offset_row
+            )
+    return result if num_left else result.T
+
+
+def affine_elements(mat_expr, scale=None, shift=None):
+    """逐元素先乘scale再加shift，scale与shift为可广播的数值或数值数组，为None时跳过该步
+
+    直接由各元素的系数字典生成结果，不经过NumPy的object循环和表达式运算符的分派，
+    结果与逐元素运算相同(数字元素的结果仍为数字，乘0的元素不保留任何项)。
+    含延迟求值表达式或其他表达式类型(如Ising表达式)时返回None，由调用方走通用路径。
+
+    Returns:
+        np.ndarray or None: 广播后形状的object数组
+    """
+    items = mat_expr.ravel().tolist()
+    shape = np.broadcast_shapes(mat_expr.shape, np.shape(scale), np.shape(shift))
+    source = np.broadcast_to(np.arange(len(items)).reshape(mat_expr.shape), shape)
+    size = int(np.prod(shape, dtype=np.int64))
+    scales = (
+        np.broadcast_to(scale, shape).ravel().tolist() if scale is not None else None
+    )
+    shifts = (
+        np.broadcast_to(shift, shape).ravel().tolist() if shift is not None else None
+    )
+
+    new = object.__new__
+    result = []
+    for pos, src in enumerate(source.ravel().tolist()):
+        item = items[src]
+        if type(item) not in _AFFINE_TYPES:
+            if not isinstance(item, numbers.Number):
+                return None
+            if scales is not None:
+                item = item * scales[pos]
+            result.append(item if shifts is None else item + shifts[pos])
+            continue
+        expr = new(BinaryExpression)
+        expr._version = 0  # pylint: disable=protected-access
+        expr._derived = None  # pylint: disable=protected-access
+        if scales is None:
+            expr.coefficient = item.coefficient.copy()
+            expr.offset = item.offset
+        elif is_zero(scales[pos]):
+            expr.coefficient = {}
+            expr.offset = 0
+        else:
+            factor = scales[pos]
+            expr.coefficient = {
+                key: value * factor for key, value in item.coefficient.items()
+            }
+            expr.offset = item.offset * factor
+        if shifts is not None:
+            expr.offset = expr.offset + shifts[pos]
+        result.append(expr)
+    return np.fromiter(result, dtype=object, count=size).reshape(shape)
+
+
+def element_names(shape, name):
+    """按行优先顺序生成数组各元素的变量名，如 ``x[0][1]``，各维下标按该维长度补零"""
+    suffixes = [
+        [f"[{str(idx).zfill(len(str(size - 1)))}]" for idx in range(size)]
+        for size in shape
+    ]
+    if not suffixes:
+        yield name
+        return
+    # 除最后一维外的前缀只拼接一次，最后一维逐个追加
+    last = suffixes.pop()
+    for parts in itertools.product(*suffixes):
+        prefix = name + "".join(parts)
+        for suffix in last:
+            yield prefix + suffix
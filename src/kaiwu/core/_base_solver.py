@@ -17,7 +17,7 @@ def get_sorted_solutions(
     """最优解采样.
 
     Args:
-        matrix (np.ndarray): Ising 矩阵.
+        matrix (np.ndarray or SparseMatrix): Ising 矩阵.
 
         solutions (np.ndarray): 变量配置.
 
@@ -50,7 +50,7 @@ def get_sorted_solutions(
                [-1,  1, -1,  1,  1],
                [ 1,  1, -1,  1,  1]]), array([-8., -8., -8., -8., -4.,  8.]))
     """
-    hamilton = -np.einsum("ij,ij->i", (solutions.dot(matrix)), solutions) + bias
+    hamilton = -np.einsum("ij,ij->i", solutions @ matrix, solutions) + bias
     if sort_solutions:
         index = np.argsort(hamilton)
         solutions = solutions[index]
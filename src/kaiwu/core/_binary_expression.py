@@ -3,18 +3,28 @@ BinaryExpression
 Binary变量构成的表达式
 """
 
-import copy
 import math
 import numbers
+import sys
 import numpy as np
 
-from kaiwu.core._expression import Expression, expr_add, expr_neg, expr_mul, expr_pow
+from kaiwu.core._expression import (
+    Expression,
+    expr_add,
+    expr_iadd,
+    expr_neg,
+    expr_mul,
+    expr_pow,
+    is_lazy,
+)
 from kaiwu.core._error import KaiwuError
 
 
 class BinaryExpression(Expression):
     """QUBO表达式的基础数据结构"""
 
+    __slots__ = ()
+
     def feed(self, feed_dict):
         """为占位符号赋值, 并返回赋值后的新表达式对象
 
@@ -32,10 +42,18 @@ class BinaryExpression(Expression):
             >>> str(y)  # doctest: +NORMALIZE_WHITESPACE
             '2*a'
         """
-        ret = copy.deepcopy(self)
-        for expr_vars in ret.coefficient:
-            if not isinstance(ret.coefficient[expr_vars], numbers.Number):
-                ret.coefficient[expr_vars] = ret.coefficient[expr_vars].feed(feed_dict)
+        # 写时复制的副本，只有含占位符时才生成新的系数字典
+        ret = self.copy()
+        coefficient = ret.coefficient
+        if not all(isinstance(value, numbers.Number) for value in coefficient.values()):
+            ret.coefficient = {
+                key: (
+                    value
+                    if isinstance(value, numbers.Number)
+                    else value.feed(feed_dict)
+                )
+                for key, value in coefficient.items()
+            }
         if not isinstance(ret.offset, numbers.Number):
             ret.offset = ret.offset.feed(feed_dict)
         return ret
@@ -49,10 +67,22 @@ class BinaryExpression(Expression):
     def __add__(self, other):
         if isinstance(other, np.ndarray):
             return other.__add__(self)
+        if is_lazy(other):
+            return other.__radd__(self)
         result = BinaryExpression()
         expr_add(self, other, result)
         return result
 
+    def __iadd__(self, other):
+        if isinstance(other, np.ndarray) or is_lazy(other):
+            return NotImplemented
+        return super().__iadd__(other)
+
+    def __isub__(self, other):
+        if isinstance(other, np.ndarray) or is_lazy(other):
+            return NotImplemented
+        return super().__isub__(other)
+
     def __rsub__(self, other):
         return (-self).__add__(other)
 
@@ -69,10 +99,17 @@ class BinaryExpression(Expression):
         return self.__mul__(other)
 
     def __mul__(self, other):
+        if is_lazy(other):
+            return other.__rmul__(self)
         result = BinaryExpression()
         expr_mul(self, other, result)
         return result
 
+    def __imul__(self, other):
+        if isinstance(other, np.ndarray) or is_lazy(other):
+            return NotImplemented
+        return super().__imul__(other)
+
     def __pow__(self, other):
         result = BinaryExpression()
         expr_pow(self, other, result)
@@ -80,21 +117,78 @@ class BinaryExpression(Expression):
 
 
 class Binary(BinaryExpression):
-    """二进制变量, 只保存变量名，不继承 QuboExpression"""
+    """二进制变量, 只保存变量名，不继承 QuboExpression
+
+    系数字典在首次访问 ``coefficient`` 时才创建并保存，之后每次访问返回同一个字典，
+    只参与 ``quicksum`` 等求和的变量不创建字典。
+    """
 
+    __slots__ = ("name", "_terms")
+
+    _inplace_ops = False
+
+    # pylint: disable=super-init-not-called
     def __init__(self, name: str = ""):
-        super().__init__({(name,): 1}, 0)
-        self.name = name
+        # 驻留变量名，使系数字典的键比较可以走对象同一性的快速路径
+        self.name = sys.intern(name)
+        self._terms = None
+        self.offset = 0
+        self._version = 0
+        self._derived = None
+
+    @property
+    def coefficient(self):
+        """系数字典"""
+        if self._terms is None:
+            self._terms = {(self.name,): 1}
+        return self._terms
+
+    @coefficient.setter
+    def coefficient(self, coefficient):
+        self._terms = coefficient
+
+    def _derived_key(self):
+        if self._terms is None:
+            # 尚未创建系数字典，不可能被原地修改，只按修改版本判断
+            return self._version, None
+        return super()._derived_key()
+
+    @classmethod
+    def from_names(cls, names):
+        """批量构造变量，结果与逐个调用构造函数相同
+
+        Args:
+            names (iterable): 变量名序列
+
+        Returns:
+            list: 变量列表
+        """
+        new = object.__new__
+        variables = []
+        for name in map(sys.intern, names):
+            var = new(cls)
+            var.name = name
+            var._terms = None  # pylint: disable=protected-access
+            var.offset = 0
+            var._version = 0  # pylint: disable=protected-access
+            var._derived = None  # pylint: disable=protected-access
+            variables.append(var)
+        return variables
 
     def clear(self):
         self.name = ""
         self.coefficient = {}
         self.offset = 0
+        self.mark_modified()
 
 
 class Integer(BinaryExpression):
     """整数变量, 只保存变量名和范围，不继承 QuboExpression"""
 
+    __slots__ = ()
+
+    _inplace_ops = False
+
     def __init__(self, name: str = "", min_value=0, max_value=127):
         super().__init__()
         self.offset = min_value
@@ -114,6 +208,10 @@ class Integer(BinaryExpression):
 class Placeholder(BinaryExpression):
     """占位符变量, 只保存变量名, 对决策"""
 
+    __slots__ = ("name",)
+
+    _inplace_ops = False
+
     def __init__(self, name: str = ""):
         super().__init__()
         self.name = name
@@ -131,6 +229,11 @@ class Placeholder(BinaryExpression):
 class _Placeholder(Expression):
     """占位符的底层实现，实际在QuboExpression的dict结构的参数位置"""
 
+    __slots__ = ()
+
+    # 作为系数被多个表达式共享，不能原地修改
+    _inplace_ops = False
+
     def feed(self, feed_dict):
         """为占位符赋值"""
         placeholder_value = 0
@@ -143,11 +246,11 @@ class _Placeholder(Expression):
         return placeholder_value
 
 
-def quicksum(qubo_expr_list: list):
+def quicksum(qubo_expr_list):
     """高性能的QUBO求和器.
 
     Args:
-        qubo_expr_list (QUBO列表): 用于求和的QUBO表达式的列表.
+        qubo_expr_list (iterable): 用于求和的QUBO表达式的列表，也可以是生成器或数组，逐项流式累加.
 
     Returns:
         BinaryExpression: 约束QUBO.
@@ -158,26 +261,110 @@ def quicksum(qubo_expr_list: list):
         >>> output = kw.core.quicksum(qubo_list)
         >>> str(output)
         'b0+b1+b2+b3+b4+b5+b6+b7+b8+b9'
+        >>> str(kw.core.quicksum(qubo_list[i] for i in range(0, 10, 3)))
+        'b0+b3+b6+b9'
     """
+    if isinstance(qubo_expr_list, np.ndarray):
+        qubo_expr_list = qubo_expr_list.flat
     qsum = BinaryExpression()
-    for single_q in qubo_expr_list:
+    items = iter(qubo_expr_list)
+    coefficient = qsum.coefficient
+    for single_q in items:
+        # pylint: disable-next=protected-access,unidiomatic-typecheck
+        if type(single_q) is Binary and single_q._terms is None:
+            # 未修改过的变量只有一项，不生成临时的系数字典
+            qsum.offset += single_q.offset
+            key = (single_q.name,)
+            value = coefficient.get(key, 0) + 1
+            if value == 0:
+                del coefficient[key]
+            else:
+                coefficient[key] = value
+            continue
         if isinstance(single_q, numbers.Number):
             qsum.offset += single_q
             continue
         if not isinstance(single_q, Expression):
             raise KaiwuError("qubo_expr_list should be a list of QUBO Expression")
+        if is_lazy(single_q):
+            # 含延迟求值的表达式时，剩余部分整体作为计算图的求和节点
+            return single_q.from_sum([qsum, single_q, *items])
 
         qsum.offset += single_q.offset
-        for ele in single_q.coefficient.keys():
-            if ele in qsum.coefficient:
-                qsum.coefficient[ele] += single_q.coefficient[ele]
+        for ele, value in single_q.coefficient.items():
+            if ele in coefficient:
+                coefficient[ele] += value
             else:
-                qsum.coefficient[ele] = single_q.coefficient[ele]
-            if qsum.coefficient[ele] == 0:
-                qsum.coefficient.pop(ele)
+                coefficient[ele] = value
+            if coefficient[ele] == 0:
+                coefficient.pop(ele)
     return qsum
 
 
+_MISSING = object()
+
+
+def quickdot(coefficients, qubo_expr_list):
+    """高性能的QUBO加权求和器, 计算 sum(coefficients[i] * qubo_expr_list[i]).
+
+    权重在累加时直接乘到各项系数上，不生成中间的数乘表达式。
+
+    Args:
+        coefficients (iterable): 数值权重序列，可以是NumPy数组.
+
+        qubo_expr_list (iterable): QUBO表达式或数字的序列，可以是生成器或数组，长度须与权重一致.
+
+    Returns:
+        BinaryExpression: 加权和.
+
+    Examples:
+        >>> import numpy as np
+        >>> import kaiwu as kw
+        >>> x = [kw.core.Binary(f"x{i}") for i in range(3)]
+        >>> str(kw.core.quickdot(np.array([3, 0, -2]), x))
+        '3*x0-2*x2'
+        >>> str(kw.core.quickdot([1, 2, 3], (x[i] * x[i - 1] for i in range(3))))
+        'x0*x2+2*x0*x1+3*x1*x2'
+    """
+    if isinstance(coefficients, np.ndarray):
+        coefficients = coefficients.ravel().tolist()
+    if isinstance(qubo_expr_list, np.ndarray):
+        qubo_expr_list = qubo_expr_list.flat
+    qsum = BinaryExpression()
+    items = _weighted_items(coefficients, qubo_expr_list)
+    for weight, single_q in items:
+        if isinstance(single_q, numbers.Number):
+            qsum.offset += weight * single_q
+            continue
+        if not isinstance(single_q, Expression):
+            raise KaiwuError("qubo_expr_list should be a list of QUBO Expression")
+        if isinstance(weight, numbers.Number) and not is_lazy(single_q):
+            if weight != 0:
+                expr_iadd(qsum, single_q, weight)
+            continue
+        # 权重为占位符或表达式时按通用乘法计算该项
+        product = weight * single_q
+        if is_lazy(product):
+            # 含延迟求值的表达式时，剩余部分整体作为计算图的求和节点
+            return product.from_sum([qsum, product, *(w * q for w, q in items)])
+        expr_iadd(qsum, product)
+    return qsum
+
+
+def _weighted_items(coefficients, qubo_expr_list):
+    """逐对产出权重和表达式，长度不一致时报错；输入本身抛出的异常原样传出"""
+    expressions = iter(qubo_expr_list)
+    for weight in coefficients:
+        single_q = next(expressions, _MISSING)
+        if single_q is _MISSING:
+            break
+        yield weight, single_q
+    else:
+        if next(expressions, _MISSING) is _MISSING:
+            return
+    raise KaiwuError("coefficients and qubo_expr_list should have the same length")
+
+
 if __name__ == "__main__":
     import doctest
 
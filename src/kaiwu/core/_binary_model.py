@@ -10,14 +10,36 @@ import logging
 import numpy as np
 from kaiwu.core._penalty_method_constraint import PenaltyMethodConstraint
 from kaiwu.core._constraint import get_min_penalty_from_min_diff, get_soft_penalty
-from kaiwu.core._get_val import get_val
+from kaiwu.core._get_val import get_val_compiled
 from kaiwu.core._error import KaiwuError
 from kaiwu.core._binary_expression import BinaryExpression
-from kaiwu.core._constraint import Constraint
+from kaiwu.core._coo_expression import CooBinaryExpression
+from kaiwu.core._expression import Expression, is_lazy
+from kaiwu.core._constraint import Constraint, ConstraintArray
+from kaiwu.core._array_terms import element_names
 
 logger = logging.getLogger(__name__)
 
 
+def _copy_objective(objective):
+    """目标函数的副本：表达式只浅拷贝系数字典，不逐项深拷贝
+
+    模型持有自己的字典，之后直接修改原表达式的 ``coefficient`` 字典不会影响模型；
+    原表达式不标记为共享，之后的原地运算不会多复制一次字典。
+    COO表达式复制自己的数组，延迟求值的表达式没有系数字典，仍然深拷贝。
+    """
+    if isinstance(objective, CooBinaryExpression):
+        return objective.copy()
+    if isinstance(objective, Expression) and not is_lazy(objective):
+        ret = copy.copy(objective)
+        # pylint: disable=protected-access
+        ret.coefficient = dict(objective.coefficient)
+        ret._shared = False
+        ret._derived = None
+        return ret
+    return copy.deepcopy(objective)
+
+
 class BinaryModel:
     """二值模型类
 
@@ -29,7 +51,7 @@ class BinaryModel:
         if objective is None:
             self.objective = BinaryExpression({}, 0)
         else:
-            self.objective = copy.deepcopy(objective)
+            self.objective = _copy_objective(objective)
         self.hard_constraints = {}
         self.soft_constraints = {}
         self.hard_constraints_made = {}
@@ -74,7 +96,7 @@ class BinaryModel:
         Args:
             objective (BinaryExpression): 目标函数表达式
         """
-        self.objective = copy.deepcopy(objective)
+        self.objective = _copy_objective(objective)
         self._on_objective_change()
 
     def add_constraint(
@@ -96,6 +118,9 @@ class BinaryModel:
                 2. 多个约束: list/tuple/np.ndarray，自动遍历逐个添加
                    例如: ``[constraint1, constraint2, constraint3]``
 
+                3. 约束数组: 表达式数组比较得到的ConstraintArray，一次性注册全部元素
+                   例如: ``x.sum(axis=1) == 1``
+
             name (str or list, optional): 约束名称，默认自动命名。当为多个约束时，
                 若传入字符串则为公共前缀，若传入字符串列表则需与约束数量一致。
 
@@ -130,6 +155,11 @@ class BinaryModel:
         if name is None:
             name = f"_constraint{self._cnt}"
             self._cnt += 1
+        if isinstance(constraint_in, ConstraintArray):
+            self._add_constraint_array(
+                constraint_in, name, constr_type, penalty, slack_var_expr
+            )
+            return
         if isinstance(constraint_in, (list, tuple, np.ndarray)):
             if slack_var_expr is not None and not (
                 type(slack_var_expr) is type(constraint_in)
@@ -138,13 +168,9 @@ class BinaryModel:
                 raise KaiwuError(
                     "Slack variable expression must match the type and shape of constraints."
                 )
-            len_str_k = len(str(len(constraint_in) - 1))
-            for idx, constraint in enumerate(constraint_in):
-                item_name = f"{name}[{str(idx).zfill(len_str_k)}]"
-                tmp_slack = slack_var_expr[idx] if slack_var_expr is not None else None
-                self.add_constraint(
-                    constraint, item_name, constr_type, penalty, tmp_slack
-                )
+            self._add_constraint_list(
+                constraint_in, name, constr_type, penalty, slack_var_expr
+            )
             return
 
         # Single constraint
@@ -160,6 +186,97 @@ class BinaryModel:
         else:
             self.hard_constraints[name] = constraint_in
 
+    def _add_constraint_array(
+        self, constraints, name, constr_type, penalty, slack_var_expr
+    ):
+        """一次性注册约束数组，命名方式与逐个添加嵌套列表时相同"""
+        if slack_var_expr is not None:
+            slack_var_expr = np.asarray(slack_var_expr, dtype=object)
+            if slack_var_expr.shape != constraints.shape:
+                raise KaiwuError(
+                    "Slack variable expression must match the type and shape of constraints."
+                )
+            slack_list = slack_var_expr.ravel().tolist()
+        else:
+            slack_list = [None] * constraints.size
+        self._register_constraints(
+            list(element_names(constraints.shape, name)),
+            list(constraints.iter_constraints()),
+            slack_list,
+            constr_type,
+            penalty,
+        )
+
+    def _add_constraint_list(
+        self, constraints, name, constr_type, penalty, slack_var_expr
+    ):
+        """批量注册约束列表或数组
+
+        多维数组按元素一次生成全部名称；列表中的单个约束一次性注册，
+        嵌套的列表、数组或约束数组仍按原顺序交给add_constraint处理。
+        """
+        if isinstance(constraints, np.ndarray) and constraints.ndim > 1:
+            if slack_var_expr is not None:
+                slack_var_expr = np.asarray(slack_var_expr, dtype=object)
+                if slack_var_expr.shape != constraints.shape:
+                    raise KaiwuError(
+                        "Slack variable expression must match the type and shape of constraints."
+                    )
+                slack_var_expr = slack_var_expr.ravel()
+            names = element_names(constraints.shape, name)
+            constraints = constraints.ravel()
+        else:
+            names = element_names((len(constraints),), name)
+        if slack_var_expr is None:
+            slack_var_expr = [None] * len(constraints)
+
+        names = list(names)
+        constraints = [
+            Constraint(item, None) if isinstance(item, BinaryExpression) else item
+            for item in constraints
+        ]
+        slack_var_expr = list(slack_var_expr)
+        # 嵌套的列表、数组把约束分成若干段，每段一次性注册，保持添加顺序
+        nested = [
+            pos
+            for pos, item in enumerate(constraints)
+            if isinstance(item, (list, tuple, np.ndarray, ConstraintArray))
+        ]
+        start = 0
+        for pos in nested + [len(constraints)]:
+            self._register_constraints(
+                names[start:pos],
+                constraints[start:pos],
+                slack_var_expr[start:pos],
+                constr_type,
+                penalty,
+            )
+            if pos < len(constraints):
+                self.add_constraint(
+                    constraints[pos],
+                    names[pos],
+                    constr_type,
+                    penalty,
+                    slack_var_expr[pos],
+                )
+            start = pos + 1
+
+    def _register_constraints(self, names, constraints, slacks, constr_type, penalty):
+        """按名称批量注册约束，重名时只在一次集合求交后逐个告警"""
+        target = (
+            self.soft_constraints if constr_type == "soft" else self.hard_constraints
+        )
+        existing = self.hard_constraints.keys() | self.soft_constraints.keys()
+        for item_name in existing.intersection(names):
+            logger.warning(
+                "Constraint %s is already added. The original one will be replaced.",
+                item_name,
+            )
+        for constraint, slack in zip(constraints, slacks):
+            constraint.default_penalty = penalty
+            constraint.slack_var_expr = slack
+        target.update(zip(names, constraints))
+
     def get_value(self, solution_dict):
         """根据结果字典将变量值带入qubo变量.
 
@@ -169,7 +286,7 @@ class BinaryModel:
         Returns:
             float: 带入qubo后所得的值
         """
-        return get_val(self.objective, solution_dict)
+        return get_val_compiled(self.objective, solution_dict)
 
     def verify_constraint(
         self, solution_dict, constr_type: Literal["soft", "hard"] = "hard"
@@ -197,7 +314,9 @@ class BinaryModel:
         for name, constr_info in temp_constraint_dicts.items():
             if not constr_info.is_satisfied(solution_dict):
                 unsatisfied_count += 1
-            result_dict[name] = get_val(constr_info.left_operand, solution_dict)
+            result_dict[name] = get_val_compiled(
+                constr_info.left_operand, solution_dict
+            )
 
         logger.debug(
             "unsatisfied %s constraints count = %s | objective = %s",
@@ -210,11 +329,11 @@ class BinaryModel:
 
     def initialize_penalties(self):
         """自动初始化所有的惩罚系数"""
-        positive_delta = {}
-        negative_delta = {}
+        positive_delta = np.zeros(0)
+        negative_delta = np.zeros(0)
 
         if self.objective is not None:
-            negative_delta, positive_delta = self.objective.get_max_deltas()
+            negative_delta, positive_delta = self.objective.get_max_delta_arrays()
 
         for _, constraint_info in self.hard_constraints_made.items():
             constraint_info.set_penalty(
@@ -227,6 +346,15 @@ class BinaryModel:
                 get_soft_penalty(self.objective, constraint_info.constraint_expr)
             )
 
+    def update_penalty(self, constraint, previous_penalty):
+        """约束的惩罚系数改变时调用，子类据此更新已合并的结果
+
+        Args:
+            constraint (PenaltyMethodConstraint): 惩罚系数改变的约束
+
+            previous_penalty (float): 改变前的惩罚系数
+        """
+
     def get_constraints_expr_list(self):
         """获取当前所有的constraint。
 
@@ -252,17 +380,23 @@ class BinaryModel:
         if self.constraint_handler is None:
             raise KaiwuError("Please set constraint handler first!")
 
-        # 整理约束项
-        for name, constraint in self.hard_constraints.items():
-            self.hard_constraints_made[name] = (
-                self.constraint_handler.from_constraint_definition(
-                    name, constraint, self
+        for made, constraints in (
+            (self.hard_constraints_made, self.hard_constraints),
+            (self.soft_constraints_made, self.soft_constraints),
+        ):
+            if hasattr(self.constraint_handler, "from_constraint_definitions"):
+                # 整批编译，数值系数的一次约束一次性生成松弛变量和平方展开
+                made.update(
+                    zip(
+                        constraints,
+                        self.constraint_handler.from_constraint_definitions(
+                            constraints, constraints.values(), self
+                        ),
+                    )
                 )
-            )
-        for name, constraint in self.soft_constraints.items():
-            self.soft_constraints_made[name] = (
-                self.constraint_handler.from_constraint_definition(
+                continue
+            for name, constraint in constraints.items():
+                made[name] = self.constraint_handler.from_constraint_definition(
                     name, constraint, self
                 )
-            )
         self.compiled = True
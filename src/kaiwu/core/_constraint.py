@@ -4,11 +4,13 @@
 
 功能: 提供约束项基础定义类
 """
+
 import math
 import operator
 import logging
+import numpy as np
 
-from kaiwu.core._get_val import get_val
+from kaiwu.core._get_val import get_val_compiled
 from kaiwu.core._error import KaiwuError
 
 logger = logging.getLogger(__name__)
@@ -59,7 +61,7 @@ class Constraint:
 
     def is_satisfied(self, solution_dict):
         """验证约束满足情况"""
-        left = float(get_val(self.left_operand, solution_dict))
+        left = float(get_val_compiled(self.left_operand, solution_dict))
         right = float(self.expected_value)
         if self.relation is None:
             return left <= right
@@ -68,6 +70,158 @@ class Constraint:
         return ops[self.relation](left, right)
 
 
+class ConstraintArray:
+    """由表达式数组比较得到的约束数组.
+
+    所有元素共用一个关系运算符，只保存左侧表达式数组(与比较的数组共享存储，不复制)
+    和右侧常数数组，取出单个元素时才生成 ``Constraint``。
+    ``BinaryModel.add_constraint`` 可以一次性注册整个约束数组。
+    支持 ``reshape``、``ravel``、``flatten``、``transpose``/``T``、``squeeze``、``tolist`` 等
+    与 ``np.ndarray`` 相同的形状操作。
+
+    Args:
+        left_operands (np.ndarray): 左侧表达式数组
+
+        relation (str): 关系运算符
+
+        expected_value (float or np.ndarray): 右侧常数，可广播到左侧数组的形状，默认为0
+
+    Examples:
+        >>> import kaiwu as kw
+        >>> x = kw.core.ndarray((2, 3), "x", kw.core.Binary)
+        >>> constraints = x.sum(axis=1) == 1
+        >>> constraints
+        ConstraintArray([x[0][0]+x[0][1]+x[0][2]-1==0,
+                         x[1][0]+x[1][1]+x[1][2]-1==0], dtype=object)
+        >>> model = kw.core.QuboModel()
+        >>> model.add_constraint(constraints, "row")
+        >>> list(model.hard_constraints)
+        ['row[0]', 'row[1]']
+    """
+
+    def __init__(self, left_operands, relation, expected_value=0):
+        left_operands = np.asarray(left_operands, dtype=object)
+        expected_value = np.asarray(expected_value)
+        shape = np.broadcast_shapes(left_operands.shape, expected_value.shape)
+        self.left_operands = np.broadcast_to(left_operands, shape)
+        self.expected_value = np.broadcast_to(expected_value, shape)
+        self.relation = relation
+
+    @property
+    def shape(self):
+        """数组形状"""
+        return self.left_operands.shape
+
+    @property
+    def ndim(self):
+        """数组维数"""
+        return self.left_operands.ndim
+
+    @property
+    def size(self):
+        """约束个数"""
+        return self.left_operands.size
+
+    def __len__(self):
+        return len(self.left_operands)
+
+    def _constraint(self, left, right):
+        if isinstance(right, np.generic):
+            right = right.item()
+        # 右端为0时也新建表达式，之后原地修改数组元素不会影响已生成的约束
+        return Constraint(left - right, self.relation)
+
+    def __getitem__(self, key):
+        left = self.left_operands[key]
+        right = self.expected_value[key]
+        if isinstance(left, np.ndarray):
+            return ConstraintArray(left, self.relation, right)
+        return self._constraint(left, right)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def _transform(self, method, *args, **kwargs):
+        """左侧表达式数组与右侧常数数组做同样的形状变换"""
+        return ConstraintArray(
+            getattr(self.left_operands, method)(*args, **kwargs),
+            self.relation,
+            getattr(self.expected_value, method)(*args, **kwargs),
+        )
+
+    def reshape(self, *shape, order="C"):
+        """与 ``np.ndarray.reshape`` 相同"""
+        return self._transform("reshape", *shape, order=order)
+
+    def ravel(self, order="C"):
+        """展平为一维约束数组"""
+        return self._transform("ravel", order=order)
+
+    def flatten(self, order="C"):
+        """展平为一维约束数组"""
+        return self._transform("flatten", order=order)
+
+    def transpose(self, *axes):
+        """与 ``np.ndarray.transpose`` 相同"""
+        return self._transform("transpose", *axes)
+
+    @property
+    def T(self):  # pylint: disable=invalid-name
+        """转置"""
+        return self.transpose()
+
+    def swapaxes(self, axis1, axis2):
+        """交换两个维度"""
+        return self._transform("swapaxes", axis1, axis2)
+
+    def squeeze(self, axis=None):
+        """去掉长度为1的维度"""
+        return self._transform("squeeze", axis=axis)
+
+    def copy(self):
+        """返回副本"""
+        return self._transform("copy")
+
+    @property
+    def flat(self):
+        """按行优先顺序遍历约束的迭代器"""
+        return self.to_ndarray().flat
+
+    def tolist(self):
+        """转化为嵌套的Constraint列表"""
+        return self.to_ndarray().tolist()
+
+    def iter_constraints(self):
+        """按行优先顺序逐个生成约束
+
+        Yields:
+            Constraint: 约束
+        """
+        for left, right in zip(
+            self.left_operands.ravel().tolist(), self.expected_value.ravel().tolist()
+        ):
+            yield self._constraint(left, right)
+
+    def to_ndarray(self):
+        """转化为逐元素保存Constraint的object数组"""
+        result = np.empty(self.size, dtype=object)
+        result[:] = list(self.iter_constraints())
+        return result.reshape(self.shape)
+
+    # pylint: disable=W0613
+    def __array__(self, dtype=None, copy=None):
+        return self.to_ndarray()
+
+    def __repr__(self):
+        prefix = f"{self.__class__.__name__}("
+        body = np.array2string(self.to_ndarray(), separator=", ", prefix=prefix)
+        return f"{prefix}{body}, dtype=object)"
+
+    def __str__(self):
+        return str(self.to_ndarray())
+
+
 def get_min_penalty_from_deltas(
     cons, neg_delta, pos_delta, obj_vars, min_delta_method="diff"
 ):
@@ -129,16 +283,20 @@ def get_min_penalty_from_min_diff(cons, negative_delta, positive_delta):
     Args:
         cons:  约束项
 
-        negative_delta: objective最小值
+        negative_delta (dict or np.ndarray): 各个变量1变为0时objective的最大变化量
 
-        positive_delta: objective最大值
+        positive_delta (dict or np.ndarray): 各个变量0变为1时objective的最大变化量
 
     Returns:
         找到的最小惩罚系数
     """
     # 如果正反向变化都没有，penalty置为1
-    if not negative_delta or not positive_delta:
+    if len(negative_delta) == 0 or len(positive_delta) == 0:
         return 1
+    if isinstance(negative_delta, dict):
+        negative_delta = list(negative_delta.values())
+    if isinstance(positive_delta, dict):
+        positive_delta = list(positive_delta.values())
 
     values = list(cons.coefficient.values())
     for i in range(len(cons.coefficient)):
@@ -149,12 +307,8 @@ def get_min_penalty_from_min_diff(cons, negative_delta, positive_delta):
     for i in range(len(values) - 1):
         if values[i + 1] - values[i] > 0:
             min_diff = min(min_diff, values[i + 1] - values[i])
-    penalty = 0  # 惩罚系数，初始化
-    for max_delta_x in negative_delta.values():
-        penalty = max(max_delta_x / min_diff, penalty)
-    for max_delta_x in positive_delta.values():
-        penalty = max(max_delta_x / min_diff, penalty)
-    return penalty
+    max_delta = max(np.max(negative_delta), np.max(positive_delta), 0)
+    return float(max_delta / min_diff)
 
 
 def get_min_penalty_for_equal_constraint(obj, cons):
@@ -298,5 +452,5 @@ def get_min_penalty(obj, cons):
         >>> kw.core.get_min_penalty(obj, cons)
         2.0
     """
-    negative_delta, positive_delta = obj.get_max_deltas()
+    negative_delta, positive_delta = obj.get_max_delta_arrays()
     return get_min_penalty_from_min_diff(cons, negative_delta, positive_delta)
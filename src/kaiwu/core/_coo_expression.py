@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.coo_expression
+
+功能: 基于NumPy数组(COO格式)存储的二次二值表达式
+"""
+
+import numbers
+import numpy as np
+
+from kaiwu.core._binary_expression import BinaryExpression
+from kaiwu.core._expression import max_deltas_from_terms
+from kaiwu.core._variable_registry import VariableRegistry
+from kaiwu.core._error import KaiwuError
+
+_EMPTY_INDEX = np.zeros(0, dtype=np.int64)
+
+
+def encode_coefficient(coefficient, registry):
+    """将系数字典编码为上三角COO数组，一次项存放在对角线上(二值变量 x*x=x)
+
+    Args:
+        coefficient (dict): 以变量名元组为键的系数字典
+
+        registry (VariableRegistry): 变量注册表，未注册的变量会被自动注册
+
+    Returns:
+        tuple: (row, col, value) 三个等长数组
+    """
+    row, col = registry.index_pairs(coefficient)
+    value = np.array(list(coefficient.values())) if coefficient else np.zeros(0)
+    if value.dtype == object and not all(
+        isinstance(val, numbers.Number) for val in value.tolist()
+    ):
+        raise KaiwuError("Array-backed expressions only support numeric coefficients.")
+    swap = row > col
+    row[swap], col[swap] = col[swap], row[swap]
+    return row, col, value
+
+
+class CooBinaryExpression(BinaryExpression):
+    """以 (row, col, value) 数组加常数项保存的QUBO表达式.
+
+    一次项存放在 row == col 的位置。加法只拼接数组，重复项在需要时
+    (访问 ``coefficient`` 或调用 ``coalesce``) 才合并；数乘是一次向量化乘法。
+    ``coefficient`` 属性会还原为以变量名为键的字典，因此可以与现有
+    基于字典的 ``Expression`` 接口混合使用。
+
+    Args:
+        registry (VariableRegistry, optional): 变量注册表，缺省时新建
+
+        row (np.ndarray, optional): 变量编号数组
+
+        col (np.ndarray, optional): 变量编号数组
+
+        value (np.ndarray, optional): 系数数组
+
+        offset (float, optional): 常数项
+
+    Examples:
+        >>> import kaiwu as kw
+        >>> a, b = kw.core.Binary("a"), kw.core.Binary("b")
+        >>> expr = kw.core.CooBinaryExpression.from_expression(a + 2 * a * b)
+        >>> expr = expr * 3 + b - 1
+        >>> str(expr)
+        '3*a+6*a*b+b-1'
+        >>> expr.coalesce().value
+        array([3, 6, 1])
+    """
+
+    def __init__(self, registry=None, row=None, col=None, value=None, offset=0):
+        self.registry = VariableRegistry() if registry is None else registry
+        # 原地加法追加的数组块，读取数组时才一次性拼接
+        self._chunks = []
+        super().__init__(None, offset)
+        if row is not None:
+            self._set_terms(
+                np.asarray(row, dtype=np.int64),
+                np.asarray(col, dtype=np.int64),
+                np.asarray(value),
+            )
+
+    @classmethod
+    def from_expression(cls, expr, registry=None):
+        """由基于字典的表达式构造
+
+        Args:
+            expr (Expression): 表达式
+
+            registry (VariableRegistry, optional): 共享的变量注册表
+
+        Returns:
+            CooBinaryExpression: 数组存储的表达式
+        """
+        if isinstance(expr, CooBinaryExpression):
+            if registry is None or registry is expr.registry:
+                return expr.copy()
+            row, col = expr.remapped_indices(registry)
+            return cls(registry, row, col, expr.value.copy(), expr.offset)
+        ret = cls(registry)
+        ret.coefficient = expr.coefficient
+        ret.offset = expr.offset
+        return ret
+
+    @classmethod
+    def concat(cls, expressions, registry=None):
+        """一次拼接多个表达式求和，不逐项合并
+
+        Args:
+            expressions (iterable): 表达式或数字
+
+            registry (VariableRegistry, optional): 结果使用的变量注册表
+
+        Returns:
+            CooBinaryExpression: 求和结果
+        """
+        rows, cols, values = [], [], []
+        offset = 0
+        for expr in expressions:
+            if isinstance(expr, numbers.Number):
+                offset += expr
+                continue
+            if registry is None:
+                registry = getattr(expr, "registry", None)
+            expr = cls.from_expression(expr, registry)
+            registry = expr.registry
+            rows.append(expr.row)
+            cols.append(expr.col)
+            values.append(expr.value)
+            offset += expr.offset
+        if not rows:
+            return cls(registry, offset=offset)
+        return cls(
+            registry,
+            np.concatenate(rows),
+            np.concatenate(cols),
+            np.concatenate(values),
+            offset,
+        )
+
+    def _set_terms(self, row, col, value, coalesced=False, modified=True):
+        self._row, self._col, self._value = row, col, value
+        self._chunks = []
+        self._coalesced = coalesced
+        if modified:
+            self.mark_modified()
+
+    def _flush(self):
+        if self._chunks:
+            rows, cols, values = zip(*self._chunks)
+            self._row = np.concatenate((self._row,) + rows)
+            self._col = np.concatenate((self._col,) + cols)
+            self._value = np.concatenate((self._value,) + values)
+            self._chunks = []
+
+    @property
+    def row(self):
+        """变量编号数组(较小编号)"""
+        self._flush()
+        return self._row
+
+    @property
+    def col(self):
+        """变量编号数组(较大编号)，一次项与row相同"""
+        self._flush()
+        return self._col
+
+    @property
+    def value(self):
+        """系数数组"""
+        self._flush()
+        return self._value
+
+    @property
+    def coefficient(self):
+        """以变量名元组为键的系数字典(只读副本)"""
+        self.coalesce()
+        names = self.registry.get_names()
+        # 二次项的键按变量名排序：先求各编号的名称排名，再整体交换
+        rank = np.empty(len(names), dtype=np.int64)
+        rank[sorted(range(len(names)), key=names.__getitem__)] = np.arange(len(names))
+        row, col = self.row, self.col
+        swap = rank[row] > rank[col]
+        first = np.where(swap, col, row).tolist()
+        second = np.where(swap, row, col).tolist()
+        keys = [
+            (names[idx_i],) if idx_i == idx_j else (names[idx_i], names[idx_j])
+            for idx_i, idx_j in zip(first, second)
+        ]
+        return dict(zip(keys, self.value.tolist()))
+
+    @coefficient.setter
+    def coefficient(self, coefficient):
+        if coefficient:
+            self._set_terms(*encode_coefficient(coefficient, self.registry))
+        else:
+            self._set_terms(_EMPTY_INDEX, _EMPTY_INDEX, np.zeros(0))
+
+    def clear(self):
+        """表达式置为0"""
+        self.coefficient = {}
+        self.offset = 0
+
+    def copy(self):
+        """返回共享变量注册表的副本"""
+        ret = self.__class__(
+            self.registry,
+            self.row.copy(),
+            self.col.copy(),
+            self.value.copy(),
+            self.offset,
+        )
+        ret._coalesced = self._coalesced and not self._chunks  # pylint: disable=protected-access
+        return ret
+
+    def coalesce(self):
+        """合并重复项并删除系数为0的项
+
+        Returns:
+            CooBinaryExpression: self
+        """
+        if self._coalesced and not self._chunks:
+            return self
+        row, col, value = self.row, self.col, self.value
+        if len(value):
+            num_vars = max(len(self.registry), 1)
+            keys = row * num_vars + col
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            if len(unique_keys) < len(keys):
+                merged = np.zeros(len(unique_keys), dtype=value.dtype)
+                np.add.at(merged, inverse, value)
+            else:
+                merged = value[np.argsort(keys)]
+            nonzero = merged != 0
+            unique_keys = unique_keys[nonzero]
+            row, col, value = (
+                unique_keys // num_vars,
+                unique_keys % num_vars,
+                merged[nonzero],
+            )
+        # 合并重复项不改变表达式的值，派生数据缓存仍然有效
+        self._set_terms(row, col, value, coalesced=True, modified=False)
+        return self
+
+    def remapped_indices(self, registry):
+        """返回本表达式的变量编号在另一个注册表中的编号"""
+        mapping = np.fromiter(
+            (registry.add(name) for name in self.registry),
+            dtype=np.int64,
+            count=len(self.registry),
+        )
+        row, col = mapping[self.row], mapping[self.col]
+        swap = row > col
+        row[swap], col[swap] = col[swap], row[swap]
+        return row, col
+
+    def to_expression(self):
+        """转化为基于字典的 BinaryExpression"""
+        return BinaryExpression(self.coefficient, self.offset)
+
+    def get_variables(self):
+        """获取变量名集合
+
+        Returns:
+            dict: 返回构成expression的变量集合
+        """
+        return dict(self._cached("variables", self._get_variables))
+
+    def _derived_key(self):
+        # coefficient 每次访问都会重新生成字典，只按修改版本判断
+        return self._version
+
+    def _get_variables(self):
+        self.coalesce()
+        names = self.registry.get_names()
+        used = np.unique(np.concatenate((self.row, self.col))).tolist()
+        variables = sorted(names[idx] for idx in used)
+        return dict(zip(variables, range(len(variables))))
+
+    def _get_max_delta_arrays(self):
+        self.coalesce()
+        variables = self._cached("variables", self._get_variables)
+        # 注册表编号 -> get_variables() 编号
+        mapping = np.zeros(max(len(self.registry), 1), dtype=np.int64)
+        for name, idx in variables.items():
+            mapping[self.registry[name]] = idx
+        return max_deltas_from_terms(
+            mapping[self.row],
+            mapping[self.col],
+            self.value.astype(np.float64),
+            len(variables),
+        )
+
+    def get_val(self, sol_dict):
+        """根据结果字典将变量值带入表达式
+
+        Args:
+            sol_dict (dict): 由get_sol_dict生成的结果字典。
+
+        Returns:
+            float: 带入后所得的值
+        """
+        sol = np.array([sol_dict.get(name, 0.0) for name in self.registry])
+        if sol.size == 0:
+            return self.offset
+        diagonal = self.row == self.col
+        val_i = sol[self.row]
+        val_j = np.where(diagonal, 1, sol[self.col])
+        return self.offset + np.sum(self.value * val_i * val_j)
+
+    def _aligned(self, other):
+        """将other转化为与self共享注册表的数组表达式"""
+        return CooBinaryExpression.from_expression(other, self.registry)
+
+    def __add__(self, other):
+        if isinstance(other, np.ndarray):
+            return other.__add__(self)
+        if isinstance(other, numbers.Number):
+            ret = self.copy()
+            ret.offset = self.offset + other
+            return ret
+        other = self._aligned(other)
+        return CooBinaryExpression(
+            self.registry,
+            np.concatenate((self.row, other.row)),
+            np.concatenate((self.col, other.col)),
+            np.concatenate((self.value, other.value)),
+            self.offset + other.offset,
+        )
+
+    def __iadd__(self, other):
+        if isinstance(other, np.ndarray):
+            return NotImplemented
+        if isinstance(other, numbers.Number):
+            self.offset += other
+            self.mark_modified()
+            return self
+        other = self._aligned(other)
+        self._chunks.append((other.row, other.col, other.value))
+        self._coalesced = False
+        self.mark_modified()
+        self.offset += other.offset
+        return self
+
+    def __isub__(self, other):
+        if isinstance(other, np.ndarray):
+            return NotImplemented
+        return self.__iadd__(-other)
+
+    def __neg__(self):
+        return self.__mul__(-1)
+
+    def __mul__(self, other):
+        if isinstance(other, np.ndarray):
+            return other.__mul__(self)
+        if isinstance(other, numbers.Number):
+            if other == 0:
+                return CooBinaryExpression(self.registry)
+            ret = CooBinaryExpression(
+                self.registry,
+                self.row,
+                self.col,
+                self.value * other,
+                self.offset * other,
+            )
+            ret._coalesced = self._coalesced and not self._chunks
+            return ret
+        product = BinaryExpression.__mul__(self.to_expression(), other)
+        return CooBinaryExpression.from_expression(product, self.registry)
+
+    def __imul__(self, other):
+        if isinstance(other, np.ndarray):
+            return NotImplemented
+        if isinstance(other, numbers.Number):
+            if other == 0:
+                self.clear()
+            else:
+                self._set_terms(self.row, self.col, self.value * other, self._coalesced)
+                self.offset = self.offset * other
+            return self
+        product = self.__mul__(other)
+        self._set_terms(product.row, product.col, product.value)
+        self.offset = product.offset
+        return self
+
+    def __pow__(self, other):
+        if other == 2:
+            return self.__mul__(self)
+        if other == 1:
+            return self.copy()
+        raise KaiwuError("Items higher than quadratic.")
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.einsum
+
+功能: 表达式数组的爱因斯坦求和
+"""
+
+import numpy as np
+from kaiwu.core._binary_expression import BinaryExpression
+from kaiwu.core._error import KaiwuError
+from kaiwu.core._array_terms import compile_array_terms, is_numeric
+from kaiwu.core._matrix import BinaryExpressionNDArray, LinearExpressionArray
+
+
+def _parse_subscripts(subscripts, num_operands):
+    """解析下标字符串，返回各操作数的下标和输出下标"""
+    subscripts = subscripts.replace(" ", "")
+    if "." in subscripts:
+        raise ValueError("Ellipsis is not supported in einsum subscripts.")
+    if "->" in subscripts:
+        inputs, output = subscripts.split("->")
+    else:
+        inputs = subscripts
+        letters = inputs.replace(",", "")
+        output = "".join(sorted(c for c in set(letters) if letters.count(c) == 1))
+    inputs = inputs.split(",")
+    if len(inputs) != num_operands:
+        raise ValueError("The number of subscripts must match the number of operands.")
+    if not all(letter.isalpha() for letter in "".join(inputs) + output):
+        raise ValueError(f"Invalid einsum subscripts: {subscripts}")
+    if len(set(output)) != len(output) or not set(output) <= set("".join(inputs)):
+        raise ValueError(f"Invalid output subscripts: {output}")
+    return inputs, output
+
+
+def _operand_terms(operand):
+    """把操作数展开为 (元素展平下标, 项编号, 系数, 项键列表, 形状)，常数项的键为 ()"""
+    if isinstance(operand, LinearExpressionArray):
+        offset = operand.offset.ravel()
+        cell = np.flatnonzero(offset)
+        keys = [(name,) for name in operand.registry.get_names()] + [()]
+        return (
+            np.concatenate((operand.cell, cell)),
+            np.concatenate((operand.column, np.full(len(cell), len(keys) - 1))),
+            np.concatenate((operand.value, offset[cell])),
+            keys,
+            operand.shape,
+        )
+    array = np.asarray(operand)
+    if is_numeric(array):
+        cell = np.flatnonzero(array)
+        return (
+            cell,
+            np.zeros(len(cell), np.int64),
+            array.ravel()[cell],
+            [()],
+            array.shape,
+        )
+    compiled = compile_array_terms(np.asarray(operand, dtype=object))
+    if compiled is None:
+        raise KaiwuError(
+            "Operands should be numbers or expressions without placeholders."
+        )
+    position, term, value, keys, offsets = compiled
+    offsets = offsets.ravel()
+    cell = np.flatnonzero(offsets)
+    keys.append(())
+    return (
+        np.concatenate((position, cell)),
+        np.concatenate((term, np.full(len(cell), len(keys) - 1))),
+        np.concatenate((value, offsets[cell])),
+        keys,
+        array.shape,
+    )
+
+
+class _Table:
+    """稀疏张量：各下标字母的取值列、单项式的两个变量编号(缺省为-1)和系数"""
+
+    def __init__(self, index, monomial, value):
+        self.index = index
+        self.monomial = monomial
+        self.value = value
+
+    def take(self, rows):
+        """按行号取子表"""
+        return _Table(
+            {letter: col[rows] for letter, col in self.index.items()},
+            self.monomial[rows],
+            self.value[rows],
+        )
+
+
+def _build_table(letters, terms, var_ids, dims):
+    cell, term, value, keys, shape = terms
+    if len(letters) != len(shape):
+        raise ValueError(
+            f"Subscripts {letters} do not match an operand of shape {shape}."
+        )
+    for letter, size in zip(letters, shape):
+        if dims.setdefault(letter, size) != size:
+            raise ValueError(f"Inconsistent size for subscript {letter}.")
+    # 单项式的变量编号升序排列，一次项和常数项在前面补-1
+    monomial = np.array(
+        [[-1] * (2 - len(key)) + sorted(var_ids[name] for name in key) for key in keys],
+        dtype=np.int64,
+    )
+    multi_index = np.unravel_index(cell, shape) if shape else ()
+    index = {}
+    keep = np.ones(len(cell), dtype=bool)
+    for letter, col in zip(letters, multi_index):
+        if letter in index:
+            # 同一操作数中重复的下标只取对角线
+            keep &= index[letter] == col
+        else:
+            index[letter] = col
+    return _Table(index, monomial[term], value).take(keep)
+
+
+def _multiply_monomials(left, right):
+    """两组单项式逐行相乘，二进制变量满足 x*x = x"""
+    ids = np.sort(np.hstack((left, right)), axis=1)
+    ids[:, 1:][ids[:, 1:] == ids[:, :-1]] = -1
+    ids.sort(axis=1)
+    if (ids[:, -3] >= 0).any():
+        raise KaiwuError("Items higher than quadratic.")
+    return ids[:, -2:]
+
+
+def _join(left, right, dims):
+    """按公共下标连接两个稀疏张量，系数相乘"""
+    shared = [letter for letter in left.index if letter in right.index]
+    if shared:
+        shared_dims = [dims[letter] for letter in shared]
+        left_key = np.ravel_multi_index([left.index[c] for c in shared], shared_dims)
+        right_key = np.ravel_multi_index([right.index[c] for c in shared], shared_dims)
+        order = np.argsort(right_key, kind="stable")
+        sorted_key = right_key[order]
+        low = np.searchsorted(sorted_key, left_key, "left")
+        counts = np.searchsorted(sorted_key, left_key, "right") - low
+    else:
+        order = np.arange(len(right.value))
+        low = np.zeros(len(left.value), dtype=np.int64)
+        counts = np.full(len(left.value), len(right.value))
+    left_rows = np.repeat(np.arange(len(left.value)), counts)
+    right_rows = order[
+        np.repeat(low - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    ]
+    left, right = left.take(left_rows), right.take(right_rows)
+    return _Table(
+        {**right.index, **left.index},
+        _multiply_monomials(left.monomial, right.monomial),
+        left.value * right.value,
+    )
+
+
+def _join_order(letters):
+    """贪心确定连接顺序：每次选与已连接部分公共下标最多的操作数"""
+    remaining = list(range(len(letters)))
+    order = [remaining.pop(0)]
+    joined = set(letters[order[0]])
+    while remaining:
+        best = max(remaining, key=lambda pos: len(joined & set(letters[pos])))
+        remaining.remove(best)
+        order.append(best)
+        joined |= set(letters[best])
+    return order
+
+
+def einsum(subscripts, *operands):
+    """表达式数组的爱因斯坦求和.
+
+    用法与 ``np.einsum`` 相同，操作数可以是数值数组、``BinaryExpressionNDArray`` 或
+    ``LinearExpressionArray``。各操作数先展开为 (下标, 单项式, 系数) 的稀疏表，
+    再按公共下标连接、按输出下标和单项式合并，直接生成结果的二次项，
+    不逐项构造中间表达式。平移的下标可以先用 ``np.roll`` 等得到平移后的变量数组。
+    不支持省略号，各操作数之积不能超过二次。
+
+    Args:
+        subscripts (str): 下标字符串，如 ``"uv,uj,vj->"``
+
+        *operands: 操作数
+
+    Returns:
+        BinaryExpressionNDArray or BinaryExpression: 输出为标量时返回表达式；全为数值时同 ``np.einsum``
+
+    Examples:
+        >>> import numpy as np
+        >>> import kaiwu as kw
+        >>> x = kw.core.ndarray((3, 3), "x", kw.core.Binary)
+        >>> dist = np.array([[0, 1, 2], [1, 0, 3], [2, 3, 0]])
+        >>> cost = kw.core.einsum("uv,uj,vj->", dist, x, np.roll(x, -1, axis=1))
+        >>> expected = kw.core.quicksum(
+        ...     dist[u, v] * x[u, j] * x[v, (j + 1) % 3]
+        ...     for u in range(3) for v in range(3) for j in range(3))
+        >>> (cost - expected).coefficient
+        {}
+        >>> kw.core.einsum("ij,j->i", x, np.array([1, 2, 3]))
+        BinaryExpressionNDArray([x[0][0]+2*x[0][1]+3*x[0][2],
+                                 x[1][0]+2*x[1][1]+3*x[1][2],
+                                 x[2][0]+2*x[2][1]+3*x[2][2]], dtype=object)
+    """
+    inputs, output = _parse_subscripts(subscripts, len(operands))
+    if all(
+        not isinstance(op, LinearExpressionArray) and is_numeric(np.asarray(op))
+        for op in operands
+    ):
+        return np.einsum(subscripts, *operands)
+
+    terms = [_operand_terms(op) for op in operands]
+    names = sorted({name for term in terms for key in term[3] for name in key})
+    var_ids = dict(zip(names, range(len(names))))
+    dims = {}
+    tables = [
+        _build_table(letters, term, var_ids, dims)
+        for letters, term in zip(inputs, terms)
+    ]
+    order = _join_order(inputs)
+    table = tables[order[0]]
+    for pos in order[1:]:
+        table = _join(table, tables[pos], dims)
+    return _to_expressions(table, output, dims, names)
+
+
+def _group_sum(cell, monomial, value, num_vars):
+    """按(元素, 单项式)合并系数，结果按元素、单项式的变量编号排序，并去掉零系数"""
+    if len(value) == 0:
+        return np.zeros((0, 3), dtype=np.int64), value
+    base = num_vars + 1
+    if (int(cell.max()) + 1) * base * base < 2**62:
+        # 合成单个整数键排序，比多键lexsort快
+        combined = (cell * base + monomial[:, 0] + 1) * base + monomial[:, 1] + 1
+        order = np.argsort(combined, kind="stable")
+        start = np.flatnonzero(np.diff(combined[order], prepend=-1))
+    else:
+        order = np.lexsort((monomial[:, 1], monomial[:, 0], cell))
+        key = np.column_stack((cell, monomial))[order]
+        start = np.flatnonzero(np.any(np.diff(key, axis=0, prepend=-2) != 0, axis=1))
+    sums = np.add.reduceat(value[order], start)
+    rows = order[start][sums != 0]
+    return np.column_stack((cell[rows], monomial[rows])), sums[sums != 0]
+
+
+def _to_expressions(table, output, dims, names):
+    """按输出元素和单项式合并系数，生成结果表达式"""
+    shape = tuple(dims[letter] for letter in output)
+    size = int(np.prod(shape, dtype=np.int64))
+    cell = (
+        np.ravel_multi_index([table.index[c] for c in output], shape)
+        if output
+        else np.zeros(len(table.value), dtype=np.int64)
+    )
+    key, sums = _group_sum(cell, table.monomial, table.value, len(names))
+
+    # 每个元素内依次为常数项、一次项、二次项
+    kind = (key[:, 1:] >= 0).sum(axis=1)
+    offsets = np.zeros(size, dtype=sums.dtype)
+    offsets[key[kind == 0, 0]] = sums[kind == 0]
+    linear = (key[kind == 1], sums[kind == 1].tolist())
+    linear_keys = list(zip(map(names.__getitem__, linear[0][:, 2].tolist())))
+    quadratic = (key[kind == 2], sums[kind == 2].tolist())
+    quadratic_keys = list(
+        zip(
+            map(names.__getitem__, quadratic[0][:, 1].tolist()),
+            map(names.__getitem__, quadratic[0][:, 2].tolist()),
+        )
+    )
+    expressions = []
+    cells = np.arange(size + 1)
+    lin_bound = np.searchsorted(linear[0][:, 0], cells).tolist()
+    quad_bound = np.searchsorted(quadratic[0][:, 0], cells).tolist()
+    for pos, offset in enumerate(offsets.tolist()):
+        coefficient = dict(
+            zip(
+                linear_keys[lin_bound[pos] : lin_bound[pos + 1]],
+                linear[1][lin_bound[pos] : lin_bound[pos + 1]],
+            )
+        )
+        coefficient.update(
+            zip(
+                quadratic_keys[quad_bound[pos] : quad_bound[pos + 1]],
+                quadratic[1][quad_bound[pos] : quad_bound[pos + 1]],
+            )
+        )
+        expressions.append(BinaryExpression(coefficient, offset))
+    if not shape:
+        return expressions[0]
+    return (
+        np.fromiter(expressions, dtype=object, count=size)
+        .reshape(shape)
+        .view(BinaryExpressionNDArray)
+    )
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.evaluator
+
+功能: 编译后的表达式求值器
+"""
+
+import numbers
+import numpy as np
+from kaiwu.core._error import KaiwuError
+
+# 批量计算二次项时中间数组(分块的项乘积或稠密二次矩阵)的元素个数上限
+_BATCH_CHUNK_ELEMENTS = 2**22
+
+
+def _to_binary(solutions):
+    """解矩阵转化为浮点0/1矩阵，含-1时按spin解处理"""
+    binary = np.atleast_2d(np.asarray(solutions)).astype(np.float64)
+    if binary.size and binary.min() < 0:
+        binary = (binary + 1) / 2
+    return binary
+
+
+class ExpressionEvaluator:
+    """编译后的表达式求值器.
+
+    只保存一次项、二次项的变量编号数组、系数数组、常数项和变量顺序，
+    求值时不再遍历系数字典。对象很小，可以直接pickle后交给进程池使用。
+
+    Args:
+        expr (BinaryExpression or BinaryModel or float): 表达式，传入模型时编译其目标函数
+
+        variables (dict, optional): 变量名到解向量编号的字典，缺省为 ``expr.get_variables()``。
+            不在其中的变量取值为0
+
+    Examples:
+        >>> import numpy as np
+        >>> import kaiwu as kw
+        >>> a, b, c = kw.core.Binary("a"), kw.core.Binary("b"), kw.core.Binary("c")
+        >>> evaluator = kw.core.ExpressionEvaluator(a + 2 * b * c + 4 * c)
+        >>> evaluator.get_val({"a": 1, "b": 0, "c": 1})
+        5.0
+        >>> evaluator.evaluate(np.array([1, 1, 1]))
+        7.0
+        >>> evaluator.evaluate_batch(np.array([[1, -1, 1], [-1, 1, -1]]))
+        array([5., 0.])
+    """
+
+    def __init__(self, expr, variables=None):
+        expr = getattr(expr, "objective", expr)
+        if isinstance(expr, numbers.Number):
+            self.offset = float(expr)
+            variables = {} if variables is None else variables
+            coefficient = {}
+        else:
+            if variables is None:
+                variables = expr.get_variables()
+            coefficient = expr.coefficient
+            try:
+                self.offset = float(expr.offset)
+            except TypeError as err:
+                raise KaiwuError("Placeholders must be fed before evaluation.") from err
+        self.names = list(variables)
+        self.columns = np.fromiter(
+            variables.values(), dtype=np.int64, count=len(variables)
+        )
+        self.size = int(self.columns.max()) + 1 if len(self.columns) else 0
+
+        lin_idx, lin_val, quad_i, quad_j, quad_val = [], [], [], [], []
+        for key, value in coefficient.items():
+            idx = [variables.get(var) for var in key]
+            if None in idx:
+                continue
+            if len(idx) == 1:
+                lin_idx.append(idx[0])
+                lin_val.append(value)
+            else:
+                quad_i.append(idx[0])
+                quad_j.append(idx[1])
+                quad_val.append(value)
+        try:
+            self.linear_value = np.array(lin_val, dtype=np.float64)
+            self.quadratic_value = np.array(quad_val, dtype=np.float64)
+        except TypeError as err:
+            raise KaiwuError("Placeholders must be fed before evaluation.") from err
+        self.linear_index = np.array(lin_idx, dtype=np.int64)
+        self.quadratic_row = np.array(quad_i, dtype=np.int64)
+        self.quadratic_col = np.array(quad_j, dtype=np.int64)
+        self._matrix = None
+
+    def __getstate__(self):
+        # 稠密二次矩阵可以随时重建，不随对象序列化
+        state = self.__dict__.copy()
+        state["_matrix"] = None
+        return state
+
+    def get_variables(self):
+        """返回变量名到解向量编号的字典"""
+        return dict(zip(self.names, self.columns.tolist()))
+
+    def _get_matrix(self):
+        if self._matrix is None:
+            self._matrix = np.zeros((self.size, self.size))
+            np.add.at(
+                self._matrix,
+                (self.quadratic_row, self.quadratic_col),
+                self.quadratic_value,
+            )
+        return self._matrix
+
+    def _evaluate_binary(self, binary):
+        values = binary[:, self.linear_index] @ self.linear_value + self.offset
+        if self.quadratic_value.size == 0:
+            return values
+        if self.size * self.size <= _BATCH_CHUNK_ELEMENTS:
+            # 变量不多时用稠密二次矩阵，交给矩阵乘法计算
+            block = binary[:, : self.size]
+            values += np.einsum("ij,ij->i", block @ self._get_matrix(), block)
+            return values
+        chunk = max(1, _BATCH_CHUNK_ELEMENTS // len(self.quadratic_value))
+        for start in range(0, len(binary), chunk):
+            block = binary[start : start + chunk]
+            values[start : start + chunk] += (
+                block[:, self.quadratic_row] * block[:, self.quadratic_col]
+            ) @ self.quadratic_value
+        return values
+
+    def evaluate_batch(self, solutions):
+        """计算多组解的取值
+
+        Args:
+            solutions (np.ndarray): 形状为(N, n)的解矩阵，每行一组解。取值为0/1，
+                或含-1时按spin解处理，转换为 (s+1)/2
+
+        Returns:
+            np.ndarray: 长度为N的取值数组
+        """
+        return self._evaluate_binary(_to_binary(solutions))
+
+    def evaluate(self, solution):
+        """计算单个解向量的取值
+
+        Args:
+            solution (np.ndarray): 长度为n的0/1或spin解向量
+
+        Returns:
+            float: 取值
+        """
+        return float(self._evaluate_binary(_to_binary(solution))[0])
+
+    def get_val(self, sol_dict):
+        """根据结果字典计算取值，变量值按原样代入
+
+        Args:
+            sol_dict (dict): 由get_sol_dict生成的结果字典。
+
+        Returns:
+            float: 取值
+        """
+        vector = np.zeros((1, self.size))
+        vector[0, self.columns] = [sol_dict.get(name, 0.0) for name in self.names]
+        return float(self._evaluate_binary(vector)[0])
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -5,9 +5,17 @@
 功能: QUBO及Ising表达式运算类
 """
 
+import copy
 import numbers
+import numpy as np
 from kaiwu.core._error import KaiwuError
 from kaiwu.core._constraint import Constraint
+from kaiwu.core._evaluator import ExpressionEvaluator
+
+# 一次表达式相乘时，项数乘积达到该值才走向量化外积路径，避免小表达式的numpy开销
+_LINEAR_MUL_MIN_PAIRS = 64
+# 整数系数的绝对值上限，保证int64外积及累加不溢出
+_LINEAR_MUL_MAX_INT = 2**31
 
 
 def is_zero(qubo_expr):
@@ -17,6 +25,33 @@ def is_zero(qubo_expr):
     return len(qubo_expr.coefficient) == 0 and qubo_expr.offset == 0
 
 
+def is_lazy(expr):
+    """表达式为延迟求值的计算图节点"""
+    return getattr(expr, "_lazy", False)
+
+
+def max_deltas_from_terms(row, col, value, num_vars):
+    """由COO形式的项(一次项 row == col)计算每个变量翻转引起变化量的上界
+
+    二次项只在另一个变量为1时起作用，正、负部分分别计入两个变量；
+    一次项翻转一定引起变化，0->1 与 1->0 的变化量互为相反数。
+
+    Returns:
+        tuple: (negative_delta, positive_delta) 两个长度为num_vars的数组
+    """
+    linear = row == col
+    quadratic = ~linear
+    positive = np.where(linear, value, np.maximum(value, 0))
+    negative = np.where(linear, -value, np.maximum(-value, 0))
+    positive_delta = np.bincount(row, positive, num_vars) + np.bincount(
+        col[quadratic], positive[quadratic], num_vars
+    )
+    negative_delta = np.bincount(row, negative, num_vars) + np.bincount(
+        col[quadratic], negative[quadratic], num_vars
+    )
+    return negative_delta, positive_delta
+
+
 def expr_add(expr_left, expr_right, expr_result):
     """通用二次表达式相加"""
     if isinstance(expr_right, numbers.Number):
@@ -40,6 +75,42 @@ def expr_add(expr_left, expr_right, expr_result):
                 expr_result.coefficient[key] = expr_other.coefficient[key]
 
 
+def expr_iadd(expr_left, expr_right, scale=1):
+    """通用二次表达式原地相加: expr_left += scale * expr_right"""
+    if isinstance(expr_right, numbers.Number):
+        expr_left.offset += scale * expr_right
+        return
+    if scale == 1:
+        expr_left.offset += expr_right.offset
+    else:
+        expr_left.offset += scale * expr_right.offset
+    coefficient = expr_left.coefficient
+    items = expr_right.coefficient.items()
+    if expr_right.coefficient is coefficient:
+        items = list(items)
+    for key, value in items:
+        if scale != 1:
+            value = scale * value
+        if key in coefficient:
+            coefficient[key] += value
+            if coefficient[key] == 0:
+                coefficient.pop(key)
+        else:
+            coefficient[key] = value
+
+
+def expr_imul(expr_left, expr_right):
+    """通用二次表达式原地数乘: expr_left *= expr_right"""
+    if is_zero(expr_right):
+        expr_left.coefficient.clear()
+        expr_left.offset = 0
+        return
+    coefficient = expr_left.coefficient
+    for key in coefficient:
+        coefficient[key] = coefficient[key] * expr_right
+    expr_left.offset = expr_left.offset * expr_right
+
+
 def expr_neg(expr_origin, expr_result):
     """通用二次表达式取负"""
     for key in expr_origin.coefficient:
@@ -47,7 +118,95 @@ def expr_neg(expr_origin, expr_result):
     expr_result.offset = -expr_origin.offset
 
 
+def _linear_terms(expr):
+    """expr为数值系数的一次表达式时返回(变量名列表, 系数数组)，否则返回None"""
+    names = []
+    for key in expr.coefficient:
+        if len(key) != 1:
+            return None
+        names.append(key[0])
+    values = list(expr.coefficient.values())
+    if not isinstance(expr.offset, numbers.Number):
+        return None
+    if all(isinstance(val, int) for val in values):
+        if not isinstance(expr.offset, int) or any(
+            abs(val) >= _LINEAR_MUL_MAX_INT for val in values + [expr.offset]
+        ):
+            return None
+        return names, np.array(values, dtype=np.int64)
+    if all(isinstance(val, float) for val in values):
+        return names, np.array(values, dtype=np.float64)
+    return None
+
+
+def _expr_linear_mul(expr_left, expr_right, expr_result):
+    """一次表达式相乘的向量化路径
+
+    二次项系数由一次外积算出，键内变量按名称排序，x*x 折叠为 x。
+    不满足条件(非一次项、非数值系数、系数类型不一致或项数太少)时返回False，
+    由通用路径处理。
+    """
+    num_pairs = len(expr_left.coefficient) * len(expr_right.coefficient)
+    if num_pairs < _LINEAR_MUL_MIN_PAIRS:
+        return False
+    left = _linear_terms(expr_left)
+    right = left if expr_right is expr_left else _linear_terms(expr_right)
+    if left is None or right is None or left[1].dtype != right[1].dtype:
+        return False
+
+    # 按出现顺序编号，结果项的顺序与通用路径一致
+    names = list(dict.fromkeys(left[0] + right[0]))
+    index = {name: idx for idx, name in enumerate(names)}
+    left_idx = np.array([index[name] for name in left[0]], dtype=np.int64)
+    if right is left:
+        # 平方只取上三角，非对角项系数翻倍
+        pos_i, pos_j = np.triu_indices(len(left_idx))
+        pair_i, pair_j = left_idx[pos_i], left_idx[pos_j]
+        pair_values = left[1][pos_i] * left[1][pos_j]
+        pair_values[pos_i != pos_j] *= 2
+        right_idx = left_idx
+    else:
+        right_idx = np.array([index[name] for name in right[0]], dtype=np.int64)
+        pair_i = np.repeat(left_idx, len(right_idx))
+        pair_j = np.tile(right_idx, len(left_idx))
+        pair_values = np.multiply.outer(left[1], right[1]).ravel()
+
+    # 常数项与另一侧一次项的乘积落在对角线上
+    rows = np.concatenate((np.minimum(pair_i, pair_j), left_idx, right_idx))
+    cols = np.concatenate((np.maximum(pair_i, pair_j), left_idx, right_idx))
+    values = np.concatenate(
+        (
+            pair_values,
+            left[1] * expr_right.offset,
+            right[1] * expr_left.offset,
+        )
+    )
+    num_vars = len(names)
+    unique_keys, inverse = np.unique(rows * num_vars + cols, return_inverse=True)
+    merged = np.zeros(len(unique_keys), dtype=values.dtype)
+    np.add.at(merged, inverse, values)
+    nonzero = merged != 0
+    unique_keys = unique_keys[nonzero]
+    row, col = unique_keys // num_vars, unique_keys % num_vars
+
+    # 键内变量按名称排序
+    rank = np.empty(num_vars, dtype=np.int64)
+    rank[sorted(range(num_vars), key=names.__getitem__)] = np.arange(num_vars)
+    swap = rank[row] > rank[col]
+    row[swap], col[swap] = col[swap], row[swap]
+    keys = list(
+        zip(map(names.__getitem__, row.tolist()), map(names.__getitem__, col.tolist()))
+    )
+    for pos in np.flatnonzero(row == col).tolist():
+        keys[pos] = keys[pos][:1]
+    expr_result.coefficient.update(zip(keys, merged[nonzero].tolist()))
+    expr_result.offset += expr_left.offset * expr_right.offset
+    return True
+
+
 def _expr_dicts_mul(expr_left, expr_right, expr_result):
+    if _expr_linear_mul(expr_left, expr_right, expr_result):
+        return
     for lkey in expr_left.coefficient:
         for rkey in expr_right.coefficient:
             key = list(set(lkey + rkey))
@@ -116,11 +275,32 @@ def _check_unit(checked_str):
     return checked_str
 
 
+def _slot_descriptors(cls):
+    """按MRO列出类及其父类__slots__中的 (名称, 槽位描述符)"""
+    return [
+        (name, klass.__dict__[name])
+        for klass in cls.__mro__
+        for name in klass.__dict__.get("__slots__", ())
+    ]
+
+
 class Expression:
     """QUBO/Ising 通用表达式基类（提供默认二次表达式实现）"""
 
+    # 大量变量和表达式对象不再各带一个实例字典
+    # _version与_derived为修改版本号及按版本缓存的派生数据(变量集合、最大变化量、平均系数)
+    # _shared为True时系数字典可能与copy()得到的表达式共享，未赋值时视为不共享
+    __slots__ = ("coefficient", "offset", "_version", "_derived", "_shared")
+
+    # 为False时 +=、-=、*= 退化为生成新对象，用于可能被多处引用的变量类
+    _inplace_ops = True
+    # 为True时表示延迟求值的计算图节点，系数在首次访问时才生成
+    _lazy = False
+
     def __init__(self, coefficient: dict = None, offset: float = 0):
         super().__init__()
+        self._version = 0
+        self._derived = None
         if coefficient is None:
             self.coefficient = {}
         else:
@@ -128,10 +308,83 @@ class Expression:
 
         self.offset = offset
 
+    def __getstate__(self):
+        # 直接读写槽位，子类用同名property包装的槽位(如Binary.coefficient)也按原值保存
+        slots = {}
+        for name, descriptor in _slot_descriptors(type(self)):
+            try:
+                slots[name] = descriptor.__get__(self)
+            except AttributeError:
+                continue
+        return getattr(self, "__dict__", None), slots
+
+    def __setstate__(self, state):
+        inst_dict, slots = state
+        if inst_dict:
+            self.__dict__.update(inst_dict)
+        for name, descriptor in _slot_descriptors(type(self)):
+            if name in slots:
+                descriptor.__set__(self, slots[name])
+
+    def copy(self):
+        """返回写时复制的副本
+
+        副本与原表达式共享系数字典，任一方用原地运算符(``+=``、``-=``、``*=``)修改前才复制字典，
+        不逐项深拷贝。直接修改 ``coefficient`` 字典会同时影响共享该字典的表达式，
+        修改后须调用 ``mark_modified()``。
+
+        Returns:
+            Expression: 副本
+
+        Examples:
+            >>> import kaiwu as kw
+            >>> a, b = kw.core.Binary("a"), kw.core.Binary("b")
+            >>> expr = a + 2 * b
+            >>> shared = expr.copy()
+            >>> shared.coefficient is expr.coefficient
+            True
+            >>> shared += a
+            >>> str(shared), str(expr)
+            ('2*b+2*a', '2*b+a')
+        """
+        ret = copy.copy(self)
+        self._shared = ret._shared = True
+        return ret
+
+    def _detach(self):
+        """原地修改前调用：系数字典可能被共享时先复制一份"""
+        if getattr(self, "_shared", False):
+            self.coefficient = dict(self.coefficient)
+            self._shared = False
+
     def clear(self) -> None:
         """表达式置为0"""
         self.coefficient = {}
         self.offset = 0
+        self.mark_modified()
+
+    def mark_modified(self):
+        """标记表达式已修改，使缓存的派生数据失效
+
+        原地运算符和 ``clear()`` 会自动调用；直接修改 ``coefficient`` 字典或给 ``offset`` 赋值后
+        须手动调用，否则 ``get_variables()``、``get_evaluator()`` 等仍返回修改前的结果。
+        """
+        self._version += 1
+        self._derived = None
+
+    def _derived_key(self):
+        # 按修改版本和系数字典对象判断，查找缓存为O(1)；整体替换系数字典也会使缓存失效
+        return self._version, id(self.coefficient)
+
+    def _cached(self, name, compute):
+        """返回按修改版本缓存的派生数据，缓存失效时调用compute重新计算"""
+        key = self._derived_key()
+        if self._derived is None or self._derived[0] != key:
+            self._derived = (key, {})
+        derived = self._derived[1]
+        if name not in derived:
+            derived[name] = compute()
+        return derived[name]
 
     def __repr__(self):
         return self.__str__()
@@ -176,12 +429,28 @@ class Expression:
         expr_add(self, other, q_ret)
         return q_ret
 
+    def __iadd__(self, other):
+        if not self._inplace_ops:
+            return self.__add__(other)
+        self._detach()
+        expr_iadd(self, other)
+        self.mark_modified()
+        return self
+
     def __rsub__(self, other):
         return (-self).__add__(other)
 
     def __sub__(self, other):
         return self.__add__(-other)
 
+    def __isub__(self, other):
+        if not self._inplace_ops:
+            return self.__sub__(other)
+        self._detach()
+        expr_iadd(self, other, -1)
+        self.mark_modified()
+        return self
+
     def __rmul__(self, other):
         return self.__mul__(other)
 
@@ -190,6 +459,19 @@ class Expression:
         expr_mul(self, other, q_ret)
         return q_ret
 
+    def __imul__(self, other):
+        if not self._inplace_ops:
+            return self.__mul__(other)
+        if isinstance(other, numbers.Number):
+            self._detach()
+            expr_imul(self, other)
+        else:
+            product = self.__mul__(other)
+            self.coefficient = product.coefficient
+            self.offset = product.offset
+        self.mark_modified()
+        return self
+
     def __truediv__(self, other):
         return self.__mul__(1 / other)
 
@@ -225,6 +507,9 @@ class Expression:
             dict: 返回构成expression的变量集合
 
         """
+        return dict(self._cached("variables", self._get_variables))
+
+    def _get_variables(self):
         variables = set()  # 放目标函数obj所包含的所有变量
         for key in self.coefficient:
             for var_x in key:
@@ -236,26 +521,55 @@ class Expression:
         """求出每个变量翻转引起目标函数变化的上界
         返回值negative_delta，positive_delta分别为该变量1->0和0->1所引起的最大变化量
         """
-        obj_variables = list(self.get_variables().keys())
-        positive_delta = {var_x: 0 for var_x in obj_variables}
-        negative_delta = {var_x: 0 for var_x in obj_variables}
-        for var_tuple in self.coefficient.keys():
-            for var_x in var_tuple:
-                # 二次项受另一个变量影响，另一个变量为0时系数不引起变化
-                if len(var_tuple) == 2:
-                    positive_delta[var_x] += max(self.coefficient[var_tuple], 0)
-                    # 变量0->1引起的变化量为-coefficient
-                    negative_delta[var_x] += max(-self.coefficient[var_tuple], 0)
-
-                # 一次项不受另一个变量影响，变量翻转一定引起变化
-                elif len(var_tuple) == 1:
-                    positive_delta[var_x] += self.coefficient[var_tuple]
-                    # 变量0->1引起的变化为-coefficient,与二次项的情况一致
-                    negative_delta[var_x] -= self.coefficient[var_tuple]
-        return negative_delta, positive_delta
+        negative_delta, positive_delta = self._cached(
+            "max_deltas", self._get_max_deltas
+        )
+        return dict(negative_delta), dict(positive_delta)
+
+    def _get_max_deltas(self):
+        negative_delta, positive_delta = self._cached(
+            "max_delta_arrays", self._get_max_delta_arrays
+        )
+        names = list(self._cached("variables", self._get_variables))
+        return (
+            dict(zip(names, negative_delta.tolist())),
+            dict(zip(names, positive_delta.tolist())),
+        )
+
+    def get_max_delta_arrays(self):
+        """以数组形式返回每个变量翻转引起目标函数变化的上界
+
+        Returns:
+            tuple: (negative_delta, positive_delta)，按 ``get_variables()`` 的编号排列的数组
+        """
+        negative_delta, positive_delta = self._cached(
+            "max_delta_arrays", self._get_max_delta_arrays
+        )
+        return negative_delta.copy(), positive_delta.copy()
+
+    def _get_max_delta_arrays(self):
+        variables = self._cached("variables", self._get_variables)
+        coefficient = self.coefficient
+        size = len(coefficient)
+        row = np.fromiter(
+            (variables[key[0]] for key in coefficient), dtype=np.int64, count=size
+        )
+        col = np.fromiter(
+            (variables[key[-1]] for key in coefficient), dtype=np.int64, count=size
+        )
+        try:
+            value = np.fromiter(coefficient.values(), dtype=np.float64, count=size)
+        except TypeError as err:
+            raise KaiwuError(
+                "Placeholders must be fed before estimating max deltas."
+            ) from err
+        return max_deltas_from_terms(row, col, value, len(variables))
 
     def get_average_coefficient(self):
         """返回coefficient的平均值"""
+        return self._cached("average_coefficient", self._get_average_coefficient)
+
+    def _get_average_coefficient(self):
         coe_sum = 0
         num_item = 0
         for _, coe in self.coefficient.items():
@@ -263,6 +577,14 @@ class Expression:
             num_item += 1
         return coe_sum / num_item
 
+    def get_evaluator(self):
+        """返回编译后的求值器，按 ``get_variables()`` 的编号排列变量，修改表达式前会被缓存
+
+        Returns:
+            ExpressionEvaluator: 求值器
+        """
+        return self._cached("evaluator", lambda: ExpressionEvaluator(self))
+
     def get_val(self, sol_dict):
         """根据结果字典将spin值带入qubo变量.
 
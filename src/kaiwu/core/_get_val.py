@@ -4,8 +4,10 @@
 
 功能: QUBO还原变量值
 """
+
 import numbers
 import numpy as np
+from kaiwu.core._evaluator import ExpressionEvaluator
 
 
 def get_sol_dict(solution, vars_dict):
@@ -79,6 +81,22 @@ def get_val(qubo, sol_dict):
     return value
 
 
+def get_val_compiled(qubo, sol_dict):
+    """与get_val相同，但使用表达式缓存的编译求值器，适合对同一表达式反复求值
+
+    Args:
+        qubo (BinaryExpression): QUBO表达式
+
+        sol_dict (dict): 由get_sol_dict生成的结果字典。
+
+    Returns:
+        float: 带入qubo后所得的值
+    """
+    if hasattr(qubo, "get_evaluator"):
+        return qubo.get_evaluator().get_val(sol_dict)
+    return get_val(qubo, sol_dict)
+
+
 def _get_val(array, sol_dict):
     """根据结果字典将spin值带入qubo数组变量.
 
@@ -104,12 +122,52 @@ def _get_val(array, sol_dict):
         array([[1., 0.],
                [1., 0.]])
     """
+    if hasattr(array, "get_evaluator"):
+        # BinaryExpressionNDArray编译后一次求出所有元素
+        return array.get_val(sol_dict)
     val_array = np.zeros(array.shape)  # 创建与qubo数组相同形状的空数组
     for index in np.ndindex(array.shape):  # 遍历数组的所有下标
         val_array[index] = get_val(array[index], sol_dict)  # 每个下标都调用get_val
     return val_array
 
 
+def get_val_batch(qubo, solutions, variables=None):
+    """批量计算表达式在多组解上的取值.
+
+    Args:
+        qubo (BinaryExpression or BinaryExpressionNDArray): QUBO表达式或表达式数组
+
+        solutions (np.ndarray): 形状为(N, n)的解矩阵，每行一组解。取值为0/1，
+            或含-1时按spin解处理，转换为 (s+1)/2
+
+        variables (dict, optional): 变量名到解矩阵列编号的字典，缺省为 ``qubo.get_variables()``
+
+    Returns:
+        np.ndarray: 长度为N的取值数组，solutions为一维时返回单个值。
+            qubo为表达式数组时返回形状为(N, *数组形状)的取值数组
+
+    Examples:
+        >>> import numpy as np
+        >>> import kaiwu as kw
+        >>> a, b, c = kw.core.Binary("a"), kw.core.Binary("b"), kw.core.Binary("c")
+        >>> d = a + 2 * b * c + 4 * c
+        >>> kw.core.get_val_batch(d, np.array([[1, 0, 1], [1, 1, 1]]))
+        array([5., 7.])
+        >>> kw.core.get_val_batch(d, np.array([[1, -1, 1], [-1, 1, -1]]))
+        array([5., 0.])
+    """
+    if hasattr(qubo, "get_val_batch"):
+        return qubo.get_val_batch(solutions, variables)
+    if variables is None and not isinstance(qubo, numbers.Number):
+        evaluator = qubo.get_evaluator()
+    else:
+        evaluator = ExpressionEvaluator(qubo, variables)
+    values = evaluator.evaluate_batch(solutions)
+    if np.ndim(solutions) == 1:
+        return values[0]
+    return values
+
+
 if __name__ == "__main__":
     import doctest
 
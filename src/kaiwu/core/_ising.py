@@ -60,6 +60,8 @@ class IsingModel(dict):
 class IsingExpression(Expression):
     """Ising 表达式基类，直接继承 Expression，保留扩展点。"""
 
+    __slots__ = ("variables", "quadratics", "linear", "bias")
+
     def __init__(self, variables=None, quadratic=None, linear=None, bias=0):
         if quadratic is None:
             quadratic = {}
@@ -88,6 +90,10 @@ class Spin(IsingExpression):
         2*s-1
     """
 
+    __slots__ = ("name",)
+
+    _inplace_ops = False
+
     def __init__(self, name: str = ""):
         super().__init__(linear={tuple({name}): 2}, bias=-1)
         self.name = name
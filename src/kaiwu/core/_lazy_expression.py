@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.lazy_expression
+
+功能: 延迟求值的表达式计算图
+"""
+
+import numbers
+import numpy as np
+
+from kaiwu.core._binary_expression import BinaryExpression
+from kaiwu.core._expression import expr_iadd, is_lazy
+from kaiwu.core._error import KaiwuError
+
+
+class LazyExpression(BinaryExpression):
+    """延迟求值的QUBO表达式.
+
+    ``+``、``-``、``*``、``**`` 与 ``quicksum`` 只记录一个轻量的计算图节点，
+    不生成系数字典。首次访问 ``coefficient`` 或 ``offset`` 时(如
+    ``QuboModel.make()``、``get_matrix()``、``get_val()``)一次性展开：
+    求和与数乘节点直接累加到结果中，不产生中间表达式。展开后节点只保留结果，
+    计算图随之释放。
+
+    计算图引用而不复制参与运算的普通表达式，展开前不要原地修改它们。
+    节点本身创建后不再改变，可以被多个表达式和模型共享，因此不支持 ``clear()``。
+
+    Args:
+        expr (Expression or float, optional): 被包装的表达式，默认为0
+
+    Examples:
+        >>> import kaiwu as kw
+        >>> x = [kw.core.Binary(f"x{i}") for i in range(3)]
+        >>> expr = kw.core.LazyExpression()
+        >>> for var in x:
+        ...     expr = expr + var
+        >>> expr = (expr - 1) ** 2
+        >>> str(expr)
+        '-x0+2*x0*x1+2*x0*x2-x1+2*x1*x2-x2+1'
+    """
+
+    __slots__ = ("_op", "_operands", "_flat")
+
+    _lazy = True
+    _inplace_ops = False
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, expr=0):
+        self._op = "sum"
+        self._operands = (expr,)
+        self._flat = None
+        self._version = 0
+        self._derived = None
+
+    @classmethod
+    def _node(cls, op, operands):
+        node = cls()
+        node._op = op
+        node._operands = tuple(operands)
+        return node
+
+    @classmethod
+    def from_sum(cls, terms):
+        """构造若干表达式的求和节点
+
+        Args:
+            terms (iterable): 表达式或数字
+
+        Returns:
+            LazyExpression: 求和节点
+        """
+        return cls._node("sum", terms)
+
+    @property
+    def coefficient(self):
+        """展开后的系数字典"""
+        return self.flatten().coefficient
+
+    @property
+    def offset(self):
+        """展开后的常数项"""
+        return self.flatten().offset
+
+    def flatten(self):
+        """展开计算图，结果会被缓存
+
+        Returns:
+            BinaryExpression: 展开后的表达式
+        """
+        if self._flat is not None:
+            return self._flat
+        if self._op == "mul":
+            left, right = (_flatten_operand(operand) for operand in self._operands)
+            result = left * right
+        else:
+            result = BinaryExpression()
+            # 用显式栈遍历，链式累加形成的深层计算图不会触发递归深度限制
+            stack = [(self, 1)]
+            # pylint: disable=protected-access
+            while stack:
+                node, weight = stack.pop()
+                if not is_lazy(node):
+                    expr_iadd(result, node, weight)
+                elif node._flat is not None or node._op == "mul":
+                    expr_iadd(result, node.flatten(), weight)
+                elif node._op == "scale":
+                    stack.append((node._operands[0], weight * node._operands[1]))
+                else:
+                    stack.extend((term, weight) for term in reversed(node._operands))
+        self._flat = result
+        self._op, self._operands = "sum", (result,)
+        return result
+
+    def clear(self):
+        """计算图节点可能被其他表达式或模型共享，不能原地置为0
+
+        Raises:
+            KaiwuError: 总是抛出，请改为赋值新的 ``LazyExpression()``
+        """
+        raise KaiwuError(
+            "LazyExpression nodes may be shared and cannot be cleared in place, "
+            "assign LazyExpression() instead."
+        )
+
+    def feed(self, feed_dict):
+        return self.flatten().feed(feed_dict)
+
+    def __deepcopy__(self, memo):
+        # 计算图节点创建后不再改变(clear()也不允许)，可以直接共享
+        return self
+
+    def __add__(self, other):
+        if isinstance(other, np.ndarray):
+            return other.__add__(self)
+        return self._node("sum", (self, other))
+
+    def __radd__(self, other):
+        return self._node("sum", (other, self))
+
+    def __sub__(self, other):
+        if isinstance(other, np.ndarray):
+            return (-other).__add__(self)
+        return self._node("sum", (self, self._node("scale", (other, -1))))
+
+    def __rsub__(self, other):
+        return self._node("sum", (other, -self))
+
+    def __neg__(self):
+        return self._node("scale", (self, -1))
+
+    def __mul__(self, other):
+        if isinstance(other, np.ndarray):
+            return other.__mul__(self)
+        if isinstance(other, numbers.Number):
+            return self._node("scale", (self, other))
+        return self._node("mul", (self, other))
+
+    def __rmul__(self, other):
+        if isinstance(other, numbers.Number):
+            return self._node("scale", (self, other))
+        return self._node("mul", (other, self))
+
+    def __pow__(self, other):
+        if other == 1:
+            return self
+        if other == 2:
+            return self._node("mul", (self, self))
+        raise KaiwuError("Items higher than quadratic.")
+
+
+def _flatten_operand(operand):
+    if is_lazy(operand):
+        return operand.flatten()
+    return operand
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
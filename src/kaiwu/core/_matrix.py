@@ -4,11 +4,25 @@
 作者: wangyong@boseq.com
 """
 
+import math
+import numbers
 from typing import Union, Tuple, List
 import numpy as np
-from kaiwu.core._binary_expression import quicksum
+from kaiwu.core._binary_expression import Binary, BinaryExpression, quicksum
 from kaiwu.core._expression import Expression
 from kaiwu.core._get_val import get_val
+from kaiwu.core._error import KaiwuError
+from kaiwu.core._constraint import ConstraintArray
+from kaiwu.core._variable_registry import VariableRegistry
+from kaiwu.core._array_evaluator import ExpressionArrayEvaluator
+from kaiwu.core._array_terms import (
+    affine_elements,
+    compile_array_terms,
+    dot_numeric,
+    element_names,
+    is_numeric,
+    normalize_axes,
+)
 
 
 def dot(mat_left, mat_right):
@@ -29,6 +43,8 @@ def dot(mat_left, mat_right):
     # 检查输入是否为NumPy数组
     if not isinstance(mat_left, np.ndarray) or not isinstance(mat_right, np.ndarray):
         raise ValueError("Both inputs must be NumPy arrays")
+    if is_numeric(mat_left) and is_numeric(mat_right):
+        return np.dot(mat_left, mat_right)
     left_is_vector = len(mat_left.shape) == 1
     right_is_vector = len(mat_right.shape) == 1
     # 为了方便使用矩阵运算的写法进行运算，根据位置把向量补全成为矩阵
@@ -53,12 +69,22 @@ def dot(mat_left, mat_right):
     result_shape = mat_left_shape[:-1] + mat_right_shape[:-1]
     result = BinaryExpressionNDArray(result_shape, dtype=Expression)
 
-    # 使用嵌套循环和np.sum来实现多维点积
-    for a_idx in np.ndindex(mat_left_shape[:-1]):
-        for b_idx in np.ndindex(mat_right_shape[:-1]):
-            result[a_idx + b_idx] = quicksum(
-                (mat_left[a_idx] * mat_right[b_idx]).tolist()
-            )
+    # 数值矩阵与表达式数组相乘时直接由系数数组计算
+    fast = None
+    if is_numeric(mat_left) != is_numeric(mat_right) and mat_left.size:
+        if is_numeric(mat_left):
+            fast = dot_numeric(mat_left, mat_right, True)
+        else:
+            fast = dot_numeric(mat_right, mat_left, False)
+    if fast is not None:
+        result[...] = fast.reshape(result_shape)
+    else:
+        # 使用嵌套循环和np.sum来实现多维点积
+        for a_idx in np.ndindex(mat_left_shape[:-1]):
+            for b_idx in np.ndindex(mat_right_shape[:-1]):
+                result[a_idx + b_idx] = quicksum(
+                    (mat_left[a_idx] * mat_right[b_idx]).tolist()
+                )
 
     if right_is_vector:
         result = result.squeeze(-1)
@@ -67,57 +93,219 @@ def dot(mat_left, mat_right):
     return result
 
 
-def _is_less(qubo_left, qubo_right):
-    return qubo_left < qubo_right
+def _variable_names(variables):
+    """变量数组中各变量的名称，元素必须是单个二进制变量"""
+    names = []
+    for var in np.ravel(np.asarray(variables, dtype=object)):
+        key = next(iter(var.coefficient), None) if isinstance(var, Expression) else None
+        if (
+            key is None
+            or len(key) != 1
+            or len(var.coefficient) != 1
+            or var.coefficient[key] != 1
+            or var.offset != 0
+        ):
+            raise KaiwuError("x should be an array of binary variables")
+        names.append(key[0])
+    return names
+
+
+def _matrix_triplets(mat, size):
+    """把稠密矩阵、COO三元组或带tocoo()的稀疏矩阵统一为(row, col, value)"""
+    if hasattr(mat, "tocoo"):
+        coo = mat.tocoo()
+        row, col, value = coo.row, coo.col, coo.data
+    elif isinstance(mat, tuple):
+        row, col, value = mat
+    else:
+        mat = np.asarray(mat)
+        if mat.shape != (size, size):
+            raise KaiwuError(f"Q should be a square matrix of size {size}")
+        row, col = np.nonzero(mat)
+        value = mat[row, col]
+    row, col, value = np.asarray(row), np.asarray(col), np.asarray(value)
+    if len(row) and (
+        max(row.max(), col.max()) >= size or min(row.min(), col.min()) < 0
+    ):
+        raise KaiwuError(f"Q should be a square matrix of size {size}")
+    return row.astype(np.int64), col.astype(np.int64), value
+
+
+def quadratic_form(mat, variables, linear=None, offset=0):
+    """由矩阵直接构造二次型 x^T Q x + c^T x + offset.
+
+    只遍历Q的非零元，耗时与非零元个数成正比，不生成 ``x.dot(Q).dot(x)`` 的中间表达式。
+    x_i*x_i 按二进制变量化为一次项。
+
+    Args:
+        mat (np.ndarray or tuple): n*n 的系数矩阵Q，可以是稠密数组、(row, col, value) 形式的COO三元组，
+            或带有 ``tocoo()`` 方法的稀疏矩阵
+
+        variables (BinaryExpressionNDArray or list): 长度为n的二进制变量数组x
+
+        linear (np.ndarray, optional): 长度为n的一次项系数c
 
+        offset (float, optional): 常数项，默认为0
 
-def _is_less_equal(qubo_left, qubo_right):
-    return qubo_left <= qubo_right
+    Returns:
+        BinaryExpression: 二次型表达式，可直接传给QuboModel
 
+    Examples:
+        >>> import numpy as np
+        >>> import kaiwu as kw
+        >>> x = kw.core.ndarray(3, "x", kw.core.Binary)
+        >>> mat = np.array([[1, 2, 0], [0, 0, -1], [3, 0, 0]])
+        >>> kw.core.quadratic_form(mat, x, linear=np.array([0, 1, 1]), offset=2)
+        x[0]+2*x[0]*x[1]+3*x[0]*x[2]+x[1]-x[1]*x[2]+x[2]+2
+    """
+    names = _variable_names(variables)
+    row, col, value = _matrix_triplets(mat, len(names))
+    if linear is not None:
+        linear = np.ravel(np.asarray(linear))
+        if len(linear) != len(names):
+            raise KaiwuError(f"c should have length {len(names)}")
+        diag = np.flatnonzero(linear)
+        row = np.concatenate([row, diag])
+        col = np.concatenate([col, diag])
+        value = np.concatenate([value, linear[diag]])
+
+    # 变量按名称编号，使二次项的键与表达式运算中的一样按名称排序
+    unique_names, var_id = np.unique(np.array(names, dtype=object), return_inverse=True)
+    num_vars = len(unique_names)
+    first, second = var_id[row], var_id[col]
+    low, high = np.minimum(first, second), np.maximum(first, second)
+    keys, inverse = np.unique(low * num_vars + high, return_inverse=True)
+    sums = np.zeros(len(keys), dtype=np.result_type(value, np.int64))
+    np.add.at(sums, inverse.ravel(), value)
+    nonzero = sums != 0
+    low, high = np.divmod(keys[nonzero], num_vars)
+    unique_names = unique_names.tolist()
+    coefficient = {
+        ((unique_names[i],) if i == j else (unique_names[i], unique_names[j])): coef
+        for i, j, coef in zip(low.tolist(), high.tolist(), sums[nonzero].tolist())
+    }
+    return BinaryExpression(coefficient, offset)
+
+
+def _compare(left, other, relation):
+    """表达式数组与other比较，得到约束数组
+
+    与数字或数值数组比较时直接引用左侧数组，右侧作为常数向量保存；否则先求差
+    """
+    if isinstance(left, LinearExpressionArray):
+        left = left.to_ndarray()
+    if isinstance(other, LinearExpressionArray):
+        other = other.to_ndarray()
+    if isinstance(other, numbers.Number) or (
+        isinstance(other, np.ndarray) and is_numeric(other)
+    ):
+        return ConstraintArray(left, relation, other)
+    return ConstraintArray(left - other, relation)
 
-def _is_greater(qubo_left, qubo_right):
-    return qubo_left > qubo_right
+
+def _wrap_result(result):
+    if isinstance(result, np.ndarray):
+        return result.view(BinaryExpressionNDArray)
+    return result
 
 
-def _is_greater_equal(qubo_left, qubo_right):
-    return qubo_left >= qubo_right
+def _as_number_array(operand):
+    """数字或数值数组转化为可安全取负的数值数组，其他对象返回None"""
+    if isinstance(operand, numbers.Number) or (
+        isinstance(operand, np.ndarray) and is_numeric(operand)
+    ):
+        operand = np.asarray(operand)
+        if operand.dtype.kind in "bu":
+            operand = operand.astype(np.int64)
+        return operand
+    return None
 
 
-def _is_equal(qubo_left, qubo_right):
-    return qubo_left == qubo_right
+def _affine_operands(ufunc, inputs):
+    """把表达式数组与数值的加、减、乘、取负和一次方转化为 ``affine_elements``
+    的参数 ``(表达式数组, scale, shift)``；不适用时返回None
+    """
+    if len(inputs) == 1:
+        return (inputs[0], -1, None) if ufunc is np.negative else None
+    left, right = inputs
+    if isinstance(left, BinaryExpressionNDArray) and left.dtype == object:
+        expr, number, expr_first = left, _as_number_array(right), True
+    elif isinstance(right, BinaryExpressionNDArray) and right.dtype == object:
+        expr, number, expr_first = right, _as_number_array(left), False
+    else:
+        return None
+    if number is None:
+        return None
+    params = {
+        np.add: (None, number),
+        np.multiply: (number, None),
+        np.subtract: (None, -number) if expr_first else (-1, number),
+    }.get(ufunc)
+    if expr_first and ufunc is np.power and number.ndim == 0 and number == 1:
+        params = (None, None)
+    return None if params is None else (expr, *params)
 
 
 class BinaryExpressionNDArray(np.ndarray):
     """基于 np.ndarray 的QUBO容器.
     该容器支持各种 numpy 原生的向量化运算
+
+    与数字或数值数组的加、减、乘和取负直接由各元素的系数字典生成结果，
+    不经过NumPy的object循环；其余运算按object数组逐元素计算。
     """
 
-    is_array_less = np.vectorize(_is_less)
-    is_array_less_equal = np.vectorize(_is_less_equal)
-    is_array_greater = np.vectorize(_is_greater)
-    is_array_greater_equal = np.vectorize(_is_greater_equal)
-    is_array_equal = np.vectorize(_is_equal)
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method == "__call__" and not kwargs:
+            affine = _affine_operands(ufunc, inputs)
+            result = None if affine is None else affine_elements(*affine)
+            if result is not None:
+                return (
+                    result.view(BinaryExpressionNDArray) if result.ndim else result[()]
+                )
+        inputs = tuple(
+            item.view(np.ndarray) if isinstance(item, BinaryExpressionNDArray) else item
+            for item in inputs
+        )
+        out = kwargs.get("out")
+        if out is not None:
+            kwargs["out"] = tuple(
+                (
+                    item.view(np.ndarray)
+                    if isinstance(item, BinaryExpressionNDArray)
+                    else item
+                )
+                for item in out
+            )
+        result = getattr(ufunc, method)(*inputs, **kwargs)
+        if out is not None:
+            return out[0] if len(out) == 1 else out
+        if isinstance(result, tuple):
+            return tuple(_wrap_result(item) for item in result)
+        return _wrap_result(result)
 
     def __lt__(self, other):
-        return BinaryExpressionNDArray.is_array_less(self, other)
+        return _compare(self, other, "<")
 
     def __le__(self, other):
-        return BinaryExpressionNDArray.is_array_less_equal(self, other)
+        return _compare(self, other, "<=")
 
     def __gt__(self, other):
-        return BinaryExpressionNDArray.is_array_greater(self, other)
+        return _compare(self, other, ">")
 
     def __ge__(self, other):
-        return BinaryExpressionNDArray.is_array_greater_equal(self, other)
+        return _compare(self, other, ">=")
 
     def __eq__(self, other):
-        return BinaryExpressionNDArray.is_array_equal(self, other)
+        return _compare(self, other, "==")
 
     def __matmul__(self, other):
         return self.dot(other)
 
+    def __rmatmul__(self, other):
+        return dot(np.asarray(other), self)
+
     def dot(self, b, out=None):
-        """使用quicksum的矩阵乘法
+        """使用quicksum的矩阵乘法，另一个矩阵为数值矩阵时直接由系数数组计算
 
         Args:
             b (BinaryExpressionNDArray): 另一个矩阵
@@ -136,44 +324,54 @@ class BinaryExpressionNDArray(np.ndarray):
     def sum(
         self, axis=None, dtype=None, out=None, keepdims=False, initial=0, where=True
     ):
-        """使用quicksum的求和方法
+        """使用quicksum沿一个或多个轴求和
 
         Args:
             axis：指定求和的轴（维度）。默认为 None，表示对所有元素求和；若为整数或元组，则沿指定轴求和。
 
-            dtype：指定输出数据类型。若未提供，则默认使用输入数组的 dtype，但整数类型可能提升为平台整数精度。暂不支持。
+            dtype：指定输出数据类型。表达式数组不适用，忽略。
 
             out：可选输出数组，用于存储结果。需与预期输出形状一致。
 
-            keepdims：布尔值。若为 True，则保留被求和的轴作为长度为1的维度。暂不支持 。
+            keepdims：布尔值。若为 True，则保留被求和的轴作为长度为1的维度。
 
-            initial：求和的初始值（标量），默认为0。暂不支持。
+            initial：求和的初始值（标量），加到每个结果的常数项上，默认为0。
 
-            where：布尔数组，指定哪些元素参与求和（NumPy 1.20+支持）。暂不支持。
+            where：布尔数组，可广播到数组形状，指定哪些元素参与求和。
 
         Returns:
-            BinaryExpressionNDArray: 乘积
+            BinaryExpressionNDArray: 求和结果，结果为标量时返回表达式
+
+        Examples:
+            >>> import kaiwu as kw
+            >>> x = kw.core.ndarray((2, 2, 2), "x", kw.core.Binary)
+            >>> x.sum(axis=(0, 2), keepdims=True)[0, 1, 0]
+            x[0][1][0]+x[0][1][1]+x[1][1][0]+x[1][1][1]
         """
         # 检查输入是否为NumPy数组
         if not isinstance(self, np.ndarray):
             raise ValueError("Input must be a NumPy array")
-        # 如果没有指定轴，则对整个数组求和
-        if axis is None:
-            # 将数组展平成一个列表并使用quicksum求和
-            return quicksum(self.flatten().tolist())
-        # 指定轴的情况
-        if axis < 0:
-            axis += self.ndim  # 转换负轴索引为正轴索引
-
-        # 初始化结果数组
-        new_shape = self.shape[:axis] + self.shape[axis + 1 :]
-        result = BinaryExpressionNDArray(new_shape, dtype=Expression)
-
-        # 对指定轴进行求和
-        for idx in np.ndindex(new_shape):
-            # 获取当前轴的子数组
-            sub_array = self[idx[:axis] + (slice(None),) + idx[axis:]]
-            result[idx] = quicksum(sub_array.flatten().tolist())
+        axes = normalize_axes(axis, self.ndim)
+        kept = [dim for dim in range(self.ndim) if dim not in axes]
+        kept_shape = tuple(self.shape[dim] for dim in kept)
+        if keepdims:
+            out_shape = tuple(
+                1 if dim in axes else size for dim, size in enumerate(self.shape)
+            )
+        else:
+            out_shape = kept_shape
+
+        arr = self.view(np.ndarray)
+        if where is not True:
+            arr = np.where(np.broadcast_to(where, self.shape), arr, 0)
+        # 被求和的轴移到最后并展平，每个输出元素对应一行，整体只遍历一次全部元素
+        rows = np.moveaxis(arr, axes, range(-len(axes), 0)).reshape(
+            math.prod(kept_shape), -1
+        )
+        result = np.empty(len(rows), dtype=object)
+        for idx, row in enumerate(rows.tolist()):
+            result[idx] = quicksum(row if initial == 0 else [initial, *row])
+        result = result.reshape(out_shape).view(BinaryExpressionNDArray)
 
         if out is not None:
             idx = (slice(None),) * len(out.shape)
@@ -206,10 +404,443 @@ class BinaryExpressionNDArray(np.ndarray):
             array([[1., 0.],
                    [1., 0.]])
         """
-        val_array = np.zeros(self.shape)  # 创建与qubo数组相同形状的空数组
-        for index in np.ndindex(self.shape):  # 遍历数组的所有下标
-            val_array[index] = get_val(self[index], sol_dict)  # 每个下标都调用get_val
-        return val_array
+        try:
+            evaluator = ExpressionArrayEvaluator(self)
+        except KaiwuError:
+            val_array = np.zeros(self.shape)  # 无法编译时逐个下标调用get_val
+            for index in np.ndindex(self.shape):
+                val_array[index] = get_val(self[index], sol_dict)
+            return val_array
+        return evaluator.get_val(sol_dict)
+
+    def get_evaluator(self, variables=None):
+        """编译数组的求值器，用于对多组解批量解码
+
+        Args:
+            variables (dict, optional): 变量名到解向量编号的字典，缺省为数组中全部变量按名称排序编号
+
+        Returns:
+            ExpressionArrayEvaluator: 求值器
+        """
+        return ExpressionArrayEvaluator(self, variables)
+
+    def get_val_batch(self, solutions, variables=None):
+        """批量计算数组在多组解上的取值
+
+        Args:
+            solutions (np.ndarray): 形状为(N, n)的解矩阵，每行一组解。取值为0/1，
+                或含-1时按spin解处理，转换为 (s+1)/2
+
+            variables (dict, optional): 变量名到解矩阵列编号的字典，通常为模型的 ``get_variables()``
+
+        Returns:
+            np.ndarray: 形状为(N, *数组形状)的取值数组，solutions为一维时形状与数组相同
+
+        Examples:
+            >>> import numpy as np
+            >>> import kaiwu as kw
+            >>> x = kw.core.ndarray((2, 2), "x", kw.core.Binary)
+            >>> model = kw.core.QuboModel(x.sum() - x[0, 0] * x[1, 1])
+            >>> solutions = np.array([[1, 0, 0, 1], [0, 1, 1, 0]])
+            >>> x.get_val_batch(solutions, model.get_variables()).tolist()
+            [[[1.0, 0.0], [0.0, 1.0]], [[0.0, 1.0], [1.0, 0.0]]]
+        """
+        values = self.get_evaluator(variables).evaluate_batch(solutions)
+        if np.ndim(solutions) == 1:
+            return values[0]
+        return values
+
+
+def _as_linear_operand(other):
+    """把运算对象转化为LinearExpressionArray或数值数组，无法保持一次形式时返回None"""
+    if isinstance(other, LinearExpressionArray):
+        return other
+    if isinstance(other, (numbers.Number, np.ndarray)):
+        other = np.asarray(other)
+        if is_numeric(other):
+            return other
+    if isinstance(other, (Expression, np.ndarray)):
+        try:
+            return LinearExpressionArray.from_array(np.asarray(other, dtype=object))
+        except KaiwuError:
+            return None
+    return None
+
+
+class LinearExpressionArray:
+    """以稀疏系数矩阵保存的一次表达式数组.
+
+    整个数组用一个 (元素数 x 变量数) 的COO系数矩阵 ``(cell, column, value)`` 加上
+    与数组同形状的常数项数组表示，变量编号由 ``registry`` 给出。求和、与数值数组的
+    广播运算、与数值矩阵的 ``@`` 都直接在系数数组上完成，不生成逐元素的表达式。
+    与非一次表达式相乘等无法保持一次形式的运算会先转化为 ``BinaryExpressionNDArray``。
+
+    Args:
+        registry (VariableRegistry): 变量注册表
+
+        offset (np.ndarray): 常数项数组，其形状即为表达式数组的形状
+
+        cell (np.ndarray, optional): 各项所在元素的展平下标
+
+        column (np.ndarray, optional): 各项的变量编号
+
+        value (np.ndarray, optional): 各项系数
+
+    Examples:
+        >>> import numpy as np
+        >>> import kaiwu as kw
+        >>> x = kw.core.ndarray((2, 3), "x", kw.core.Binary, linear=True)
+        >>> row_sum = x.sum(axis=1) - 1
+        >>> row_sum[1]
+        x[1][0]+x[1][1]+x[1][2]-1
+        >>> (np.array([1, 2]) @ x)[2]
+        x[0][2]+2*x[1][2]
+        >>> x.get_val({"x[0][0]": 1, "x[1][2]": 1}).tolist()
+        [[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]
+    """
+
+    # 使NumPy数组与之运算时交给本类的反射运算符处理
+    __array_ufunc__ = None
+
+    def __init__(self, registry, offset, cell=None, column=None, value=None):
+        self.registry = registry
+        self.offset = np.asarray(offset)
+        self.cell = np.zeros(0, dtype=np.int64) if cell is None else cell
+        self.column = np.zeros(0, dtype=np.int64) if column is None else column
+        self.value = np.zeros(0) if value is None else value
+
+    @classmethod
+    def _from_terms(cls, registry, offset, cell, column, value):
+        """合并同一元素中的同一变量，并按(元素, 变量)排序、去掉零系数"""
+        if len(cell) == 0:
+            return cls(registry, offset)
+        num_vars = max(len(registry), 1)
+        keys, inverse = np.unique(cell * num_vars + column, return_inverse=True)
+        sums = np.zeros(len(keys), dtype=np.result_type(value, np.int64))
+        np.add.at(sums, inverse.ravel(), value)
+        nonzero = sums != 0
+        cell, column = np.divmod(keys[nonzero], num_vars)
+        return cls(registry, offset, cell, column, sums[nonzero])
+
+    @classmethod
+    def from_array(cls, arr, registry=None):
+        """由元素为一次表达式或数字的数组构造
+
+        Args:
+            arr (np.ndarray): 表达式数组
+
+            registry (VariableRegistry, optional): 变量注册表，缺省时新建
+
+        Returns:
+            LinearExpressionArray: 一次表达式数组
+        """
+        registry = VariableRegistry() if registry is None else registry
+        arr = np.asarray(arr, dtype=object)
+        compiled = compile_array_terms(arr)
+        if compiled is None or any(len(key) != 1 for key in compiled[3]):
+            raise KaiwuError("Elements should be linear expressions or numbers.")
+        position, term, value, keys, offsets = compiled
+        columns = np.array([registry.add(key[0]) for key in keys], dtype=np.int64)
+        return cls._from_terms(
+            registry, offsets, position, columns[term] if len(keys) else term, value
+        )
+
+    @property
+    def shape(self):
+        """数组形状"""
+        return self.offset.shape
+
+    @property
+    def ndim(self):
+        """数组维数"""
+        return self.offset.ndim
+
+    @property
+    def size(self):
+        """元素个数"""
+        return self.offset.size
+
+    @property
+    def T(self):  # pylint: disable=invalid-name
+        """转置"""
+        return self.transpose()
+
+    def __len__(self):
+        return len(self.offset)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(shape={self.shape}, "
+            f"num_terms={len(self.value)})"
+        )
+
+    def _cell_bounds(self):
+        return np.searchsorted(self.cell, np.arange(self.size + 1))
+
+    def _take(self, source):
+        """按源元素下标数组source重新排列元素，source的形状即为结果形状"""
+        source = np.asarray(source, dtype=np.int64)
+        bounds = self._cell_bounds()
+        flat = source.ravel()
+        counts = bounds[flat + 1] - bounds[flat]
+        total = int(counts.sum())
+        starts = np.repeat(bounds[flat] - (np.cumsum(counts) - counts), counts)
+        entry = starts + np.arange(total)
+        return LinearExpressionArray(
+            self.registry,
+            self.offset.ravel()[flat].reshape(source.shape),
+            np.repeat(np.arange(len(flat)), counts),
+            self.column[entry],
+            self.value[entry],
+        )
+
+    def _cell_index(self):
+        return np.arange(self.size).reshape(self.shape)
+
+    def _broadcast(self, shape):
+        if shape == self.shape:
+            return self
+        return self._take(np.broadcast_to(self._cell_index(), shape))
+
+    def _element(self, pos):
+        """展平下标为pos的元素对应的表达式"""
+        bounds = np.searchsorted(self.cell, [pos, pos + 1])
+        names = self.registry.get_names()
+        coefficient = {
+            (names[var],): coef
+            for var, coef in zip(
+                self.column[bounds[0] : bounds[1]].tolist(),
+                self.value[bounds[0] : bounds[1]].tolist(),
+            )
+        }
+        return BinaryExpression(coefficient, self.offset.ravel()[pos].item())
+
+    def __getitem__(self, key):
+        source = self._cell_index()[key]
+        if np.ndim(source) == 0:
+            return self._element(int(source))
+        return self._take(source)
+
+    def reshape(self, *shape):
+        """改变形状"""
+        return self._take(self._cell_index().reshape(*shape))
+
+    def transpose(self, *axes):
+        """交换维度"""
+        return self._take(self._cell_index().transpose(*axes))
+
+    def flatten(self):
+        """展平为一维"""
+        return self.reshape(-1)
+
+    def to_ndarray(self):
+        """转化为逐元素保存表达式的BinaryExpressionNDArray
+
+        Returns:
+            BinaryExpressionNDArray: 表达式数组
+        """
+        result = BinaryExpressionNDArray(self.shape, dtype=Expression)
+        names = self.registry.get_names()
+        bounds = self._cell_bounds().tolist()
+        column, value = self.column.tolist(), self.value.tolist()
+        for pos, offset in enumerate(self.offset.ravel().tolist()):
+            low, high = bounds[pos], bounds[pos + 1]
+            result.flat[pos] = BinaryExpression(
+                {
+                    (names[var],): coef
+                    for var, coef in zip(column[low:high], value[low:high])
+                },
+                offset,
+            )
+        return result
+
+    def get_val(self, sol_dict):
+        """根据结果字典计算各元素的取值
+
+        Args:
+            sol_dict (dict): 由get_sol_dict生成的结果字典。
+
+        Returns:
+            np.ndarray: 与数组同形状的取值数组
+        """
+        values = np.array(
+            [sol_dict.get(name, 0) for name in self.registry], dtype=np.float64
+        )
+        terms = self.value * values[self.column] if len(values) else self.value
+        return (
+            np.bincount(self.cell, terms, minlength=self.size).reshape(self.shape)
+            + self.offset
+        )
+
+    def get_val_batch(self, solutions, variables=None):
+        """批量计算数组在多组解上的取值
+
+        Args:
+            solutions (np.ndarray): 形状为(N, n)的解矩阵，每行一组解。取值为0/1，
+                或含-1时按spin解处理，转换为 (s+1)/2
+
+            variables (dict, optional): 变量名到解矩阵列编号的字典，缺省按变量注册表的编号
+
+        Returns:
+            np.ndarray: 形状为(N, *数组形状)的取值数组，solutions为一维时形状与数组相同
+        """
+        if variables is None:
+            variables = self.registry.to_dict()
+        evaluator = ExpressionArrayEvaluator.from_linear_terms(
+            self.shape,
+            self.offset,
+            (self.cell, self.column, self.value),
+            self.registry.get_names(),
+            variables,
+        )
+        values = evaluator.evaluate_batch(solutions)
+        if np.ndim(solutions) == 1:
+            return values[0]
+        return values
+
+    def sum(self, axis=None, keepdims=False):
+        """沿指定轴求和
+
+        Args:
+            axis (int or tuple, optional): 求和的轴，默认对全部元素求和
+
+            keepdims (bool): 是否保留被求和的轴作为长度为1的维度
+
+        Returns:
+            LinearExpressionArray or BinaryExpression: 结果为标量时返回表达式
+        """
+        axes = normalize_axes(axis, self.ndim)
+        offset = self.offset.sum(axis=axes, keepdims=keepdims)
+        kept = [dim for dim in range(self.ndim) if dim not in axes]
+        index = np.unravel_index(self.cell, self.shape)
+        cell = (
+            np.ravel_multi_index(
+                [index[dim] for dim in kept], [self.shape[dim] for dim in kept]
+            )
+            if kept
+            else np.zeros(len(self.cell), dtype=np.int64)
+        )
+        result = LinearExpressionArray._from_terms(
+            self.registry, offset, cell, self.column, self.value
+        )
+        return result[()] if result.ndim == 0 else result
+
+    def __neg__(self):
+        return LinearExpressionArray(
+            self.registry, -self.offset, self.cell, self.column, -self.value
+        )
+
+    def __add__(self, other):
+        operand = _as_linear_operand(other)
+        if operand is None:
+            return self.to_ndarray() + other
+        shape = np.broadcast_shapes(self.shape, operand.shape)
+        left = self._broadcast(shape)
+        if not isinstance(operand, LinearExpressionArray):
+            return LinearExpressionArray(
+                self.registry, left.offset + operand, left.cell, left.column, left.value
+            )
+        right = operand._broadcast(shape)
+        if right.registry is not self.registry:
+            mapping = np.array(
+                [self.registry.add(name) for name in right.registry], dtype=np.int64
+            )
+            right_column = mapping[right.column] if len(mapping) else right.column
+        else:
+            right_column = right.column
+        result = LinearExpressionArray._from_terms(
+            self.registry,
+            left.offset + right.offset,
+            np.concatenate([left.cell, right.cell]),
+            np.concatenate([left.column, right_column]),
+            np.concatenate([left.value, right.value]),
+        )
+        return result[()] if result.ndim == 0 else result
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        return self.__add__(-other)
+
+    def __rsub__(self, other):
+        return (-self).__add__(other)
+
+    def __mul__(self, other):
+        operand = _as_linear_operand(other)
+        if not isinstance(operand, np.ndarray):
+            if isinstance(other, LinearExpressionArray):
+                other = other.to_ndarray()
+            return self.to_ndarray() * other
+        shape = np.broadcast_shapes(self.shape, operand.shape)
+        left = self._broadcast(shape)
+        factor = np.broadcast_to(operand, shape).ravel()[left.cell]
+        value = left.value * factor
+        nonzero = value != 0
+        return LinearExpressionArray(
+            self.registry,
+            left.offset * operand,
+            left.cell[nonzero],
+            left.column[nonzero],
+            value[nonzero],
+        )
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        return self.__mul__(1 / np.asarray(other))
+
+    def __matmul__(self, other):
+        other = np.asarray(other)
+        if not is_numeric(other) or self.ndim > 2 or other.ndim > 2:
+            return dot(self.to_ndarray(), other)
+        left = self.reshape(1, -1) if self.ndim == 1 else self
+        right = other[:, np.newaxis] if other.ndim == 1 else other
+        if left.shape[1] != right.shape[0]:
+            raise ValueError(
+                "The last dimension of A must be equal to the"
+                " second last dimension of B for dot product"
+            )
+        size_m = right.shape[1]
+        row, k_idx = np.divmod(left.cell, left.shape[1])
+        result = LinearExpressionArray._from_terms(
+            self.registry,
+            left.offset @ right,
+            (row[:, np.newaxis] * size_m + np.arange(size_m)).ravel(),
+            np.repeat(left.column, size_m),
+            (left.value[:, np.newaxis] * right[k_idx]).ravel(),
+        )
+        shape = self.shape[:-1] + other.shape[1:]
+        return result.reshape(shape) if shape else result[0, 0]
+
+    def __rmatmul__(self, other):
+        other = np.asarray(other)
+        result = self.transpose() @ other.T
+        return (
+            result.transpose() if isinstance(result, LinearExpressionArray) else result
+        )
+
+    def dot(self, other):
+        """矩阵乘法"""
+        return self @ other
+
+    def __eq__(self, other):
+        return _compare(self, other, "==")
+
+    def __lt__(self, other):
+        return _compare(self, other, "<")
+
+    def __le__(self, other):
+        return _compare(self, other, "<=")
+
+    def __gt__(self, other):
+        return _compare(self, other, ">")
+
+    def __ge__(self, other):
+        return _compare(self, other, ">=")
+
+    __hash__ = None
 
 
 def zeros(shape) -> BinaryExpressionNDArray:
@@ -235,7 +866,12 @@ def zeros(shape) -> BinaryExpressionNDArray:
 
 
 def ndarray(
-    shape: Union[int, Tuple[int, ...], List[int]], name, var_func, var_func_param=None
+    shape: Union[int, Tuple[int, ...], List[int]],
+    name,
+    var_func,
+    var_func_param=None,
+    linear=False,
+    registry=None,
 ):
     """基于 np.ndarray 的QUBO容器.
     该容器支持各种 numpy 原生的向量化运算
@@ -249,6 +885,12 @@ def ndarray(
 
         var_func_param (tuple): var_func除了name以外的参数
 
+        linear (bool): 为True时返回以稀疏系数矩阵保存的LinearExpressionArray，
+            var_func生成的元素须为一次表达式. 默认为False
+
+        registry (VariableRegistry, optional): ``linear=True`` 时变量整块注册到的变量注册表。
+            多个数组共用同一注册表时，相互运算无需重新映射变量编号；``linear=False`` 时不可用
+
     Returns:
         np.ndarray: 多维容器.
 
@@ -309,14 +951,35 @@ def ndarray(
         raise ValueError("The argument shape cannot contain 0.")
     if var_func_param is None:
         var_func_param = ()
-
+    if registry is not None and not linear:
+        raise ValueError("The argument registry is only used when linear=True.")
+
+    if var_func is Binary:
+        # 二进制变量的名称与编号整块生成，linear=True时不生成逐元素的变量对象
+        names = list(element_names(shape, name))
+        if linear:
+            registry = VariableRegistry() if registry is None else registry
+            columns = registry.add_many(names)
+            size = len(columns)
+            return LinearExpressionArray(
+                registry,
+                np.zeros(shape, dtype=np.int64),
+                np.arange(size),
+                columns,
+                np.ones(size, dtype=np.int64),
+            )
+        variables = Binary.from_names(names)
+        size = len(variables)
+        return (
+            np.fromiter(variables, dtype=object, count=size)
+            .reshape(shape)
+            .view(BinaryExpressionNDArray)
+        )
     arr = BinaryExpressionNDArray(shape, dtype=Expression)
-    for idx in np.ndindex(shape):
-        item_str = name
-        for i, idx_i in enumerate(idx):
-            len_str_k = len(str(shape[i] - 1))
-            item_str += f"[{str(idx_i).zfill(len_str_k)}]"
+    for idx, item_str in zip(np.ndindex(shape), element_names(shape, name)):
         arr[idx] = var_func(item_str, *var_func_param)
+    if linear:
+        return LinearExpressionArray.from_array(arr, registry)
     return arr
 
 
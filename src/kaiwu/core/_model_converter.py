@@ -6,52 +6,38 @@
 """
 
 import numpy as np
-from kaiwu.core._ising import IsingModel, IsingExpression
-
-
-def _to_ising(qubo_expr):
-    """QUBO表达式转化为Ising模型"""
-    variables_set = set()
-    quadratic = {}
-    linear = {}
-    bias = 0
-    for key in qubo_expr.coefficient:
-        variables_set.add(key[0])
-        if len(key) == 2:
-            variables_set.add(key[1])
-            coefficient = qubo_expr.coefficient[key] / 4
-            quadratic[key] = coefficient
-            if key[0] in linear:
-                linear[key[0]] += coefficient
-            else:
-                linear[key[0]] = coefficient
-            if key[1] in linear:
-                linear[key[1]] += coefficient
-            else:
-                linear[key[1]] = coefficient
-            bias += coefficient
-        else:
-            coefficient = qubo_expr.coefficient[key] / 2
-            if key[0] in linear:
-                linear[key[0]] += coefficient
-            else:
-                linear[key[0]] = coefficient
-            bias += coefficient
-    bias += qubo_expr.offset
-
-    variables_set = list(variables_set)
-    variables_set.sort()
-    variables_set = tuple(variables_set)
-
-    return IsingExpression(variables_set, quadratic, linear, bias)
-
-
-def qubo_model_to_ising_model(qubo_model):
+from kaiwu.core._ising import IsingModel
+from kaiwu.core._sparse_matrix import SparseMatrix
+
+
+def _to_ising(row, col, data, offset, num_vars):
+    """上三角QUBO矩阵的非零元转化为Ising的二次项、一次项和常数项
+
+    Returns:
+        tuple: 二次项 (行, 列, 系数)、长度为 ``num_vars`` 的一次项系数和常数项
+    """
+    quadratic = row != col
+    coefficient = np.where(quadratic, data / 4, data / 2)
+    # 每项依次计入两个变量(一次项的第二份为0)，与逐项累加的顺序一致
+    linear = np.bincount(
+        np.column_stack((row, col)).ravel(),
+        weights=np.column_stack(
+            (coefficient, np.where(quadratic, coefficient, 0))
+        ).ravel(),
+        minlength=num_vars,
+    )
+    bias = sum(coefficient.tolist()) + offset
+    return (row[quadratic], col[quadratic], coefficient[quadratic]), linear, bias
+
+
+def qubo_model_to_ising_model(qubo_model, sparse=False):
     """QUBO转Ising模型.
 
     Args:
         qubo_model (QuboModel): QUBO Model.
 
+        sparse (bool): 为True时Ising矩阵为只保存非零元素的 ``SparseMatrix``. 默认为False
+
     Returns:
         CimIsing: Ising模型.
 
@@ -71,29 +57,39 @@ def qubo_model_to_ising_model(qubo_model):
           Ising Variables: b1, b2, __spin__
         <BLANKLINE>
     """
-    qubo_model.compile_constraints()
-    qubo_expr = qubo_model.make()
-    ising_expression = _to_ising(qubo_expr)
-    variable_index = dict(
-        zip(ising_expression.variables, range(len(ising_expression.variables)))
+    qubo_mat = qubo_model.get_matrix(sparse=True)
+    num_vars = len(qubo_model.variables)
+    (row, col, value), linear, bias = _to_ising(
+        qubo_mat.row,
+        qubo_mat.col,
+        qubo_mat.data,
+        qubo_model.qubo_expr_made.offset,
+        num_vars,
     )
-    variable_index["__spin__"] = len(ising_expression.variables)
-    cim_matrix = np.zeros(
-        (len(ising_expression.variables) + 1, len(ising_expression.variables) + 1)
-    )
-    for key in ising_expression.quadratics:
-        cim_matrix[variable_index[key[0]], variable_index[key[1]]] = (
-            ising_expression.quadratics[key]
-        )
-
-    for key in ising_expression.linear:
-        cim_matrix[variable_index[key], len(ising_expression.variables)] = (
-            ising_expression.linear[key]
+    variable_index = dict(qubo_model.variables)
+    variable_index["__spin__"] = num_vars
+    size = num_vars + 1
+    if sparse:
+        # 辅助自旋所在的最后一列表示一次项，对称化后整体乘以 -0.5
+        linear_idx = np.flatnonzero(linear)
+        spin = np.full(len(linear_idx), num_vars)
+        row = np.concatenate((row, linear_idx))
+        col = np.concatenate((col, spin))
+        value = -0.5 * np.concatenate((value, linear[linear_idx]))
+        matrix = SparseMatrix(
+            np.concatenate((row, col)),
+            np.concatenate((col, row)),
+            np.concatenate((value, value)),
+            (size, size),
         )
+        return IsingModel(variable_index, matrix, bias)
 
+    cim_matrix = np.zeros((size, size))
+    cim_matrix[row, col] = value
+    cim_matrix[:num_vars, num_vars] = linear
     cim_matrix = cim_matrix + cim_matrix.T
 
-    return IsingModel(variable_index, -0.5 * cim_matrix, ising_expression.bias)
+    return IsingModel(variable_index, -0.5 * cim_matrix, bias)
 
 
 if __name__ == "__main__":
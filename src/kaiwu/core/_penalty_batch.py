@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.penalty_batch
+
+功能: 批量生成数值系数一次约束的penalty method惩罚项
+"""
+
+import itertools
+import math
+import numpy as np
+from kaiwu.core import _expression
+from kaiwu.core._binary_expression import BinaryExpression
+
+# 关系运算符 -> (左侧表达式的符号, 松弛变量的最小值)，等式不需要松弛变量
+_RELATIONS = {"==": (1, -1), "<=": (1, 0), "<": (1, 1), ">=": (-1, 0), ">": (-1, 1)}
+# 系数类型编号，其余类型(占位符、numpy标量等)的约束逐个处理
+_NUMBER_TYPES = {int: 0, float: 1}
+# 整数系数的绝对值上限，保证平方展开在int64中不溢出、在float64中精确
+_MAX_INT = 2**26
+# 松弛变量离散步数的上限
+_MAX_STEPS = 2**52
+
+
+def _gather(constraints):
+    """收集左侧为BinaryExpression且不带自定义松弛变量的等式、不等式约束"""
+    positions, counts, keys, values, offsets, relations = [], [], [], [], [], []
+    for pos, constraint in enumerate(constraints):
+        left = constraint.left_operand
+        relation = constraint.relation
+        # pylint: disable-next=unidiomatic-typecheck
+        plain = type(left) is BinaryExpression
+        if (
+            not plain
+            or relation not in _RELATIONS
+            or (relation != "==" and constraint.slack_var_expr is not None)
+        ):
+            continue
+        coefficient = left.coefficient
+        positions.append(pos)
+        counts.append(len(coefficient))
+        keys.extend(coefficient)
+        values.extend(coefficient.values())
+        offsets.append(left.offset)
+        relations.append(relation)
+    return positions, counts, keys, values, offsets, relations
+
+
+def _numbers(items):
+    """数值序列转为 (float64数组, 是否为int, 是否可以批量处理)"""
+    codes = np.fromiter(
+        map(_NUMBER_TYPES.get, map(type, items), itertools.repeat(2)),
+        dtype=np.int8,
+        count=len(items),
+    )
+    usable = codes < 2
+    if not usable.all():
+        items = [item if ok else 0 for item, ok in zip(items, usable.tolist())]
+    try:
+        value = np.array(items, dtype=np.float64)
+    except OverflowError:
+        return np.zeros(len(items)), codes == 0, np.zeros(len(items), dtype=bool)
+    is_int = codes == 0
+    usable &= np.isfinite(value) & ~(is_int & (np.abs(value) >= _MAX_INT))
+    return value, is_int, usable
+
+
+class _LinearBatch:
+    """一批一次表达式：第cell[t]个表达式的第t项为 value[t] * names[t]
+
+    系数按float64保存，is_int标记Python中为int的系数，按Python的运算顺序计算时结果与逐个展开一致。
+    """
+
+    def __init__(self, counts, names, value, is_int, offset, offset_is_int):
+        self.counts = counts
+        self.cell = np.repeat(np.arange(len(counts)), counts)
+        self.names = names
+        self.value = value
+        self.is_int = is_int
+        self.offset = offset
+        self.offset_is_int = offset_is_int
+
+    def select(self, mask):
+        """只保留mask为True的表达式"""
+        terms = np.repeat(mask, self.counts)
+        return _LinearBatch(
+            self.counts[mask],
+            list(itertools.compress(self.names, terms.tolist())),
+            self.value[terms],
+            self.is_int[terms],
+            self.offset[mask],
+            self.offset_is_int[mask],
+        )
+
+
+def _slack_terms(batch, slack_min, base_names):
+    """与 ``_create_slack_variable`` 相同地生成各不等式(slack_min >= 0)的松弛变量项
+
+    Returns:
+        tuple: (可以批量处理的表达式mask, 松弛变量项的表达式编号, 变量名, 系数, 松弛变量常数项)
+    """
+    size = len(batch.counts)
+    negative = np.bincount(batch.cell, np.maximum(-batch.value, 0), size)
+    slack_range = np.maximum(negative - batch.offset, 0)
+
+    # 各表达式内系数排序后补0，取相邻不等系数的最小间隔
+    order = np.lexsort((batch.value, batch.cell))
+    ordered, cell = batch.value[order], batch.cell[order]
+    following = np.append(ordered[1:], 0.0)
+    following[np.append(cell[1:] != cell[:-1], True)] = 0.0
+    distinct = following != ordered
+    min_diff = np.full(size, np.inf)
+    np.minimum.at(min_diff, cell[distinct], np.abs(following - ordered)[distinct])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steps = np.round(slack_range / min_diff)
+    usable = (
+        (slack_min >= 0)
+        & (slack_range > 0)
+        & np.isfinite(min_diff)
+        & (steps >= 1)
+        & (steps < _MAX_STEPS)
+    )
+    steps = np.where(usable, steps, 1).astype(np.int64)
+    unique_steps, inverse = np.unique(steps, return_inverse=True)
+    num_bits = np.array(
+        [int(math.log2(step)) for step in unique_steps.tolist()], dtype=np.int64
+    )[inverse.ravel()]
+    scale = slack_range / steps
+
+    # 第j位的系数为 2**j，最后一位补足到步数
+    counts = np.where(usable, num_bits + 1, 0)
+    slack_cell = np.repeat(np.arange(size), counts)
+    bit = np.arange(len(slack_cell)) - np.repeat(np.cumsum(counts) - counts, counts)
+    weight = np.where(
+        bit == num_bits[slack_cell],
+        steps[slack_cell] - 2 ** num_bits[slack_cell] + 1,
+        2**bit,
+    )
+    names = [
+        f"_slack_{base_names[idx]}[{j}]"
+        for idx, j in zip(slack_cell.tolist(), bit.tolist())
+    ]
+    slack_offset = np.maximum(slack_min, 0) * scale
+    return usable, slack_cell, names, weight * scale[slack_cell], slack_offset
+
+
+def _merge_slack(batch, slack_min, base_names):
+    """不等式等价于 ``diff + slack``：两部分中项数较少的一方接在另一方之后"""
+    usable, slack_cell, slack_names, slack_value, slack_offset = _slack_terms(
+        batch, slack_min, base_names
+    )
+    inequality = slack_min >= 0
+    slack_counts = np.bincount(slack_cell, minlength=len(batch.counts))
+    # 松弛变量项不少于原表达式的项数时排在前面
+    slack_first = slack_counts >= batch.counts
+
+    cell = np.concatenate((batch.cell, slack_cell))
+    group = np.concatenate((slack_first[batch.cell], ~slack_first[slack_cell]))
+    order = np.lexsort((np.arange(len(cell)), group, cell))
+    names = batch.names + slack_names
+    merged = _LinearBatch(
+        batch.counts + slack_counts,
+        list(map(names.__getitem__, order.tolist())),
+        np.concatenate((batch.value, slack_value))[order],
+        np.concatenate((batch.is_int, np.zeros(len(slack_cell), dtype=bool)))[order],
+        batch.offset + np.where(inequality, slack_offset, 0),
+        batch.offset_is_int & ~inequality,
+    )
+    return usable | ~inequality, merged
+
+
+def _square_pairs(counts):
+    """各表达式平方展开的项对：按行遍历上三角，每行先对角项
+
+    Returns:
+        tuple: (项对所属表达式, 第一项编号, 第二项编号)
+    """
+    starts = np.cumsum(counts) - counts
+    out_counts = counts * (counts + 1) // 2
+    out_starts = np.cumsum(out_counts) - out_counts
+    total = int(out_counts.sum())
+    pair_cell = np.empty(total, dtype=np.int64)
+    first = np.empty(total, dtype=np.int64)
+    second = np.empty(total, dtype=np.int64)
+    for count in np.unique(counts).tolist():
+        cells = np.flatnonzero(counts == count)
+        row, col = np.triu_indices(count)
+        pos = (out_starts[cells][:, None] + np.arange(len(row))).ravel()
+        pair_cell[pos] = np.repeat(cells, len(row))
+        first[pos] = (starts[cells][:, None] + row).ravel()
+        second[pos] = (starts[cells][:, None] + col).ravel()
+    return pair_cell, first, second
+
+
+def _square(batch):
+    """与 ``expr ** 2`` 相同地展开各表达式的平方
+
+    ``_expr_dicts_mul`` 保留系数为0的一次项，向量化的一次表达式相乘路径则去掉它们，
+    两种情况分别按逐个展开时会走的路径处理。
+
+    Returns:
+        tuple: (可以批量处理的表达式mask, 项键列表, 系数列表, 各表达式的常数项列表,
+        各表达式的项在列表中的起止位置)
+    """
+    pair_cell, first, second = _square_pairs(batch.counts)
+    diagonal = first == second
+    value, offset = batch.value, batch.offset[pair_cell]
+    product = value[first] * value[second]
+    usable = np.bincount(pair_cell, product == 0, len(batch.counts)) == 0
+    result = np.where(
+        diagonal,
+        product + value[first] * offset + value[first] * offset,
+        product + product,
+    )
+    int_value = np.where(batch.is_int, value, 0).astype(np.int64)
+    int_offset = np.where(batch.offset_is_int, batch.offset, 0).astype(np.int64)
+    int_result = np.where(
+        diagonal,
+        int_value[first] * (int_value[first] + 2 * int_offset[pair_cell]),
+        2 * int_value[first] * int_value[second],
+    )
+    is_int = batch.is_int[first] & batch.is_int[second]
+    is_int &= ~diagonal | batch.offset_is_int[pair_cell] | (offset == 0)
+
+    # 与 _expr_linear_mul 的适用条件相同：项数足够多且系数全为int(常数项也为int)或全为float
+    num_int = np.bincount(batch.cell, batch.is_int, len(batch.counts))
+    # pylint: disable-next=protected-access
+    vectorized = (batch.counts**2 >= _expression._LINEAR_MUL_MIN_PAIRS) & (
+        (num_int == batch.counts) & batch.offset_is_int | (num_int == 0)
+    )
+    keep = ~(diagonal & vectorized[pair_cell] & (result == 0))
+
+    # 二次项的键按变量名排序：整体比较变量名后交换
+    names = batch.names
+    first, second = first[keep], second[keep]
+    name_array = np.array(names)
+    swap = name_array[first] > name_array[second]
+    first, second = np.where(swap, second, first), np.where(swap, first, second)
+    keys = [
+        (names[i],) if i == j else (names[i], names[j])
+        for i, j in zip(first.tolist(), second.tolist())
+    ]
+    values = np.where(
+        is_int[keep], int_result[keep].astype(object), result[keep].astype(object)
+    ).tolist()
+
+    offsets = []
+    for const, const_is_int, fast in zip(
+        batch.offset.tolist(), batch.offset_is_int.tolist(), vectorized.tolist()
+    ):
+        if const_is_int:
+            const = int(const)
+        offsets.append(const * const if fast or const != 0 else 0)
+    bounds = np.cumsum(np.bincount(pair_cell[keep], minlength=len(batch.counts)))
+    return usable, keys, values, offsets, np.concatenate(([0], bounds)).tolist()
+
+
+def penalty_exprs(names, constraints):
+    """批量生成约束的惩罚项表达式，结果与逐个调用
+    ``PenaltyMethodConstraint.from_constraint_definition`` 得到的表达式相同(项的顺序、数值和类型)
+
+    只处理左侧为数值系数一次BinaryExpression、不带自定义松弛变量的等式和不等式约束，
+    松弛变量的范围、精度和各位系数以及平方展开都对整批约束一次性计算。
+
+    Args:
+        names (list): 约束名称
+
+        constraints (list): 约束定义
+
+    Returns:
+        list: 与constraints对应的表达式，不能批量处理的位置为None
+    """
+    exprs = [None] * len(constraints)
+    positions, counts, keys, values, offsets, relations = _gather(constraints)
+    if not positions:
+        return exprs
+    counts = np.array(counts, dtype=np.int64)
+    value, is_int, usable = _numbers(values)
+    offset, offset_is_int, offset_usable = _numbers(offsets)
+    usable &= np.fromiter(map(len, keys), dtype=np.int64, count=len(keys)) == 1
+    names_of_terms = [key[0] for key in keys]
+    usable &= np.array([not name.startswith("_slack_") for name in names_of_terms])
+    cells_usable = (
+        offset_usable
+        & (counts > 0)
+        & (
+            np.bincount(np.repeat(np.arange(len(counts)), counts), ~usable, len(counts))
+            == 0
+        )
+    )
+
+    sign, slack_min = np.array([_RELATIONS[relation] for relation in relations]).T
+    batch = _LinearBatch(
+        counts,
+        names_of_terms,
+        value * np.repeat(sign, counts),
+        is_int,
+        offset * sign,
+        offset_is_int,
+    ).select(cells_usable)
+    positions = np.array(positions)[cells_usable]
+    slack_min = slack_min[cells_usable]
+
+    base_names = [names[pos] for pos in positions.tolist()]
+    slack_usable, batch = _merge_slack(batch, slack_min, base_names)
+    square_usable, keys, values, offsets, bounds = _square(batch)
+    positions = positions.tolist()
+    for idx in np.flatnonzero(slack_usable & square_usable).tolist():
+        start, stop = bounds[idx], bounds[idx + 1]
+        exprs[positions[idx]] = BinaryExpression(
+            dict(zip(keys[start:stop], values[start:stop])), offsets[idx]
+        )
+    return exprs
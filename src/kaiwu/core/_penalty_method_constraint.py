@@ -4,9 +4,11 @@
 
 功能: 生成基于penalty method的约束项
 """
+
 import logging
 from kaiwu.core._binary_expression import Integer
-from kaiwu.core._get_val import get_val
+from kaiwu.core._penalty_batch import penalty_exprs
+from kaiwu.core._get_val import get_val_compiled
 from kaiwu.core._constraint import Constraint
 
 logger = logging.getLogger(__name__)
@@ -67,6 +69,45 @@ class PenaltyMethodConstraint:
 
         return PenaltyMethodConstraint(expr, constraint.default_penalty, parent_model)
 
+    @classmethod
+    def from_constraint_definitions(cls, names, constraints, parent_model):
+        """批量准备约束的QUBO表达式，结果与逐个调用 ``from_constraint_definition`` 相同
+
+        数值系数一次约束的松弛变量和平方展开对整批一次性计算，其余约束逐个处理。
+        子类重写了 ``from_constraint_definition`` 时全部逐个处理。
+
+        Args:
+         names: 约束名称列表
+
+         constraints: 约束定义列表
+
+         parent_model: the model it belongs to.
+
+        Returns:
+            list: 与constraints对应的约束项
+        """
+        names, constraints = list(names), list(constraints)
+        batch_exprs = [None] * len(constraints)
+        if (
+            cls.from_constraint_definition.__func__
+            is PenaltyMethodConstraint.from_constraint_definition.__func__
+        ):
+            batch_exprs = penalty_exprs(names, constraints)
+        made = []
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for name, constraint, expr in zip(names, constraints, batch_exprs):
+            if expr is None:
+                made.append(
+                    cls.from_constraint_definition(name, constraint, parent_model)
+                )
+                continue
+            if debug:
+                logger.debug("Constraint expression: %s", expr)
+            made.append(
+                PenaltyMethodConstraint(expr, constraint.default_penalty, parent_model)
+            )
+        return made
+
     def set_penalty(self, penalty):
         """设置惩罚系数"""
         if penalty is None:
@@ -74,7 +115,7 @@ class PenaltyMethodConstraint:
         self.previous_penalty = self.penalty
         self.penalty = penalty
         if self._parent_model:
-            self._parent_model.invalidate_made_state()
+            self._parent_model.update_penalty(self, self.previous_penalty)
         logger.debug(
             "Penalty: %s Constraint expression: %s", self.penalty, self.constraint_expr
         )
@@ -97,7 +138,9 @@ class PenaltyMethodConstraint:
 
     def is_satisfied(self, solution_dict):
         """验证约束满足情况"""
-        self.current_value = float(get_val(self.constraint_expr, solution_dict))
+        self.current_value = float(
+            get_val_compiled(self.constraint_expr, solution_dict)
+        )
         return abs(self.current_value) < 1e-5
 
 
@@ -5,14 +5,21 @@
 """
 
 import logging
+import numbers
 import numpy as np
 from kaiwu.core._binary_model import BinaryModel
-from kaiwu.core._binary_expression import Binary, quicksum
-from kaiwu.core._matrix import ndarray
+from kaiwu.core._binary_expression import Binary, BinaryExpression, quicksum
+from kaiwu.core._coo_expression import CooBinaryExpression
+from kaiwu.core._matrix import ndarray, quadratic_form
+from kaiwu.core._sparse_matrix import SparseMatrix
+from kaiwu.core._term_store import TermStore
 from kaiwu.core._error import KaiwuError
 
 logger = logging.getLogger(__name__)
 
+# 连续增量更新惩罚系数的次数上限，超过后重新合并以消除浮点累加误差
+_RESYNC_INTERVAL = 64
+
 
 def _qubo_check(quadratic):
     for key in quadratic:
@@ -34,6 +41,17 @@ class QuboModel(BinaryModel):
         self.made = False
         self.variables = None
         self.matrix = None
+        # 目标函数和各约束项编译后的项，生成矩阵时按惩罚系数一次加权求和，只重新编译发生变化的组件。
+        # 各组件共享term_store.registry这一个变量注册表，它随模型保留，不在每次合并时重建
+        self.term_store = TermStore()
+        # term_store编号到variables编号的映射
+        self._index_mapping = None
+        # 参与本次合并的约束: id -> 约束对象。保存对象本身，id不会被新对象复用
+        self._made_constraints = {}
+        # 当前合并结果是否已由make()返回，返回后第一次增量更新前先复制系数字典
+        self._made_returned = False
+        # 上次重新合并以来的增量更新次数
+        self._incremental_updates = 0
 
     def _on_objective_change(self):
         """当目标函数发生变化时调用，重置相关状态"""
@@ -44,51 +62,195 @@ class QuboModel(BinaryModel):
         self.made = False
         self.qubo_expr_made = None
         self.matrix = None
+        self._index_mapping = None
+        self._made_constraints = {}
+        self._made_returned = False
+        self._incremental_updates = 0
+
+    def update_penalty(self, constraint, previous_penalty):
+        """约束的惩罚系数改变后，把 ``(新系数 - 旧系数) * 约束项`` 直接加到已合并的表达式上
+
+        只更新该约束涉及的项，稠密矩阵中对应的元素按更新后的系数改写；``make()`` 已经返回的表达式
+        不受影响。浮点系数逐次累加会与重新合并的结果产生舍入误差，连续增量更新
+        ``_RESYNC_INTERVAL`` 次后改为下次重新合并。约束不属于本次合并或系数不是数字时也重新合并。
+
+        Args:
+            constraint (PenaltyMethodConstraint): 惩罚系数改变的约束
+
+            previous_penalty (float): 改变前的惩罚系数
+        """
+        delta = constraint.penalty - previous_penalty
+        terms = constraint.constraint_expr
+        if (
+            not self.made
+            or self._made_constraints.get(id(constraint)) is not constraint
+            or self._incremental_updates >= _RESYNC_INTERVAL
+            or not isinstance(delta, numbers.Number)
+            or not isinstance(terms.offset, numbers.Number)
+            or not all(
+                isinstance(value, numbers.Number)
+                for value in terms.coefficient.values()
+            )
+        ):
+            self.invalidate_made_state()
+            return
+        if delta == 0:
+            return
+        made = self.qubo_expr_made
+        if self._made_returned:
+            made = self.qubo_expr_made = BinaryExpression(
+                dict(made.coefficient), made.offset
+            )
+            self._made_returned = False
+        coefficient = made.coefficient
+        reshaped = False
+        for key, value in terms.coefficient.items():
+            value = coefficient.get(key, 0) + delta * value
+            if value == 0:
+                reshaped |= coefficient.pop(key, None) is not None
+            else:
+                reshaped |= key not in coefficient
+                coefficient[key] = value
+        made.offset += delta * terms.offset
+        made.mark_modified()
+        self._incremental_updates += 1
+
+        if reshaped:
+            # 有项抵消为0或新出现，变量集合可能改变
+            variables = made.get_variables()
+            if variables != self.variables:
+                self.variables = variables
+                self.matrix = None
+                self._index_mapping = None
+        if self.matrix is not None:
+            keys = list(terms.coefficient)
+            index = self.variables
+            row = np.fromiter((index[key[0]] for key in keys), np.int64, len(keys))
+            col = np.fromiter((index[key[-1]] for key in keys), np.int64, len(keys))
+            swap = row > col
+            row[swap], col[swap] = col[swap], row[swap]
+            self.matrix[row, col] = np.fromiter(
+                (coefficient.get(key, 0) for key in keys), np.float64, len(keys)
+            )
+
+    def _assemble_terms(self):
+        """更新term_store中的组件，按惩罚系数一次加权求和"""
+        components = {"objective": (self.objective, 1)}
+        for constr_type, constraints_made in (
+            ("hard", self.hard_constraints_made),
+            ("soft", self.soft_constraints_made),
+        ):
+            for name, constraint in constraints_made.items():
+                components[(constr_type, name)] = (
+                    constraint.constraint_expr,
+                    constraint.penalty,
+                )
+        store = self.term_store
+        for name in [name for name in store if name not in components]:
+            store.remove(name)
+        for name, (expr, weight) in components.items():
+            if store.is_current(name, expr):
+                store.set_weight(name, weight)
+            else:
+                store.add(name, expr, weight)
+        return store.assemble()
 
     def make(self):
         """返回合并后的QUBO表达式
 
+        结果为基于字典的表达式，各项系数保持原有的数值类型。之后改变惩罚系数时按增量更新，
+        已返回的表达式不受影响。
+
         Returns:
             BinaryExpression: 合并的约束表达式
         """
+        made = self._make()
+        self._made_returned = True
+        return made
+
+    def _make(self):
+        """合并QUBO表达式，内部调用不标记结果已返回"""
         if self.made:
             return self.qubo_expr_made
 
         constraint_list = self.get_constraints_expr_list()
-
-        self.qubo_expr_made = self.objective + quicksum(constraint_list)
+        objective = self.objective
+        if isinstance(objective, CooBinaryExpression):
+            objective = objective.to_expression()
+        self.qubo_expr_made = objective + quicksum(constraint_list)
 
         _qubo_check(self.qubo_expr_made.coefficient)
         self.variables = self.qubo_expr_made.get_variables()
+        self._made_constraints = {
+            id(constraint): constraint
+            for constraints_made in (
+                self.hard_constraints_made,
+                self.soft_constraints_made,
+            )
+            for constraint in constraints_made.values()
+        }
+        self._made_returned = False
+        self._incremental_updates = 0
 
         self.made = True
         return self.qubo_expr_made
 
-    def get_matrix(self):
+    def get_matrix(self, sparse=False):
         """获取QUBO矩阵
 
-        Returns:
-            numpy.ndarray: QUBO矩阵
+        矩阵由 ``term_store`` 中编译后的目标函数和约束项按惩罚系数一次加权求和得到，
+        只重新编译变化了的组件。稠密矩阵在模型未改变时缓存，返回它的副本。
+
+        Args:
+            sparse (bool): 为True时返回只保存非零元素的 ``SparseMatrix``，
+                适合变量很多而矩阵很稀疏的模型。默认为False
 
+        Returns:
+            numpy.ndarray or SparseMatrix: 上三角形式的QUBO矩阵
+
+        Examples:
+            >>> import kaiwu as kw
+            >>> b1, b2 = kw.core.Binary("b1"), kw.core.Binary("b2")
+            >>> q_model = kw.core.QuboModel(b1 + 2 * b1 * b2)
+            >>> q_model.get_matrix(sparse=True).toarray()
+            array([[1., 2.],
+                   [0., 0.]])
         """
         self.compile_constraints()
-        self.make()
-        self.matrix = np.zeros((len(self.variables), len(self.variables)))
-        for key in self.qubo_expr_made.coefficient:
-            if len(key) == 2:
-                self.matrix[self.variables[key[0]], self.variables[key[1]]] = (
-                    self.qubo_expr_made.coefficient[key]
-                )
-            else:
-                self.matrix[self.variables[key[0]], self.variables[key[0]]] = (
-                    self.qubo_expr_made.coefficient[key]
-                )
-        return self.matrix
+        self._make()
+        if self.matrix is not None and not sparse:
+            return self.matrix.copy()
+        row, col, data = self._matrix_terms()
+        shape = (len(self.variables), len(self.variables))
+        if sparse:
+            return SparseMatrix(row, col, data, shape)
+        self.matrix = np.zeros(shape)
+        self.matrix[row, col] = data
+        return self.matrix.copy()
+
+    def _matrix_terms(self):
+        """加权求和的结果按 ``variables`` 编号转化为上三角矩阵的 (行, 列, 系数)"""
+        terms = self._assemble_terms()
+        names = self.term_store.registry
+        if self._index_mapping is None or len(self._index_mapping) != len(names):
+            index = self.variables
+            self._index_mapping = np.fromiter(
+                (index.get(name, -1) for name in names),
+                dtype=np.int64,
+                count=len(names),
+            )
+        row, col = self._index_mapping[terms.row], self._index_mapping[terms.col]
+        # 合并结果中已经抵消的变量没有编号
+        keep = (row >= 0) & (col >= 0)
+        row, col = row[keep], col[keep]
+        swap = row > col
+        row[swap], col[swap] = col[swap], row[swap]
+        return row, col, terms.value[keep].astype(np.float64)
 
     def get_variables(self):
         """获取qubo模型的variables"""
         self.compile_constraints()
-        self.make()
+        self._make()
         return self.variables
 
     def get_offset(self):
@@ -98,7 +260,7 @@ class QuboModel(BinaryModel):
     def get_sol_dict(self, qubo_solution):
         """根据解向量生成结果字典."""
         self.compile_constraints()
-        self.make()
+        self._make()
         return dict(
             (k, 1 if qubo_solution[idx] > 0 else 0)
             for k, idx in self.variables.items()
@@ -110,7 +272,7 @@ def calculate_qubo_value(qubo_matrix, offset, binary_configuration):
     """Q值计算器.
 
     Args:
-        qubo_matrix (np.ndarray): QUBO矩阵.
+        qubo_matrix (np.ndarray or SparseMatrix): QUBO矩阵.
 
         offset (float): 常数项
 
@@ -131,7 +293,7 @@ def calculate_qubo_value(qubo_matrix, offset, binary_configuration):
         >>> print(qubo_value)
         2.8
     """
-    return (binary_configuration.dot(qubo_matrix)).dot(binary_configuration) + offset
+    return (binary_configuration @ qubo_matrix) @ binary_configuration + offset
 
 
 def qubo_matrix_to_qubo_model(qubo_mat):
@@ -152,7 +314,10 @@ def qubo_matrix_to_qubo_model(qubo_mat):
         -8*b[0]*b[1]
     """
     vars_b = ndarray(len(qubo_mat), "b", Binary)
-    return QuboModel(vars_b.dot(qubo_mat).dot(vars_b))
+    model = QuboModel()
+    # 新建的表达式不被外部引用，直接作为目标函数，省去构造函数中的深拷贝
+    model.objective = quadratic_form(qubo_mat, vars_b)
+    return model
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.sparse_matrix
+
+功能: 不依赖SciPy的COO格式稀疏矩阵
+"""
+
+import numpy as np
+
+
+class SparseMatrix:
+    """COO格式的轻量稀疏矩阵.
+
+    只保存非零元素的行号、列号和值，重复位置的值相加。支持与稠密向量、矩阵的 ``@`` 运算，
+    可以直接交给 ``get_sorted_solutions``、``calculate_qubo_value`` 计算能量；
+    安装了SciPy时可以用 ``to_scipy`` 转为SciPy稀疏矩阵。
+
+    Args:
+        row (np.ndarray): 行号
+
+        col (np.ndarray): 列号
+
+        data (np.ndarray): 元素值
+
+        shape (tuple): 矩阵形状
+
+    Examples:
+        >>> import numpy as np
+        >>> import kaiwu as kw
+        >>> mat = kw.core.SparseMatrix([0, 0, 1], [0, 1, 1], [1.0, 2.0, 3.0], (2, 2))
+        >>> mat.toarray()
+        array([[1., 2.],
+               [0., 3.]])
+        >>> np.array([1, 1]) @ mat
+        array([1., 5.])
+        >>> mat @ np.array([1, 1])
+        array([3., 3.])
+    """
+
+    # 使 ndarray @ SparseMatrix 交给 __rmatmul__ 处理
+    __array_ufunc__ = None
+
+    def __init__(self, row, col, data, shape):
+        self.row = np.asarray(row, dtype=np.int64)
+        self.col = np.asarray(col, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+        self.shape = tuple(shape)
+        if not len(self.row) == len(self.col) == len(self.data):
+            raise ValueError("row, col and data should have the same length.")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(shape={self.shape}, nnz={self.nnz})"
+
+    @property
+    def nnz(self):
+        """保存的元素个数"""
+        return len(self.data)
+
+    @property
+    def T(self):  # pylint: disable=invalid-name
+        """转置矩阵"""
+        return SparseMatrix(self.col, self.row, self.data, self.shape[::-1])
+
+    def __neg__(self):
+        return SparseMatrix(self.row, self.col, -self.data, self.shape)
+
+    def __mul__(self, other):
+        if not np.isscalar(other):
+            return NotImplemented
+        return SparseMatrix(self.row, self.col, self.data * other, self.shape)
+
+    __rmul__ = __mul__
+
+    def toarray(self):
+        """转为稠密矩阵"""
+        matrix = np.zeros(self.shape)
+        np.add.at(matrix, (self.row, self.col), self.data)
+        return matrix
+
+    def to_scipy(self, fmt="csr"):
+        """转为SciPy稀疏矩阵，需要安装SciPy
+
+        Args:
+            fmt (str): SciPy稀疏矩阵格式，如 ``"csr"``、``"coo"``
+
+        Returns:
+            scipy.sparse.sparray: SciPy稀疏矩阵
+        """
+        try:
+            from scipy import sparse  # pylint: disable=import-outside-toplevel
+        except ImportError as err:
+            raise ImportError(
+                "SciPy is required to convert to a SciPy matrix."
+            ) from err
+        return sparse.coo_array(
+            (self.data, (self.row, self.col)), shape=self.shape
+        ).asformat(fmt)
+
+    def __matmul__(self, other):
+        other = np.asarray(other)
+        if other.ndim not in (1, 2) or other.shape[0] != self.shape[1]:
+            raise ValueError(
+                f"Shapes {self.shape} and {other.shape} are not aligned for matmul."
+            )
+        if other.ndim == 1:
+            return np.bincount(
+                self.row, weights=self.data * other[self.col], minlength=self.shape[0]
+            )
+        result = np.zeros((self.shape[0], other.shape[1]))
+        np.add.at(result, self.row, self.data[:, None] * other[self.col])
+        return result
+
+    def __rmatmul__(self, other):
+        other = np.asarray(other)
+        if other.ndim == 1:
+            return self.T @ other
+        return (self.T @ other.T).T
+
+    def dot(self, other):
+        """矩阵乘法，同 ``self @ other``"""
+        return self @ other
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.term_store
+
+功能: 按组件保存编译后的QUBO项并加权汇总
+"""
+
+import numpy as np
+from kaiwu.core._coo_expression import CooBinaryExpression
+from kaiwu.core._variable_registry import VariableRegistry
+from kaiwu.core._error import KaiwuError
+
+
+class TermStore:
+    """按组件保存编译后的QUBO项，汇总时一次加权求和.
+
+    每个组件(如目标函数、各约束项)编译为共享同一个变量注册表的 (row, col, value) 数组块和常数项，
+    权重单独保存。修改权重、删除或添加某个组件不会复制其他组件；``assemble`` 把各块按权重缩放后
+    一次拼接并合并重复项。
+
+    Args:
+        registry (VariableRegistry, optional): 共享的变量注册表，缺省时新建
+
+    Examples:
+        >>> import kaiwu as kw
+        >>> a, b = kw.core.Binary("a"), kw.core.Binary("b")
+        >>> store = kw.core.TermStore()
+        >>> store.add("objective", a + 2 * a * b)
+        >>> store.add("penalty", (a + b - 1) ** 2, weight=3)
+        >>> str(store.assemble())
+        '-2*a+8*a*b-3*b+3'
+        >>> store.set_weight("penalty", 0)
+        >>> str(store.assemble())
+        'a+2*a*b'
+    """
+
+    def __init__(self, registry=None):
+        self.registry = VariableRegistry() if registry is None else registry
+        # 组件名 -> (row, col, value, offset, 编译来源, 来源的修改版本)，权重单独保存以便只改权重
+        self._blocks = {}
+        self._weights = {}
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def __contains__(self, name):
+        return name in self._blocks
+
+    def __iter__(self):
+        return iter(self._blocks)
+
+    def add(self, name, expr, weight=1):
+        """编译表达式并添加为组件，同名组件会被替换
+
+        Args:
+            name (hashable): 组件名
+
+            expr (BinaryExpression): 二次表达式，系数须为数字
+
+            weight (float, optional): 权重. 默认为1
+        """
+        if max(map(len, expr.coefficient), default=0) > 2:
+            raise KaiwuError("Items higher than quadratic.")
+        compiled = CooBinaryExpression.from_expression(expr, self.registry).coalesce()
+        self._blocks[name] = (
+            compiled.row,
+            compiled.col,
+            compiled.value,
+            compiled.offset,
+            expr,
+            expr._derived_key(),  # pylint: disable=protected-access
+        )
+        self._weights[name] = weight
+
+    def is_current(self, name, expr):
+        """组件由该表达式编译且表达式此后未被修改"""
+        block = self._blocks.get(name)
+        return (
+            block is not None
+            and block[4] is expr
+            and block[5] == expr._derived_key()  # pylint: disable=protected-access
+        )
+
+    def get_terms(self, name):
+        """返回组件编译后的 (row, col, value, offset)，未乘权重"""
+        return self._blocks[name][:4]
+
+    def set_weight(self, name, weight):
+        """设置组件的权重"""
+        if name not in self._blocks:
+            raise KaiwuError(f"No such component {name}")
+        self._weights[name] = weight
+
+    def get_weight(self, name):
+        """返回组件的权重"""
+        return self._weights[name]
+
+    def remove(self, name):
+        """删除组件"""
+        del self._blocks[name]
+        del self._weights[name]
+
+    def assemble(self, names=None):
+        """按权重汇总组件
+
+        Args:
+            names (iterable, optional): 参与汇总的组件名，缺省为全部组件
+
+        Returns:
+            CooBinaryExpression: 合并了重复项的加权和
+        """
+        names = list(self._blocks if names is None else names)
+        blocks = [self._blocks[name] for name in names]
+        weights = [self._weights[name] for name in names]
+        offset = sum(weight * block[3] for weight, block in zip(weights, blocks))
+        if not blocks:
+            return CooBinaryExpression(self.registry, offset=offset)
+        sizes = [len(block[2]) for block in blocks]
+        value = np.concatenate([block[2] for block in blocks]) * np.repeat(
+            np.array(weights), sizes
+        )
+        return CooBinaryExpression(
+            self.registry,
+            np.concatenate([block[0] for block in blocks]),
+            np.concatenate([block[1] for block in blocks]),
+            value,
+            offset,
+        ).coalesce()
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
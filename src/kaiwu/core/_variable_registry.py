@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+模块: core.variable_registry
+
+功能: 变量名与稠密整数编号之间的双向映射
+"""
+
+import itertools
+import sys
+import numpy as np
+
+
+class VariableRegistry:
+    """变量注册表，将变量名驻留(intern)为从0开始的连续整数编号.
+
+    基于字典的 ``Expression`` 仍以变量名元组为键；注册表用于数组存储的部分：
+    ``CooBinaryExpression``、``TermStore``、``LinearExpressionArray`` 的项以整数编号保存。
+    ``QuboModel`` 的 ``term_store`` 持有模型唯一的注册表，生成矩阵时一次映射到 ``get_variables()``
+    的编号；``make()`` 的结果、解字典和Ising变量仍按变量名排序编号。构造模型时若要避免逐项哈希变量名，
+    应使用这些数组接口(如 ``ndarray(..., linear=True)``、``einsum``)，而不是逐项相加的字典表达式。
+
+    Args:
+        names (iterable, optional): 按顺序注册的变量名
+
+    Examples:
+        >>> import kaiwu as kw
+        >>> registry = kw.core.VariableRegistry(["a", "b"])
+        >>> registry.add("c")
+        2
+        >>> registry["b"]
+        1
+        >>> registry.get_name(2)
+        'c'
+        >>> registry.to_dict()
+        {'a': 0, 'b': 1, 'c': 2}
+    """
+
+    def __init__(self, names=None):
+        self._index = {}
+        self._names = []
+        if names is not None:
+            self.update(names)
+
+    @classmethod
+    def from_expression(cls, expr):
+        """按变量名排序注册表达式中的全部变量
+
+        Args:
+            expr (Expression): 表达式
+
+        Returns:
+            VariableRegistry: 与 ``expr.get_variables()`` 编号一致的注册表
+        """
+        return cls(expr.get_variables())
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __getitem__(self, name):
+        return self._index[name]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._names!r})"
+
+    def add(self, name):
+        """注册变量名，已存在时直接返回原编号
+
+        Args:
+            name (str): 变量名
+
+        Returns:
+            int: 变量编号
+        """
+        idx = self._index.get(name)
+        if idx is None:
+            name = sys.intern(name)
+            idx = len(self._names)
+            self._index[name] = idx
+            self._names.append(name)
+        return idx
+
+    def update(self, names):
+        """批量注册变量名
+
+        Args:
+            names (iterable): 变量名序列
+        """
+        for name in names:
+            self.add(name)
+
+    def add_many(self, names):
+        """批量注册变量名，返回各变量的编号数组
+
+        全部为新变量时整块分配连续编号，不逐个查找，变量名也不再驻留。
+
+        Args:
+            names (iterable): 变量名序列
+
+        Returns:
+            np.ndarray: 与names顺序对应的编号数组
+        """
+        names = list(names)
+        start = len(self._names)
+        index = dict(zip(names, range(start, start + len(names))))
+        if len(index) == len(names) and self._index.keys().isdisjoint(index):
+            self._index.update(index)
+            self._names.extend(names)
+            return np.arange(start, start + len(names), dtype=np.int64)
+        return np.array([self.add(name) for name in names], dtype=np.int64)
+
+    def index_pairs(self, keys):
+        """返回各项键中首、末变量的编号数组，一次项两者相同
+
+        未注册的变量按首次出现的顺序自动注册。
+
+        Args:
+            keys (iterable): 形如 ("a", "b") 或 ("a",) 的键
+
+        Returns:
+            tuple: (首变量编号, 末变量编号) 两个数组
+        """
+        keys = list(keys)
+        first = [key[0] for key in keys]
+        last = [key[-1] for key in keys]
+        index = self._index
+        for name in dict.fromkeys(itertools.chain.from_iterable(zip(first, last))):
+            if name not in index:
+                self.add(name)
+        return (
+            np.fromiter(map(index.__getitem__, first), np.int64, len(keys)),
+            np.fromiter(map(index.__getitem__, last), np.int64, len(keys)),
+        )
+
+    def get_index(self, name):
+        """获取变量编号"""
+        return self._index[name]
+
+    def get_name(self, idx):
+        """根据编号获取变量名"""
+        return self._names[idx]
+
+    def get_names(self):
+        """按编号顺序返回全部变量名(已驻留)"""
+        return list(self._names)
+
+    def to_dict(self):
+        """返回 {变量名: 编号} 字典，格式与 ``get_variables()`` 一致"""
+        return dict(self._index)
+
+    def encode(self, coefficient):
+        """将以变量名为键的系数字典转化为以整数编号为键的系数字典
+
+        二次项的键统一为 (小编号, 大编号) 的上三角形式，未注册的变量会被自动注册。
+
+        Args:
+            coefficient (dict): 形如 {("a", "b"): 1, ("a",): 2} 的系数字典
+
+        Returns:
+            dict: 形如 {(0, 1): 1, (0,): 2} 的系数字典
+        """
+        index = self._index
+        add = self.add
+        int_coefficient = {}
+        for key, value in coefficient.items():
+            if len(key) == 1:
+                idx = index.get(key[0])
+                int_key = (add(key[0]) if idx is None else idx,)
+            else:
+                idx_i = index.get(key[0])
+                idx_j = index.get(key[1])
+                if idx_i is None:
+                    idx_i = add(key[0])
+                if idx_j is None:
+                    idx_j = add(key[1])
+                int_key = (idx_i, idx_j) if idx_i < idx_j else (idx_j, idx_i)
+            if int_key in int_coefficient:
+                int_coefficient[int_key] += value
+            else:
+                int_coefficient[int_key] = value
+        return int_coefficient
+
+    def decode(self, int_coefficient):
+        """将以整数编号为键的系数字典还原为以变量名为键的系数字典
+
+        Args:
+            int_coefficient (dict): 以整数编号为键的系数字典
+
+        Returns:
+            dict: 以变量名为键的系数字典
+        """
+        names = self._names
+        return {
+            tuple(names[idx] for idx in key): value
+            for key, value in int_coefficient.items()
+        }
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
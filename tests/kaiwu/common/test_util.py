@@ -10,7 +10,9 @@ from numpy.testing import assert_equal, assert_allclose
 from common.config import BASE_DIR
 
 sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+import kaiwu as kw
 from kaiwu.common import hamiltonian, check_symmetric
+from kaiwu.common import HeapUniquePool, ArgpartitionUniquePool
 
 
 def test_hamiltonian_simple():
@@ -55,3 +57,22 @@ def test_check_symmetric_custom_tolerance():
     matrix = np.array([[1, 2, 3], [2, 4, 5], [3, 5 + 1e-5, 6]])
     assert check_symmetric(matrix, tolerance=1e-4) == True
     assert check_symmetric(matrix, tolerance=1e-6) == False
+
+
+def test_hamiltonian_sparse_matrix():
+    """Test hamiltonian and solution pools accept a sparse Ising matrix"""
+    x = kw.core.ndarray(3, "x", kw.core.Binary)
+    qubo_model = kw.core.QuboModel(x[0] * x[1] - 2 * x[1] * x[2] + x[0])
+    dense = kw.core.qubo_model_to_ising_model(qubo_model).get_matrix()
+    sparse = kw.core.qubo_model_to_ising_model(qubo_model, sparse=True).get_matrix()
+    c_list = np.array([[1, -1, 1, 1], [-1, 1, -1, 1], [1, 1, 1, 1]])
+    assert_allclose(hamiltonian(sparse, c_list), hamiltonian(dense, c_list))
+
+    heap_pool = HeapUniquePool(sparse, 4, 2)
+    heap_pool.extend(c_list)
+    arg_pool = ArgpartitionUniquePool(sparse, 4, 2)
+    arg_pool.extend(c_list, final=True)
+    assert_equal(
+        sorted(map(tuple, heap_pool.get_solutions())),
+        sorted(map(tuple, arg_pool.opt)),
+    )
@@ -25,3 +25,72 @@ def test_add_constraint_cnt():
     hobo_model.add_constraint(B.dot(x) == d, "constr2", penalty=2)
     assert len(hobo_model.hard_constraints) == 4
     assert len(hobo_model.soft_constraints) == 0
+
+
+def test_add_constraint_list_names():
+    """Lists and arrays of constraints are registered in bulk with nested names."""
+    x = kw.core.ndarray((12, 3), "x", kw.core.Binary)
+    model = BinaryModel(x.sum())
+    model.add_constraint(
+        [x[0, 0] + x[0, 1] == 1, [x[1, 0] == 1, x[1, 1] <= 0], x[2].sum()], "c"
+    )
+    model.add_constraint(list(x.sum(axis=1) == 1), "r", constr_type="soft")
+    grid = np.array([[x[i, j] == 1 for j in range(2)] for i in range(2)], dtype=object)
+    model.add_constraint(grid, "g", penalty=3)
+    model.add_constraint(x[0, 0] == 0, "c[0]")
+    assert list(model.hard_constraints) == [
+        "c[0]",
+        "c[1][0]",
+        "c[1][1]",
+        "c[2]",
+        "g[0][0]",
+        "g[0][1]",
+        "g[1][0]",
+        "g[1][1]",
+    ]
+    assert list(model.soft_constraints)[:2] == ["r[00]", "r[01]"]
+    assert model.hard_constraints["c[2]"].relation is None
+    assert model.hard_constraints["g[1][0]"].default_penalty == 3
+    assert model.hard_constraints["c[0]"].left_operand.coefficient == {("x[00][0]",): 1}
+
+
+class _OneByOne(kw.core.PenaltyMethodConstraint):
+    """Overriding the per-constraint hook disables the batch path."""
+
+    @classmethod
+    def from_constraint_definition(cls, name, constraint, parent_model):
+        return super().from_constraint_definition(name, constraint, parent_model)
+
+
+def test_compile_constraints_in_bulk():
+    """Bulk compilation matches compiling each constraint on its own."""
+    x = kw.core.ndarray((12,), "x", kw.core.Binary)
+    constraints = [
+        x[0] + x[1] <= 1,
+        2 * x[2] - 3 * x[3] >= -1,
+        0.5 * x[4] + 1.5 * x[5] < 2,
+        x[6] - x[7] > -1,
+        x[:3].sum() == 1,
+        (2 * x[:9]).sum() == 1,
+        (0.5 * x).sum() == 1.5,
+        x[:2].sum() + 0.0 == 0,
+        (x[8] + x[9]) * kw.core.Placeholder("p") == 1,
+        x[10] + x[11],
+    ]
+    models = []
+    for handler in (kw.core.PenaltyMethodConstraint, _OneByOne):
+        model = BinaryModel()
+        model.set_constraint_handler(handler)
+        model.add_constraint(constraints, "c")
+        model.compile_constraints()
+        models.append(model)
+    for name, made in models[0].hard_constraints_made.items():
+        expected = models[1].hard_constraints_made[name].constraint_expr
+        expr = made.constraint_expr
+        assert [(k, v, type(v)) for k, v in expr.coefficient.items()] == [
+            (k, v, type(v)) for k, v in expected.coefficient.items()
+        ]
+        assert (expr.offset, type(expr.offset)) == (
+            expected.offset,
+            type(expected.offset),
+        )
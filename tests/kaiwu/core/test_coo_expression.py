@@ -0,0 +1,125 @@
+"""
+Tests for core._coo_expression module
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+from common.config import BASE_DIR
+
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+import kaiwu as kw
+from kaiwu.core import (
+    Binary,
+    BinaryExpression,
+    CooBinaryExpression,
+    KaiwuError,
+    Placeholder,
+    VariableRegistry,
+)
+
+
+@pytest.fixture
+def variables():
+    return Binary("a"), Binary("b"), Binary("c")
+
+
+def test_roundtrip(variables):
+    """Converting to arrays and back keeps the coefficients."""
+    a, b, c = variables
+    expr = 2 * a * b - c + 3
+    coo = CooBinaryExpression.from_expression(expr)
+    assert coo.coefficient == expr.coefficient
+    assert coo.offset == 3
+    assert isinstance(coo.to_expression(), BinaryExpression)
+    assert coo.to_expression().coefficient == expr.coefficient
+
+
+def test_add_is_lazy_and_coalesces(variables):
+    """Addition concatenates arrays; coalescing merges and drops zeros."""
+    a, b, c = variables
+    registry = VariableRegistry()
+    left = CooBinaryExpression.from_expression(a + b, registry)
+    right = CooBinaryExpression.from_expression(c - b, registry)
+    total = left + right
+    assert len(total.value) == 4
+    assert total.coefficient == {("a",): 1, ("c",): 1}
+    assert len(total.value) == 2
+
+
+def test_scaling_and_mixed_arithmetic(variables):
+    """Scaling is vectorized and dict-based expressions interoperate."""
+    a, b, c = variables
+    coo = CooBinaryExpression.from_expression(a - 2 * b)
+    scaled = coo * 1.5 - 1
+    assert scaled.coefficient == {("a",): 1.5, ("b",): -3.0}
+    assert scaled.offset == -1
+
+    mixed = coo + a * c
+    assert isinstance(mixed, CooBinaryExpression)
+    assert mixed.coefficient == (a - 2 * b + a * c).coefficient
+    mixed = a * c + coo
+    assert mixed.coefficient == (a - 2 * b + a * c).coefficient
+
+    squared = coo**2
+    assert squared.coefficient == ((a - 2 * b) ** 2).coefficient
+
+
+def test_max_delta_arrays(variables):
+    """Max deltas computed from the arrays match the dict-based result."""
+    a, b, c = variables
+    expr = 3 * c * a - 2 * b * c + a - 4 * b
+    coo = CooBinaryExpression.from_expression(expr, VariableRegistry(["c", "b"]))
+    for got, expected in zip(coo.get_max_delta_arrays(), expr.get_max_delta_arrays()):
+        np.testing.assert_array_equal(got, expected)
+    assert coo.get_max_deltas() == expr.get_max_deltas()
+
+
+def test_different_registries(variables):
+    """Expressions with different registries are remapped when added."""
+    a, b, c = variables
+    left = CooBinaryExpression.from_expression(a * b, VariableRegistry(["b", "a"]))
+    right = CooBinaryExpression.from_expression(b * c + a, VariableRegistry())
+    assert (left + right).coefficient == (a * b + b * c + a).coefficient
+
+
+def test_concat_and_model(variables):
+    """concat sums many expressions and the result feeds QuboModel."""
+    a, b, c = variables
+    total = CooBinaryExpression.concat([a + b, 2, b * c, -a])
+    assert total.coefficient == {("b",): 1, ("b", "c"): 1}
+    assert total.offset == 2
+    matrix = kw.core.QuboModel(total).get_matrix()
+    assert (matrix == np.array([[1, 1], [0, 0]])).all()
+
+
+def test_get_val_and_variables(variables):
+    """Evaluation and variable listing work on the arrays."""
+    a, b, c = variables
+    expr = 3 * a * c - b + 1
+    coo = CooBinaryExpression.from_expression(expr)
+    sol_dict = {"a": 1, "b": 1, "c": 1}
+    assert coo.get_val(sol_dict) == expr.get_val(sol_dict)
+    assert coo.get_variables() == expr.get_variables()
+
+
+def test_placeholder_not_supported():
+    """Non-numeric coefficients cannot be stored in arrays."""
+    expr = Placeholder("p") * Binary("a")
+    with pytest.raises(KaiwuError):
+        CooBinaryExpression.from_expression(expr)
+
+
+def test_inplace_accumulation(variables):
+    """In-place operators append array chunks to the left operand."""
+    a, b, c = variables
+    acc = CooBinaryExpression.from_expression(a)
+    alias = acc
+    for _ in range(3):
+        acc += b * c
+    acc -= a
+    acc *= 2
+    assert acc is alias
+    assert acc.coefficient == {("b", "c"): 6}
@@ -0,0 +1,63 @@
+"""
+Tests for core._einsum module
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+from common.config import BASE_DIR
+
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+import kaiwu as kw
+from kaiwu.core import Binary, KaiwuError, einsum, quicksum
+
+
+def _assert_same(left, right):
+    diff = left - right
+    assert diff.coefficient == {} and diff.offset == 0
+
+
+def test_tsp_contraction():
+    """The rolled TSP objective matches the explicit loop."""
+    n = 6
+    x = kw.core.ndarray((n, n), "x", Binary)
+    dist = np.random.default_rng(0).integers(0, 9, size=(n, n))
+    cost = einsum("uv,uj,vj->", dist, x, np.roll(x, -1, axis=1))
+    expected = quicksum(
+        dist[u, v] * x[u, j] * x[v, (j + 1) % n]
+        for u in range(n)
+        for v in range(n)
+        for j in range(n)
+    )
+    _assert_same(cost, expected)
+
+
+def test_mixed_operands():
+    """Offsets, linear arrays, diagonals and implicit output are handled."""
+    x = kw.core.ndarray((2, 3), "x", Binary)
+    y = kw.core.ndarray((3, 3), "y", Binary)
+    shifted = einsum("ij->j", x + 1)
+    for j in range(3):
+        _assert_same(shifted[j], x[0, j] + x[1, j] + 2)
+    gram = einsum("ij,kj", x - 1, kw.core.ndarray((2, 3), "x", Binary, linear=True))
+    assert gram.shape == (2, 2)
+    _assert_same(gram[1, 0], quicksum((x[1] - 1) * x[0]))
+    _assert_same(gram[0, 0], 0 * x[0, 0])
+    diagonal = einsum("ii,i->i", y, np.array([1, 2, 3]))
+    assert [str(item) for item in diagonal] == ["y[0][0]", "2*y[1][1]", "3*y[2][2]"]
+    np.testing.assert_array_equal(
+        einsum("ij,jk", np.ones((2, 3)), np.ones((3, 2))), np.full((2, 2), 3.0)
+    )
+
+
+def test_invalid():
+    """Cubic products and bad subscripts are rejected."""
+    x = kw.core.ndarray((2, 3), "x", Binary)
+    with pytest.raises(KaiwuError):
+        einsum("ij,ij,ij->", x, x[::-1], x * x[0, 1])
+    with pytest.raises(ValueError):
+        einsum("ij,jk->ik", x, x)
+    with pytest.raises(ValueError):
+        einsum("ij->k", x)
@@ -0,0 +1,94 @@
+"""
+Tests for core._evaluator module
+"""
+
+import os
+import pickle
+import sys
+import numpy as np
+import pytest
+
+from common.config import BASE_DIR
+
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+import kaiwu as kw
+from kaiwu.core import Binary, ExpressionEvaluator, KaiwuError, get_val
+
+
+@pytest.fixture
+def expr():
+    x = [Binary(f"x{i}") for i in range(5)]
+    return kw.core.quicksum(x) ** 2 - 3 * x[0] * x[4] + 2 * x[2] + 0.5
+
+
+def test_matches_get_val(expr):
+    """evaluate, evaluate_batch and get_val agree with get_val."""
+    evaluator = expr.get_evaluator()
+    names = sorted(evaluator.get_variables(), key=evaluator.get_variables().get)
+    solutions = np.random.default_rng(0).integers(0, 2, size=(16, len(names)))
+    expected = [get_val(expr, dict(zip(names, row))) for row in solutions]
+    np.testing.assert_allclose(evaluator.evaluate_batch(solutions), expected)
+    np.testing.assert_allclose(evaluator.evaluate_batch(2 * solutions - 1), expected)
+    assert evaluator.evaluate(solutions[3]) == pytest.approx(expected[3])
+    assert evaluator.get_val(dict(zip(names, solutions[5]))) == pytest.approx(
+        expected[5]
+    )
+
+
+def test_cached_and_pickled(expr):
+    """The evaluator is cached per version and survives pickling."""
+    evaluator = expr.get_evaluator()
+    assert expr.get_evaluator() is evaluator
+    evaluator.evaluate(np.ones(5))
+    restored = pickle.loads(pickle.dumps(evaluator))
+    assert restored.get_variables() == evaluator.get_variables()
+    assert restored.evaluate(np.ones(5)) == evaluator.evaluate(np.ones(5))
+    expr += Binary("x0")
+    assert expr.get_evaluator() is not evaluator
+
+
+def test_model_and_placeholder():
+    """Models compile their objective and unfed placeholders are rejected."""
+    a, b = Binary("a"), Binary("b")
+    model = kw.core.BinaryModel(2 * a + b)
+    model.add_constraint(a + b == 1, "one", penalty=3)
+    assert ExpressionEvaluator(model).get_val({"a": 1, "b": 1}) == 3
+    assert model.get_value({"a": 1, "b": 1}) == 3
+    evaluator = model.objective.get_evaluator()
+    assert model.get_value({"a": 0, "b": 1}) == 1
+    assert model.objective.get_evaluator() is evaluator
+    model.objective.coefficient[("a",)] = 8
+    model.objective.mark_modified()
+    assert model.get_value({"a": 1, "b": 1}) == 9
+    left_operand = model.hard_constraints["one"].left_operand
+    assert model.verify_constraint({"a": 1, "b": 1})[0] == 1
+    left_operand.coefficient[("b",)] = 0
+    left_operand.mark_modified()
+    assert model.verify_constraint({"a": 1, "b": 1})[0] == 0
+    assert ExpressionEvaluator(4).evaluate(np.zeros(0)) == 4
+    with pytest.raises(KaiwuError):
+        ExpressionEvaluator(kw.core.Placeholder("p") * a)
+
+
+def test_array_evaluator():
+    """Arrays decode a batch of solutions into (N, *shape) values."""
+    x = kw.core.ndarray((3, 4), "x", Binary)
+    arr = x.sum(axis=1) * 2 - x[:, 0] * x[:, 1] + 1
+    model = kw.core.QuboModel(x.sum() + kw.core.Binary("y"))
+    variables = model.get_variables()
+    solutions = np.random.default_rng(1).choice([-1, 1], size=(8, len(variables)))
+    expected = [
+        [get_val(item, kw.core.get_sol_dict(row, variables)) for item in arr]
+        for row in solutions
+    ]
+    values = kw.core.get_val_batch(arr, solutions, variables)
+    assert values.shape == (8, 3)
+    np.testing.assert_allclose(values, expected)
+    np.testing.assert_allclose(arr.get_val_batch(solutions[2], variables), expected[2])
+
+    x_lin = kw.core.ndarray((3, 4), "x", Binary, linear=True)
+    np.testing.assert_allclose(
+        x_lin.get_val_batch(solutions, variables), x.get_val_batch(solutions, variables)
+    )
+    with pytest.raises(KaiwuError):
+        kw.core.ExpressionArrayEvaluator(np.array([kw.core.Placeholder("p") * x[0, 0]]))
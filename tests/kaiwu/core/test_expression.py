@@ -2,7 +2,9 @@
 Tests for core._expression module
 """
 
+import copy
 import os
+import pickle
 import sys
 import pytest
 
@@ -14,7 +16,7 @@ sys.path.insert(0, os.path.join(BASE_DIR, "src"))
 from kaiwu.core._error import KaiwuError
 from kaiwu.core._constraint import Constraint
 from kaiwu.core._expression import Expression, is_zero, _check_unit
-from kaiwu.core import Binary
+from kaiwu.core import Binary, BinaryModel
 
 
 @pytest.fixture
@@ -161,6 +163,17 @@ def test_get_max_deltas(expr_x, expr_y):
     assert neg_delta["y"] == 3  # 3 (linear)
 
 
+def test_get_max_delta_arrays(expr_x, expr_y):
+    """Test the array form of get_max_deltas is aligned with get_variables."""
+    expr = 4 * expr_x * expr_y - 3 * expr_y + 2 * expr_x
+    neg_delta, pos_delta = expr.get_max_delta_arrays()
+    assert list(expr.get_variables()) == ["x", "y"]
+    assert neg_delta.tolist() == [-2, 3]
+    assert pos_delta.tolist() == [6, 1]
+    neg_delta[0] = 100
+    assert expr.get_max_deltas()[0] == {"x": -2, "y": 3}
+
+
 def test_get_average_coefficient(expr_x, expr_y):
     """Test the get_average_coefficient method."""
     expr = 2 * expr_x - 4 * expr_y
@@ -171,3 +184,157 @@ def test_get_average_coefficient(expr_x, expr_y):
     expr_no_coeff = Expression(offset=10)
     with pytest.raises(ZeroDivisionError):
         expr_no_coeff.get_average_coefficient()
+
+
+def test_inplace_operators(expr_x, expr_y):
+    """Test +=, -= and *= mutate composite expressions in place."""
+    expr = expr_x + 1
+    alias = expr
+    expr += expr_y
+    assert expr is alias
+    assert expr.coefficient == {("x",): 1, ("y",): 1}
+
+    expr -= expr_x
+    assert expr is alias
+    assert expr.coefficient == {("y",): 1}
+    assert expr.offset == 1
+
+    expr *= 3
+    assert expr is alias
+    assert expr.coefficient == {("y",): 3}
+    assert expr.offset == 3
+
+    expr *= expr_x
+    assert expr is alias
+    assert expr.coefficient == {("x", "y"): 3, ("x",): 3}
+
+    expr += expr
+    assert expr.coefficient == {("x", "y"): 6, ("x",): 6}
+    expr -= expr
+    assert is_zero(expr)
+
+
+def test_inplace_operators_keep_variables(expr_x, expr_y):
+    """Test in-place operators never mutate plain variables."""
+    acc = expr_x
+    acc += expr_y
+    assert acc is not expr_x
+    assert expr_x.coefficient == {("x",): 1}
+    assert acc.coefficient == {("x",): 1, ("y",): 1}
+
+    total = 0
+    for _ in range(3):
+        total += 2 * expr_x
+    assert total.coefficient == {("x",): 6}
+    assert expr_x.coefficient == {("x",): 1}
+
+
+@pytest.mark.parametrize("scale", [1, 0.5])
+def test_linear_mul_fast_path(monkeypatch, scale):
+    """Test the vectorized linear product matches the generic kernel."""
+    from kaiwu.core import _expression
+
+    xs = [Binary(f"x{i}") for i in range(24)]
+    left = sum((scale * (i % 3 - 1) * x for i, x in enumerate(xs)), 0) - 2 * scale
+    right = sum((scale * x for x in xs[::-2]), 0) + scale
+
+    fast_square, fast_prod = left**2, left * right
+    monkeypatch.setattr(_expression, "_LINEAR_MUL_MIN_PAIRS", float("inf"))
+    slow_square, slow_prod = left**2, left * right
+
+    for fast, slow in ((fast_square, slow_square), (fast_prod, slow_prod)):
+        expected = {key: val for key, val in slow.coefficient.items() if val != 0}
+        assert fast.coefficient == expected
+        assert fast.offset == slow.offset
+    assert list(fast_square.coefficient) == list(slow_square.coefficient)
+    assert ("x11", "x3") in fast_square.coefficient
+    assert ("x3",) in fast_square.coefficient
+
+
+def test_derived_data_cache(expr_x, expr_y):
+    """Test derived data is cached until the expression is modified."""
+    expr = 2 * expr_x + 3 * expr_x * expr_y
+    variables = expr.get_variables()
+    assert variables == {"x": 0, "y": 1}
+    variables["z"] = 2
+    assert expr.get_variables() == {"x": 0, "y": 1}
+    assert expr.get_average_coefficient() == 2.5
+
+    expr -= 2 * expr_x
+    assert expr.get_variables() == {"x": 0, "y": 1}
+    assert expr.get_max_deltas() == ({"x": 0, "y": 0}, {"x": 3, "y": 3})
+    assert expr.get_average_coefficient() == 3
+
+    evaluator = expr.get_evaluator()
+    assert expr.get_evaluator() is evaluator
+    expr.coefficient[("y",)] = -1
+    expr.mark_modified()
+    assert expr.get_max_deltas() == ({"x": 0, "y": 1}, {"x": 3, "y": 2})
+    assert expr.get_evaluator() is not evaluator
+    assert expr.get_evaluator().get_val({"x": 1, "y": 1}) == 2
+
+    del expr.coefficient[("y",)]
+    expr.coefficient[("z",)] = 1
+    expr.mark_modified()
+    assert expr.get_variables() == {"x": 0, "y": 1, "z": 2}
+    expr.offset = 5
+    expr.mark_modified()
+    assert expr.get_evaluator().get_val({"x": 1, "y": 1, "z": 1}) == 9
+
+    expr.coefficient = {("x",): 4}
+    assert expr.get_variables() == {"x": 0}
+
+    expr.clear()
+    assert expr.get_variables() == {}
+
+
+def test_slotted_variables(expr_x, expr_y):
+    """Test variables have no instance dict and survive pickling and copying."""
+    assert not hasattr(expr_x, "__dict__")
+    assert expr_x.coefficient == {("x",): 1}
+    assert expr_x.get_variables() == {"x": 0}
+    with pytest.raises(AttributeError):
+        expr_x.extra = 1
+
+    expr = 2 * expr_x + expr_x * expr_y
+    restored = pickle.loads(pickle.dumps(expr))
+    assert restored.coefficient == expr.coefficient
+    restored = copy.deepcopy(expr_x)
+    assert isinstance(restored, Binary) and restored.name == "x"
+    assert restored.coefficient == {("x",): 1}
+
+    assert expr_x.coefficient is expr_x.coefficient
+    expr_x.coefficient[("x",)] = 3
+    expr_x.mark_modified()
+    assert expr_x.coefficient == {("x",): 3}
+    assert expr_x.get_val({"x": 1}) == 3
+    expr_x.coefficient.clear()
+    assert expr_x.coefficient == {}
+
+    expr_y.clear()
+    assert expr_y.coefficient == {}
+    assert pickle.loads(pickle.dumps(expr_y)).coefficient == {}
+
+
+def test_copy_on_write(expr_x, expr_y):
+    """Test copies share coefficients until one side is modified in place."""
+    expr = 2 * expr_x + expr_x * expr_y
+    shared = expr.copy()
+    assert shared.coefficient is expr.coefficient
+    shared *= 3
+    expr += expr_y
+    assert shared.coefficient == {("x",): 6, ("x", "y"): 3}
+    assert expr.coefficient == {("x",): 2, ("x", "y"): 1, ("y",): 1}
+
+    model = BinaryModel(expr)
+    assert model.objective.coefficient is not expr.coefficient
+    source = expr.coefficient
+    expr += expr_y
+    assert expr.coefficient is source
+    expr -= expr_x
+    expr.coefficient[("x", "y")] = 100
+    assert model.objective.coefficient == {("x",): 2, ("x", "y"): 1, ("y",): 1}
+
+    fed = expr.feed({})
+    fed += 1
+    assert expr.offset == 0
@@ -0,0 +1,84 @@
+"""
+Tests for core._lazy_expression module
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+from common.config import BASE_DIR
+
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+import kaiwu as kw
+from kaiwu.core import Binary, KaiwuError, LazyExpression, QuboModel, quicksum
+
+
+@pytest.fixture
+def variables():
+    return [Binary(f"x{i}") for i in range(4)]
+
+
+def test_operators_build_graph(variables):
+    """Operators return lazy nodes and flatten to the eager result."""
+    x0, x1, x2, x3 = variables
+    lazy = 2 * (LazyExpression(x0) + x1) - x2 * x3 + 1
+    eager = 2 * (x0 + x1) - x2 * x3 + 1
+    assert isinstance(lazy, LazyExpression)
+    assert isinstance(x3 - lazy, LazyExpression)
+    assert isinstance(x3 * lazy, LazyExpression)
+    assert lazy.coefficient == eager.coefficient
+    assert lazy.offset == eager.offset
+    assert (lazy**2).coefficient == (eager**2).coefficient
+    assert (x3 - lazy).coefficient == (x3 - eager).coefficient
+    with pytest.raises(KaiwuError):
+        _ = lazy**3
+
+
+def test_deep_chain_and_quicksum(variables):
+    """Long accumulation chains flatten without recursion."""
+    x0, x1, _, _ = variables
+    num_terms = sys.getrecursionlimit() * 2
+    expr = LazyExpression()
+    for _ in range(num_terms):
+        expr = expr + x0
+        expr += x1
+    total = quicksum([x0, expr, 1])
+    assert isinstance(total, LazyExpression)
+    assert total.coefficient == {("x0",): num_terms + 1, ("x1",): num_terms}
+    assert total.offset == 1
+
+
+def test_flatten_is_cached(variables):
+    """Flattening happens once and shared sub-graphs are reused."""
+    x0, x1, _, _ = variables
+    shared = LazyExpression(x0 + x1) ** 2
+    expr = shared + shared
+    flat = expr.flatten()
+    assert expr.flatten() is flat
+    assert flat.coefficient == (2 * (x0 + x1) ** 2).coefficient
+
+
+def test_model_make(variables):
+    """QuboModel flattens lazy objectives and constraints in make()."""
+    objective = LazyExpression()
+    for i, var in enumerate(variables):
+        objective = objective + (i + 1) * var
+    model = QuboModel(objective)
+    model.add_constraint(LazyExpression(quicksum(variables)) == 1, "one_hot", penalty=5)
+    eager = QuboModel(quicksum([(i + 1) * var for i, var in enumerate(variables)]))
+    eager.add_constraint(quicksum(variables) == 1, "one_hot", penalty=5)
+    np.testing.assert_array_equal(model.get_matrix(), eager.get_matrix())
+    sol_dict = {"x0": 1, "x1": 0, "x2": 1, "x3": 0}
+    assert kw.core.get_val(objective, sol_dict) == 4
+
+
+def test_shared_nodes_cannot_be_cleared(variables):
+    """Models share lazy nodes, so clearing one in place is rejected."""
+    x0, x1, _, _ = variables
+    objective = LazyExpression(x0) + 2 * x1
+    model = QuboModel(objective)
+    with pytest.raises(KaiwuError):
+        objective.clear()
+    assert model.objective.coefficient == {("x0",): 1, ("x1",): 2}
+    assert str(model.make()) == "x0+2*x1"
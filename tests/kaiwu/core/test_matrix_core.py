@@ -168,3 +168,164 @@ def test_binary_expression_array_invalid_sum():
     """Test BinaryExpressionArray sum with invalid input"""
     with pytest.raises(ValueError):
         BinaryExpressionNDArray.sum(None)  # Not a numpy array
+
+
+def test_dot_numeric_fast_path():
+    """Numeric x expression array products match the generic path"""
+    x = ndarray((3, 4), "x", Binary)
+    expr = 2 * x + x[:, ::-1] * x + 1
+    mat = np.arange(-6, 6).reshape(4, 3)
+    for fast, ref in [
+        (expr @ mat, dot(expr, mat.astype(object))),
+        (mat @ expr, dot(mat.astype(object), expr)),
+        (expr[0].dot(mat[:, 0]), dot(expr[0], mat[:, 0].astype(object))),
+    ]:
+        assert np.shape(fast) == np.shape(ref)
+        for fast_item, ref_item in zip(np.ravel(fast), np.ravel(ref)):
+            assert fast_item.coefficient == ref_item.coefficient
+            assert fast_item.offset == ref_item.offset
+    assert isinstance(mat @ expr, BinaryExpressionNDArray)
+
+
+def test_quadratic_form():
+    """quadratic_form matches x.dot(Q).dot(x) for dense and COO input"""
+    x = ndarray(5, "x", Binary)
+    mat = np.random.default_rng(0).integers(-3, 4, size=(5, 5))
+    linear = np.arange(5)
+    expr = kw.core.quadratic_form(mat, x, linear, offset=1.5)
+    ref = x.dot(mat.astype(object)).dot(x) + dot(linear.astype(object), x) + 1.5
+    assert expr.coefficient == ref.coefficient
+    assert expr.offset == 1.5
+
+    row, col = np.nonzero(mat)
+    coo = kw.core.quadratic_form((row, col, mat[row, col]), x)
+    assert coo.coefficient == kw.core.quadratic_form(mat, x).coefficient
+
+    with pytest.raises(kw.core.KaiwuError):
+        kw.core.quadratic_form(mat, 2 * x)
+    with pytest.raises(kw.core.KaiwuError):
+        kw.core.quadratic_form(mat[:4, :4], x)
+
+
+def _assert_same_elements(left, right):
+    for left_item, right_item in zip(np.ravel(left), np.ravel(right)):
+        assert left_item.coefficient == right_item.coefficient
+        assert left_item.offset == right_item.offset
+
+
+def test_linear_expression_array():
+    """LinearExpressionArray matches the object-array results"""
+    x_lin = ndarray((3, 4), "x", Binary, linear=True)
+    x_obj = ndarray((3, 4), "x", Binary)
+    assert isinstance(x_lin, kw.core.LinearExpressionArray)
+    mat = np.arange(12).reshape(4, 3)
+    pairs = [
+        (x_lin.sum(axis=0), x_obj.sum(axis=0)),
+        (x_lin @ mat, x_obj.dot(mat)),
+        (mat @ x_lin, dot(mat, x_obj)),
+        (2 * x_lin[:, 1:] - np.arange(3) + 1, 2 * x_obj[:, 1:] - np.arange(3) + 1),
+        (x_lin.T + x_obj.T, 2 * x_obj.T),
+    ]
+    for lin, obj in pairs:
+        assert lin.shape == obj.shape
+        _assert_same_elements(lin.to_ndarray(), obj)
+    assert str(x_lin.sum()) == str(x_obj.sum())
+    assert x_lin.sum(axis=(0, -1), keepdims=True).shape == (1, 1)
+    assert str((x_lin.sum(axis=1) == 1)[0]) == "x[0][0]+x[0][1]+x[0][2]+x[0][3]-1==0"
+    assert str((x_lin * x_lin.T.T)[0, 1]) == "x[0][1]"
+
+    sol_dict = {"x[1][2]": 1, "x[2][0]": 1}
+    assert_array_equal(x_lin.sum(axis=1).get_val(sol_dict), [0, 1, 1])
+    with pytest.raises(kw.core.KaiwuError):
+        kw.core.LinearExpressionArray.from_array(x_obj * x_obj[0])
+
+
+def test_binary_expression_array_sum_axes():
+    """Sum over tuple axes with keepdims, where and initial"""
+    x = ndarray((2, 3, 4), "x", Binary)
+    total = x.sum(axis=(0, 2))
+    assert total.shape == (3,)
+    assert str(total[1]) == str(kw.core.quicksum(x[:, 1, :].flatten().tolist()))
+    kept = x.sum(axis=(0, -1), keepdims=True)
+    assert kept.shape == (1, 3, 1)
+    assert str(kept[0, 1, 0]) == str(total[1])
+    assert x.sum(axis=None, keepdims=True).shape == (1, 1, 1)
+
+    mask = np.array([True, False, True, False])
+    assert str(x.sum(axis=2, where=mask, initial=2)[0, 0]) == "x[0][0][0]+x[0][0][2]+2"
+    with pytest.raises(ValueError):
+        x.sum(axis=3)
+
+
+def test_constraint_array():
+    """Array comparisons build a ConstraintArray that models add in bulk"""
+    x = ndarray((2, 3), "x", Binary)
+    constraints = x.sum(axis=1) == 1
+    assert isinstance(constraints, kw.core.ConstraintArray)
+    assert constraints.shape == (2,)
+    assert str(constraints[1]) == "x[1][0]+x[1][1]+x[1][2]-1==0"
+    pairwise = x[:, :-1] + x[:, 1:] <= np.array([1, 2])
+    assert pairwise.shape == (2, 2)
+    assert str(pairwise[0, 1]) == "x[0][2]+x[0][1]-2<=0"
+
+    expected = [[str(pairwise[i, j]) for j in range(2)] for i in range(2)]
+    flat = [item for row in expected for item in row]
+    assert [str(c) for c in pairwise.flatten()] == flat
+    assert [str(c) for c in pairwise.ravel()] == flat
+    assert [str(c) for c in pairwise.flat] == flat
+    assert [[str(c) for c in row] for row in pairwise.tolist()] == expected
+    assert pairwise.reshape(4, 1).shape == (4, 1)
+    assert str(pairwise.reshape(4, 1)[3, 0]) == expected[1][1]
+    assert str(pairwise.reshape((1, 4)).squeeze()[2]) == expected[1][0]
+    assert str(pairwise.T[1, 0]) == expected[0][1]
+    assert str(pairwise.transpose()[0, 1]) == expected[1][0]
+    assert str(pairwise.swapaxes(0, 1)[0, 1]) == expected[1][0]
+    assert pairwise.copy().relation == "<="
+
+    model = kw.core.BinaryModel(x.sum())
+    model.add_constraint(constraints, "row", penalty=3)
+    model.add_constraint(x[0] >= x[1], "col")
+    assert list(model.hard_constraints) == [
+        "row[0]",
+        "row[1]",
+        "col[0]",
+        "col[1]",
+        "col[2]",
+    ]
+    assert model.hard_constraints["row[1]"].default_penalty == 3
+    with pytest.raises(kw.core.KaiwuError):
+        model.add_constraint(x[0] <= 1, "bad", slack_var_expr=[Binary("s")])
+
+    rows = x.sum(axis=1) - 1
+    model.add_constraint(rows == 0, "zero")
+    rows[0].coefficient[("x[0][0]",)] = 5
+    rows[1] += x[0, 0]
+    assert str(model.hard_constraints["zero[0]"]) == "x[0][0]+x[0][1]+x[0][2]-1==0"
+    assert str(model.hard_constraints["zero[1]"]) == "x[1][0]+x[1][1]+x[1][2]-1==0"
+
+
+def test_binary_expression_array_numeric_ufuncs():
+    """Arithmetic with numbers matches the element-wise object loop"""
+    x = ndarray((2, 3), "x", Binary)
+    x[1, 2] = 0.5 * x[0, 0] * x[1, 1] + 2
+    plain = x.view(np.ndarray)
+    weights = np.array([[1.5, 0, -2], [3, 1, 0.25]])
+    operations = [
+        lambda a: a * weights,
+        lambda a: 2 * a + 1,
+        lambda a: a - np.arange(3),
+        lambda a: np.arange(3) - a,
+        lambda a: -a,
+        lambda a: a**1,
+        lambda a: a * 0,
+    ]
+    for operation in operations:
+        result = operation(x)
+        assert isinstance(result, BinaryExpressionNDArray)
+        assert [str(item) for item in result.flat] == [
+            str(item) for item in operation(plain).flat
+        ]
+    zeros = kw.core.zeros((2,)) * 3 + 1
+    assert zeros.tolist() == [1, 1]
+    spins = ndarray(2, "s", kw.core.Spin) * 2
+    assert isinstance(spins[0], kw.core.IsingExpression)
@@ -0,0 +1,59 @@
+"""
+Tests for core._term_store module
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+from common.config import BASE_DIR
+
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+import kaiwu as kw
+from kaiwu.core import Binary, KaiwuError, TermStore
+
+
+def test_weighted_assembly():
+    """Components are compiled once and summed with their weights."""
+    x = [Binary(f"x{i}") for i in range(4)]
+    objective = 2 * x[0] * x[1] - x[2] + 1
+    penalty = (x[1] + x[2] + x[3] - 1) ** 2
+    store = TermStore()
+    store.add("objective", objective)
+    store.add("penalty", penalty, weight=3)
+    assert "penalty" in store and len(store) == 2
+    assert (store.assemble() - (objective + 3 * penalty)).coefficient == {}
+
+    terms = store.get_terms("penalty")
+    store.set_weight("penalty", 0.5)
+    assert store.get_terms("penalty")[0] is terms[0]
+    assert (store.assemble() - (objective + 0.5 * penalty)).coefficient == {}
+    assert (store.assemble(["penalty"]) - 0.5 * penalty).coefficient == {}
+
+    store.remove("penalty")
+    assert str(store.assemble()) == str(objective)
+    assert store.is_current("objective", objective)
+    objective += x[3]
+    assert not store.is_current("objective", objective)
+    with pytest.raises(KaiwuError):
+        store.add("cubic", x[0] * x[1] * x[2])
+
+
+def test_model_reuses_components():
+    """Remaking a model only recompiles changed components."""
+    x = kw.core.ndarray((3, 3), "x", Binary)
+    model = kw.core.QuboModel(kw.core.einsum("ij,ij->", np.arange(9).reshape(3, 3), x))
+    model.add_constraint(x.sum(axis=1) == 1, "row")
+    matrix = model.get_matrix().copy()
+    terms = model.term_store.get_terms(("hard", "row[0]"))
+
+    model.hard_constraints_made["row[1]"].set_penalty(4)
+    model.set_objective(x[0, 0] * x[1, 1])
+    model.make()
+    assert model.term_store.get_terms(("hard", "row[0]"))[0] is terms[0]
+    expected = x[0, 0] * x[1, 1] + kw.core.quicksum(
+        (1 if i != 1 else 4) * (x[i].sum() - 1) ** 2 for i in range(3)
+    )
+    assert (model.make() - expected).coefficient == {}
+    assert not np.array_equal(model.get_matrix(), matrix)
@@ -0,0 +1,88 @@
+"""
+Tests for core._variable_registry module
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+from common.config import BASE_DIR
+
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+import kaiwu as kw
+from kaiwu.core import Binary, VariableRegistry
+
+
+def test_registry_add_and_lookup():
+    """Names are interned to dense ids in insertion order."""
+    registry = VariableRegistry()
+    assert registry.add("y") == 0
+    assert registry.add("x") == 1
+    assert registry.add("y") == 0
+    assert len(registry) == 2
+    assert "x" in registry
+    assert registry["x"] == 1
+    assert registry.get_name(0) == "y"
+    assert registry.get_names() == ["y", "x"]
+    assert registry.to_dict() == {"y": 0, "x": 1}
+
+
+def test_registry_from_expression_sorted():
+    """from_expression numbers the variables like get_variables."""
+    x, y, z = Binary("x"), Binary("y"), Binary("z")
+    expr = z * x + y
+    registry = VariableRegistry.from_expression(expr)
+    assert registry.to_dict() == expr.get_variables()
+
+
+def test_registry_encode_decode_roundtrip():
+    """Encoding uses upper-triangular int keys and decoding restores names."""
+    registry = VariableRegistry(["b", "a"])
+    coefficient = {("a", "b"): 2, ("a",): 3, ("c",): -1}
+    encoded = registry.encode(coefficient)
+    assert encoded == {(0, 1): 2, (1,): 3, (2,): -1}
+    assert registry.get_name(2) == "c"
+    assert registry.decode(encoded) == {("b", "a"): 2, ("a",): 3, ("c",): -1}
+
+
+def test_qubo_model_uses_registry():
+    """QuboModel keeps one registry across makes and maps solutions back to names."""
+    x, y = Binary("x"), Binary("y")
+    qubo_model = kw.core.QuboModel(2 * y * x - y)
+    registry = qubo_model.term_store.registry
+    matrix = qubo_model.get_matrix()
+    assert registry.to_dict() == {"y": 0, "x": 1}
+    assert qubo_model.get_variables() == {"x": 0, "y": 1}
+    assert (matrix == np.array([[0, 2], [0, -1]])).all()
+    assert qubo_model.get_sol_dict(np.array([1, -1])) == {"x": 1, "y": 0}
+
+    qubo_model.set_objective(2 * x * y - x)
+    assert (qubo_model.get_matrix() == np.array([[-1, 2], [0, 0]])).all()
+    assert qubo_model.term_store.registry is registry
+
+
+def test_registry_add_many_and_ndarray():
+    """Whole variable arrays are registered as contiguous id blocks."""
+    registry = VariableRegistry(["y"])
+    np.testing.assert_array_equal(registry.add_many(["a", "b"]), [1, 2])
+    np.testing.assert_array_equal(registry.add_many(["c", "a", "c"]), [3, 1, 3])
+    assert registry.get_names() == ["y", "a", "b", "c"]
+
+    with pytest.raises(ValueError):
+        kw.core.ndarray((2, 11), "x", Binary, registry=registry)
+    x = kw.core.ndarray((2, 11), "x", Binary)
+    assert str(x[1, 3]) == "x[1][03]"
+    assert [var.coefficient for var in x[0, :2]] == [
+        {("x[0][00]",): 1},
+        {("x[0][01]",): 1},
+    ]
+    x_lin = kw.core.ndarray((2, 11), "x", Binary, linear=True, registry=registry)
+    assert len(registry) == 4 + 22
+    assert registry["x[1][03]"] == 4 + 11 + 3
+    assert x_lin.registry is registry
+    y_lin = kw.core.ndarray(
+        2, "y", lambda n: 2 * Binary(n), linear=True, registry=registry
+    )
+    assert y_lin.registry is registry and registry["y[1]"] == 27
+    assert str((x_lin.sum(axis=1) + x_lin[0].sum())[1]) == str(x[1].sum() + x[0].sum())
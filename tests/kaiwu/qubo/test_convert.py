@@ -127,3 +127,27 @@ def test_make_no_constraint():
     qubo_model = kw.core.QuboModel(q)
     ising_model = kw.core.qubo_model_to_ising_model(qubo_model)
     assert (ising_model.matrix == mat).all(), "自动make出现问题"
+
+
+def test_sparse_matrix_output():
+    x = kw.core.ndarray((5,), "x", kw.core.Binary)
+    qubo_model = kw.core.QuboModel(3 * x[0] * x[4] - x[1] + 2 * x[2] * x[3] + 1)
+    qubo_model.add_constraint(x[1] + x[2] == 1, "c", penalty=2)
+    sparse = qubo_model.get_matrix(sparse=True)
+    assert isinstance(sparse, kw.core.SparseMatrix)
+    assert np.array_equal(sparse.toarray(), qubo_model.get_matrix())
+
+    ising_model = kw.core.qubo_model_to_ising_model(qubo_model)
+    sparse_ising = kw.core.qubo_model_to_ising_model(qubo_model, sparse=True)
+    assert np.allclose(sparse_ising.matrix.toarray(), ising_model.matrix)
+    assert sparse_ising.bias == ising_model.bias
+
+    solutions = np.random.default_rng(0).choice([-1, 1], size=(8, 6))
+    _, hamilton = kw.core.get_sorted_solutions(ising_model.matrix, solutions)
+    _, sparse_hamilton = kw.core.get_sorted_solutions(sparse_ising.matrix, solutions)
+    assert np.allclose(hamilton, sparse_hamilton)
+    binary = solutions[0, :-1] > 0
+    assert np.isclose(
+        kw.core.calculate_qubo_value(sparse, 0, binary),
+        kw.core.calculate_qubo_value(qubo_model.get_matrix(), 0, binary),
+    )
@@ -5,7 +5,7 @@ from common.config import BASE_DIR
 sys.path.insert(0, os.path.join(BASE_DIR, "src"))
 import numpy as np
 import kaiwu as kw
-from kaiwu.core import Binary, get_val, get_val, get_sol_dict
+from kaiwu.core import Binary, get_val, get_val, get_sol_dict, get_val_batch
 from kaiwu.core import QuboModel
 
 
@@ -48,3 +48,27 @@ def test_get_val_array():
     x_val = get_val(x, sol_dict)
     ans_x_val = np.array([[1.0, 0.0], [1.0, 0.0]])
     assert (x_val == ans_x_val).all()
+
+
+def test_get_val_batch(monkeypatch):
+    a, b, c = Binary("a"), Binary("b"), Binary("c")
+    z = a * b * 3 + 2 + c * b + (1 + c + 1) * 2 * a
+    rng = np.random.default_rng(0)
+    solutions = rng.integers(0, 2, size=(50, 3))
+    variables = z.get_variables()
+    expected = [get_val(z, dict(zip(variables, sol.tolist()))) for sol in solutions]
+    assert np.allclose(get_val_batch(z, solutions), expected)
+    assert np.allclose(get_val_batch(z, 2 * solutions - 1, variables), expected)
+    assert get_val_batch(z, solutions[0]) == expected[0]
+
+    # 变量顺序由variables决定，缺失的变量取0
+    reordered = get_val_batch(z, solutions[:, ::-1], {"c": 0, "b": 1})
+    expected = [get_val(z, {"b": sol[1], "c": sol[2]}) for sol in solutions]
+    assert np.allclose(reordered, expected)
+
+    # 稠密矩阵路径与分块逐项路径结果一致
+    from kaiwu.core import _evaluator
+
+    dense = get_val_batch(z, solutions, variables)
+    monkeypatch.setattr(_evaluator, "_BATCH_CHUNK_ELEMENTS", 4)
+    assert np.allclose(get_val_batch(z, solutions, variables), dense)
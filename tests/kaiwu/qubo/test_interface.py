@@ -1,11 +1,13 @@
 import os
 import sys
+import numpy as np
+import pytest
 from common.config import BASE_DIR
 
 sys.path.insert(0, os.path.join(BASE_DIR, "src"))
 import kaiwu as kw
 from kaiwu.core import KaiwuError, QuboModel
-from kaiwu.core import Binary, quicksum
+from kaiwu.core import Binary, quicksum, quickdot
 
 
 def test_details():
@@ -29,3 +31,34 @@ def test_quicksum():
         x = quicksum(Binary("x"))
     except TypeError:
         pass
+
+
+def test_quicksum_streaming():
+    x = kw.core.ndarray((2, 3), "x", Binary)
+    assert quicksum(x).coefficient == x.sum().coefficient
+    assert (
+        quicksum(x[0, j] for j in range(3)).coefficient
+        == quicksum(x[0].tolist()).coefficient
+    )
+
+
+def test_quickdot():
+    x = kw.core.ndarray((2, 3), "x", Binary)
+    weights = np.arange(6).reshape(2, 3)
+    expected = quicksum([int(w) * v for w, v in zip(weights.flat, x.flat)])
+    assert quickdot(weights, x).coefficient == expected.coefficient
+    qdot = quickdot([2, -1, 0.5], (q for q in [x[0, 0], x[0, 0] * x[1, 1], 4]))
+    assert qdot.coefficient == {("x[0][0]",): 2, ("x[0][0]", "x[1][1]"): -1}
+    assert qdot.offset == 2
+    with pytest.raises(KaiwuError):
+        quickdot([1, 2], [x[0, 0]])
+    p = kw.core.Placeholder("p")
+    qdot = quickdot([p, 2], [x[0, 0], x[0, 1]])
+    assert qdot.feed({"p": 3}).coefficient == {("x[0][0]",): 3, ("x[0][1]",): 2}
+
+    def failing():
+        yield x[0, 0]
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        quickdot([1, 2], failing())
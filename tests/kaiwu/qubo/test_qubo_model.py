@@ -7,6 +7,7 @@ from kaiwu.core import qubo_model_to_ising_model
 
 sys.path.insert(0, os.path.join(BASE_DIR, "src"))
 import numpy as np
+import pytest
 import kaiwu as kw
 from kaiwu.core import Binary, Integer, PenaltyMethodConstraint
 
@@ -59,3 +60,106 @@ class TestQuboModel:
         ).all(), "matrix does not match!"
         assert q_model.get_offset() == 0, "offset does not match!"
         assert q_model.get_variables() == {"b1": 0, "b2": 1}, "variables do not match"
+
+    def test_incremental_penalty_update(self):
+        x = kw.core.ndarray((3,), "x", Binary)
+        q_model = kw.core.QuboModel(x[0] + 2 * x[1] * x[2] - x[2])
+        q_model.add_constraint(x[0] + x[1] == 1, "c0")
+        q_model.add_constraint(x[1] + x[2] <= 1, "c1", penalty=3)
+        matrix = q_model.get_matrix()
+        made = q_model.make()
+        made_str = str(made)
+        matrix[0, 0] = 100
+        constraints = q_model.hard_constraints_made
+        constraints["c1"].set_penalty(5)
+        assert q_model.made and str(made) == made_str
+        made = q_model.make()
+        matrix = q_model.get_matrix()
+
+        expected = kw.core.QuboModel(x[0] + 2 * x[1] * x[2] - x[2])
+        expected.add_constraint(x[0] + x[1] == 1, "c0")
+        expected.add_constraint(x[1] + x[2] <= 1, "c1", penalty=5)
+        expected.compile_constraints()
+        assert str(expected.make()) == str(made)
+        assert np.allclose(q_model.get_matrix(), expected.get_matrix())
+        matrix *= -1
+        assert np.allclose(q_model.get_matrix(), expected.get_matrix())
+        constraints["c1"].set_penalty(3)
+        constraints["c1"].set_penalty(5)
+        assert q_model.made and str(q_model.make()) == str(made)
+
+        # 合并结果中已抵消为0的项重新出现，变量和矩阵随之更新
+        constraints["c0"].set_penalty(2)
+        assert q_model.made
+        expected.hard_constraints_made["c0"].set_penalty(2)
+        assert str(q_model.make()) == str(expected.make())
+        assert q_model.get_variables() == expected.get_variables()
+        assert np.allclose(q_model.get_matrix(), expected.get_matrix())
+
+        # make()返回基于字典的表达式；不属于本次合并的约束对象不会按增量更新
+        made = q_model.make()
+        assert type(made) is kw.core.BinaryExpression
+        assert made.coefficient is made.coefficient
+        stranger = kw.core.PenaltyMethodConstraint(x[0] ** 2, 1, q_model)
+        stranger.set_penalty(4)
+        assert not q_model.made
+
+    def test_make_keeps_coefficient_types(self):
+        x = kw.core.ndarray((3,), "x", Binary)
+        q_model = kw.core.QuboModel(x[0] + 2 * x[1] * x[2] - x[2])
+        q_model.add_constraint(x[0] + x[1] == 1, "c0", penalty=2)
+        q_model.add_constraint(x[1] + x[2] <= 1, "c1", penalty=0.5)
+        q_model.compile_constraints()
+        made = q_model.make()
+        assert type(made) is kw.core.BinaryExpression
+        assert made is q_model.make()
+        assert type(made.coefficient[("x[0]", "x[1]")]) is int
+        assert type(made.coefficient[("x[1]", "x[2]")]) is float
+
+        # 矩阵由term_store加权求和得到，与合并后的字典一致
+        variables = q_model.get_variables()
+        expected = np.zeros((len(variables), len(variables)))
+        for key, value in made.coefficient.items():
+            expected[variables[key[0]], variables[key[-1]]] = value
+        assert np.allclose(q_model.get_matrix(), expected)
+        assert np.allclose(q_model.get_matrix(sparse=True).toarray(), expected)
+
+    def test_many_penalty_updates(self):
+        x = kw.core.ndarray((4,), "x", Binary)
+        objective = x[0] + 2 * x[1] * x[2] - 3 * x[3]
+        q_model = kw.core.QuboModel(objective)
+        q_model.add_constraint(x[0] + x[1] + x[2] == 1, "c0")
+        q_model.add_constraint(x[1] + x[3] <= 1, "c1")
+        q_model.compile_constraints()
+        q_model.get_matrix()
+        constraints = q_model.hard_constraints_made
+
+        # 整数惩罚系数按增量更新后系数仍为整数
+        constraints["c0"].set_penalty(4)
+        assert q_model.made
+        assert type(q_model.make().coefficient[("x[0]", "x[1]")]) is int
+
+        rng = np.random.default_rng(0)
+        rebuilds = 0
+        for step in range(300):
+            name = ("c0", "c1")[step % 2]
+            constraints[name].set_penalty(float(rng.uniform(0.1, 10)))
+            rebuilds += not q_model.made
+            if step % 7 == 0:
+                made = q_model.make()
+        # 浮点误差不会无限累积，连续增量更新一定次数后重新合并
+        assert rebuilds >= 300 // 64
+
+        expected = kw.core.QuboModel(objective)
+        expected.add_constraint(x[0] + x[1] + x[2] == 1, "c0")
+        expected.add_constraint(x[1] + x[3] <= 1, "c1")
+        expected.compile_constraints()
+        for name, constraint in constraints.items():
+            expected.hard_constraints_made[name].set_penalty(constraint.penalty)
+        made, expected_made = q_model.make(), expected.make()
+        assert made.coefficient.keys() == expected_made.coefficient.keys()
+        for key, value in expected_made.coefficient.items():
+            assert made.coefficient[key] == pytest.approx(value)
+        assert made.offset == pytest.approx(expected_made.offset)
+        assert q_model.get_variables() == expected.get_variables()
+        assert np.allclose(q_model.get_matrix(), expected.get_matrix())